@@ -1,9 +1,22 @@
+"""Generating the reverse complement of a DNA sequence"""
+
+# Complement of every IUPAC nucleotide code, in upper and lower case;
+# U (RNA) complements to A, anything else (gaps, '*') is left unchanged
+IUPAC_BASES = "ACGTUMRWSYKVHDBN"
+IUPAC_COMPLEMENTS = "TGCAAKYWSRMBDHVN"
+STR_COMPLEMENT_TABLE = str.maketrans(IUPAC_BASES + IUPAC_BASES.lower(),
+                                     IUPAC_COMPLEMENTS + IUPAC_COMPLEMENTS.lower())
+BYTES_COMPLEMENT_TABLE = bytes.maketrans((IUPAC_BASES + IUPAC_BASES.lower()).encode("ascii"),
+                                         (IUPAC_COMPLEMENTS + IUPAC_COMPLEMENTS.lower()).encode("ascii"))
+
+
 def rev_comp(seq):
     """
-    :param:
-    :return:
+    Reverse complement a sequence with one translate() call and one slice
+    :param seq: DNA sequence as str or bytes, IUPAC codes and lowercase are kept
+    :return: reverse complement, of the same type as seq
     """
-    # Define compliment dictionary
-    complement_dict = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    reverse_complement = [complement_dict[base] for base in reversed(seq)]
-    return ''.join(reverse_complement)
+
+    if isinstance(seq, str):
+        return seq.translate(STR_COMPLEMENT_TABLE)[::-1]
+    return bytes(seq).translate(BYTES_COMPLEMENT_TABLE)[::-1]
@@ -1,23 +1,15 @@
-# Assigning default values to variables
-current_sequence_name = "None"
-current_sequence = []
+from fasta_io import read_fasta_mmap
 
 # Opening the FASTA file selected by the user
 file_name = input("Enter the name of your FASTA file: ")
-fasta_file = open(file_name, 'r')
+fasta_file = open(file_name, 'rb')
 
+# Extracting each sequence name and finding the sequence length
+# The file is memory-mapped, so sequences are not copied line by line
+for current_sequence_name, current_sequence in read_fasta_mmap(fasta_file):
+    current_sequence_length = len(current_sequence)
 
-# Extracting the sequence name
-for line in fasta_file:
-    line = line.strip()
-    if line.startswith(">"):
-        current_sequence_name = line[1:]
-    else:
-        current_sequence.append(line)
+    # Printing the results
+    print(f"{current_sequence_name} {current_sequence_length}")
 
-# Finding the sequence length
-current_sequence = "".join(current_sequence)
-current_sequence_length = len(current_sequence)
-
-# Printing the results
-print(f"{current_sequence_name} {current_sequence_length}")
+fasta_file.close()
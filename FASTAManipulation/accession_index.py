@@ -0,0 +1,382 @@
+"""
+File: accession_index.py
+This program indexes the records of a FASTA file in a local SQLite database
+and looks them up by accession, accession prefix or length range.
+
+Every record is stored with its accession (the first header token), full
+header, byte offset of its ">" line, length and GC%. The file is streamed
+once, small records are counted a batch at a time and large ones a block
+at a time with NumPy, and all rows go in with one executemany() call inside
+a single transaction; the lookup indexes are created after the rows are in.
+Byte offsets are only known for uncompressed FASTA files, they are left
+empty for gzip, BGZF and .2bit input.
+
+Sample command for executing the program:
+
+python3 accession_index.py [-h] -i genome.fasta [-d genome.fasta.sqlite]
+python3 accession_index.py [-h] -d genome.fasta.sqlite [-a NC_000001.11] [-p NC_] [--min-length 1000] [-o hits.txt]
+"""
+import argparse
+import mmap
+import os
+import sqlite3
+import sys
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+from compressed_io import get_compression, open_binary
+from fasta_io import iter_raw_records, iter_record_spans, read_fasta_file
+from nt_composition import get_gc_percentage, get_nt_composition
+from twobit import is_twobit
+
+IndexEntry = namedtuple("IndexEntry", ["accession", "header", "offset", "length", "gc"])
+
+_SCHEMA = """
+CREATE TABLE records (accession TEXT NOT NULL, header TEXT NOT NULL, offset INTEGER,
+                      length INTEGER NOT NULL, gc REAL NOT NULL);
+CREATE TABLE source (file_name TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL);
+"""
+_INDEXES = """
+CREATE INDEX records_accession ON records (accession);
+CREATE INDEX records_length ON records (length);
+"""
+
+# Bytes of small records counted at a time, and bytes of a large record
+# counted at a time
+_BATCH_SIZE = 1 << 20
+_BLOCK_SIZE = 1 << 22
+
+# Bytes counted in a record's length and in its GC%, indexed by byte value
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+_IS_SEQUENCE = np.ones(256, dtype=bool)
+_IS_SEQUENCE[np.frombuffer(_WHITESPACE, dtype=np.uint8)] = False
+_IS_GC = np.zeros(256, dtype=bool)
+_IS_GC[np.frombuffer(b"GC", dtype=np.uint8)] = True
+
+
+def get_database_path(file_name):
+    """
+    Default path of the database for a FASTA file
+    :param file_name: Path to the FASTA file
+    :return: Path with ".sqlite" appended
+    """
+
+    return f"{file_name}.sqlite"
+
+
+def _get_accession(header):
+    """
+    Accession of a header, its first token
+    :param header: FASTA header without the ">"
+    :return: accession, the empty string for an empty header
+    """
+
+    return (header.split() or [header])[0]
+
+
+def _get_entry(header_bytes, offset, length, gc_count):
+    """
+    Index entry of a record. Headers that are not valid UTF-8 are kept with
+    the undecodable bytes replaced, so one bad header does not stop the index.
+    :param header_bytes: Header line without the ">", as bytes
+    :param offset: Byte offset of the ">" or None
+    :param length: Number of sequence bytes
+    :param gc_count: Number of G and C bytes
+    :return: IndexEntry
+    """
+
+    header = header_bytes.decode("utf-8", errors="replace").rstrip()
+    return IndexEntry(_get_accession(header), header, offset, length, gc_count / length * 100 if length else 0)
+
+
+def _get_spans_entries(buffer, spans):
+    """
+    Index entries of a batch of small records of a memory-mapped file.
+    Lengths and G + C counts of all records come from cumulative sums over
+    the batch, with the same case-sensitive GC% as nt_fasta_stats.py.
+    :param buffer: mmap of the file
+    :param spans: List of (header_start, seq_start, seq_end) from iter_record_spans()
+    :return: list of IndexEntry
+    """
+
+    first_byte = spans[0][1]
+    seq_array = np.frombuffer(buffer, dtype=np.uint8, count=spans[-1][2] - first_byte, offset=first_byte)
+    bounds = np.array([(seq_start, seq_end) for _, seq_start, seq_end in spans], dtype=np.int64) - first_byte
+
+    counts = []
+    for is_counted in (_IS_SEQUENCE, _IS_GC):
+        cumulative = np.zeros(len(seq_array) + 1, dtype=np.int64)
+        np.cumsum(is_counted[seq_array], out=cumulative[1:])
+        counts.append((cumulative[bounds[:, 1]] - cumulative[bounds[:, 0]]).tolist())
+
+    return [_get_entry(buffer[header_start + 1:seq_start], header_start, length, gc_count)
+            for (header_start, seq_start, _), length, gc_count in zip(spans, *counts)]
+
+
+def _get_large_record_entry(buffer, span):
+    """
+    Index entry of a large record of a memory-mapped file, counted a block at
+    a time so memory stays bounded whatever the record length
+    :param buffer: mmap of the file
+    :param span: (header_start, seq_start, seq_end) from iter_record_spans()
+    :return: IndexEntry
+    """
+
+    header_start, seq_start, seq_end = span
+    length = gc_count = 0
+    for block_start in range(seq_start, seq_end, _BLOCK_SIZE):
+        block = np.frombuffer(buffer, dtype=np.uint8, count=min(_BLOCK_SIZE, seq_end - block_start),
+                              offset=block_start)
+        length += int(np.count_nonzero(_IS_SEQUENCE[block]))
+        gc_count += int(np.count_nonzero(_IS_GC[block]))
+    return _get_entry(buffer[header_start + 1:seq_start], header_start, length, gc_count)
+
+
+def _iter_stream_entries(file_name):
+    """
+    generator: _iter_stream_entries(file_name)
+    Index entries of a gzip or BGZF file, split into raw records so headers
+    are decoded like those of plain files
+    @param file_name: Path to a gzip or BGZF FASTA file
+    @return: generator of IndexEntry without offsets
+    """
+
+    with open_binary(file_name) as fh_in:
+        for record in iter_raw_records(fh_in):
+            header_end = record.find(b"\n")
+            if header_end == -1:
+                header_end = len(record)
+            composition = get_nt_composition(record[header_end + 1:].translate(None, _WHITESPACE))
+            yield _get_entry(record[:header_end], None, composition.length, composition.g + composition.c)
+
+
+def iter_index_entries(file_name):
+    """
+    generator: iter_index_entries(file_name)
+    Index entries of every record of a FASTA file, in file order. Plain files
+    are memory-mapped; records shorter than _BATCH_SIZE bytes are counted
+    about _BATCH_SIZE bytes of records at a time, longer ones on their own.
+    @param file_name: Path to a plain, gzip, BGZF or .2bit FASTA file
+    @return: generator of IndexEntry, offset is None for compressed and .2bit files
+    """
+
+    if is_twobit(file_name):
+        for header, sequence in read_fasta_file(file_name):
+            composition = get_nt_composition(sequence)
+            yield IndexEntry(_get_accession(header), header, None, composition.length,
+                             get_gc_percentage(composition))
+        return
+    if get_compression(file_name) is not None:
+        yield from _iter_stream_entries(file_name)
+        return
+
+    with open(file_name, "rb") as fh_in:
+        if os.fstat(fh_in.fileno()).st_size == 0:
+            return
+        with mmap.mmap(fh_in.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            spans = []
+            for span in iter_record_spans(buffer):
+                if span[2] - span[1] >= _BATCH_SIZE:
+                    if spans:
+                        yield from _get_spans_entries(buffer, spans)
+                        spans = []
+                    yield _get_large_record_entry(buffer, span)
+                    continue
+                spans.append(span)
+                if span[2] - spans[0][1] >= _BATCH_SIZE:
+                    yield from _get_spans_entries(buffer, spans)
+                    spans = []
+            if spans:
+                yield from _get_spans_entries(buffer, spans)
+
+
+def build_accession_index(file_name, db_file):
+    """
+    Index a FASTA file into a new SQLite database. The database is written
+    next to db_file and moved over it when complete, so an interrupted run
+    never leaves a partial index behind.
+    :param file_name: Path to the FASTA file
+    :param db_file: Path of the database to write, replaced if it exists
+    :return: Number of records indexed
+    """
+
+    file_stat = os.stat(file_name)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(db_file)), suffix=".tmp")
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(temp_path)
+        try:
+            # Nothing to recover on a crash, the temporary file is thrown away
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.executescript(_SCHEMA)
+            with connection:
+                connection.executemany("INSERT INTO records VALUES (?, ?, ?, ?, ?)", iter_index_entries(file_name))
+                connection.execute("INSERT INTO source VALUES (?, ?, ?)",
+                                   (os.path.realpath(file_name), file_stat.st_size, file_stat.st_mtime_ns))
+            connection.executescript(_INDEXES)
+            num_records = connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+        finally:
+            connection.close()
+        os.replace(temp_path, db_file)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return num_records
+
+
+def is_index_current(file_name, db_file):
+    """
+    Check that a database indexes the current contents of a FASTA file
+    :param file_name: Path to the FASTA file
+    :param db_file: Path of the database
+    :return: True when the database exists and the file's size and mtime match
+    """
+
+    if not os.path.exists(db_file):
+        return False
+
+    file_stat = os.stat(file_name)
+    try:
+        connection = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+        try:
+            source = connection.execute("SELECT size, mtime_ns FROM source").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError:
+        return False
+
+    return source == (file_stat.st_size, file_stat.st_mtime_ns)
+
+
+def _get_prefix_end(prefix):
+    """
+    Smallest string greater than every string starting with a prefix, so a
+    prefix lookup is a range scan of the accession index
+    :param prefix: Non-empty accession prefix
+    :return: str, or None when there is no such string
+    """
+
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def query_accession_index(db_file, accession=None, prefix=None, min_length=None, max_length=None):
+    """
+    Look records up in an accession database. The given conditions are
+    combined, with none given every record is returned.
+    :param db_file: Path of the database from build_accession_index()
+    :param accession: Exact accession
+    :param prefix: Accession prefix
+    :param min_length: Shortest record length
+    :param max_length: Longest record length
+    :return: list of IndexEntry, in file order
+    """
+
+    conditions = []
+    parameters = []
+    if accession is not None:
+        conditions.append("accession = ?")
+        parameters.append(accession)
+    if prefix:
+        conditions.append("accession >= ?")
+        parameters.append(prefix)
+        prefix_end = _get_prefix_end(prefix)
+        if prefix_end is not None:
+            conditions.append("accession < ?")
+            parameters.append(prefix_end)
+    if min_length is not None:
+        conditions.append("length >= ?")
+        parameters.append(min_length)
+    if max_length is not None:
+        conditions.append("length <= ?")
+        parameters.append(max_length)
+
+    query = "SELECT accession, header, offset, length, gc FROM records"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY rowid"
+
+    connection = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        return [IndexEntry(*row) for row in connection.execute(query, parameters)]
+    finally:
+        connection.close()
+
+
+def write_entries(entries, output_file):
+    """
+    Write index entries as a table
+    :param entries: Iterable of IndexEntry
+    :param output_file: Open filehandle to write the table to
+    :return: Number of entries written
+    """
+
+    print("Accession\tOffset\tLength\tGC%\tHeader", file=output_file)
+
+    num_entries = 0
+    for num_entries, entry in enumerate(entries, start=1):
+        offset = "" if entry.offset is None else entry.offset
+        print(f"{entry.accession}\t{offset}\t{entry.length}\t{entry.gc:.1f}\t{entry.header}", file=output_file)
+    return num_entries
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Index FASTA records by accession in SQLite and look them up")
+    parser.add_argument("-i", "--infile", type=str,
+                        help="Path to FASTA file to index, skipped when its database is up to date")
+    parser.add_argument("-d", "--database", type=str,
+                        help="Path to the SQLite database (default: the FASTA path with .sqlite appended)")
+    parser.add_argument("-a", "--accession", type=str, help="Look up records with this accession")
+    parser.add_argument("-p", "--prefix", type=str, help="Look up records whose accession starts with this")
+    parser.add_argument("--min-length", type=int, help="Look up records at least this long")
+    parser.add_argument("--max-length", type=int, help="Look up records at most this long")
+    parser.add_argument("-o", "--outfile", type=str, help="Path to write the matching records (default: stdout)")
+    args = parser.parse_args()
+    if args.infile is None and args.database is None:
+        parser.error("give the FASTA file to index (-i), the database to query (-d), or both")
+    if args.database is None:
+        args.database = get_database_path(args.infile)
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        if args.infile is not None and not is_index_current(args.infile, args.database):
+            num_records = build_accession_index(args.infile, args.database)
+            sys.stderr.write(f"Indexed {num_records} records into {args.database}\n")
+
+        querying = any(value is not None for value in (args.accession, args.prefix, args.min_length,
+                                                       args.max_length))
+        if not querying and args.infile is not None:
+            return
+        entries = query_accession_index(args.database, args.accession, args.prefix, args.min_length,
+                                        args.max_length)
+        fh_out = open(args.outfile, "w", encoding="utf-8") if args.outfile else sys.stdout
+    except (OSError, sqlite3.Error) as e:
+        print(e)
+        sys.exit(1)
+
+    write_entries(entries, fh_out)
+    if fh_out is not sys.stdout:
+        fh_out.close()
+
+
+if __name__ == "__main__":
+    main()
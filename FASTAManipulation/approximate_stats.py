@@ -0,0 +1,382 @@
+"""
+File: approximate_stats.py
+Sampled estimates of the nucleotide statistics of huge FASTA files, behind
+the --approximate option of nt_fasta_stats.py.
+
+Plain files are memory-mapped and only read around random byte offsets:
+the bases of a small window at each offset estimate the composition and GC
+content, and the record holding each offset estimates the length
+distribution. A record is hit in proportion to its size in bytes, so the
+record-level estimates weight every hit by the inverse of that size. The
+time taken depends on the sample size, not on the size of the file.
+
+A .2bit file is sampled through its index: the record headers give the
+exact record count and lengths, and windows at random base positions are
+unpacked for the composition.
+
+gzip and BGZF input cannot be entered at an offset; the decompressed stream
+is split into records at their header lines and a uniform reservoir sample
+of them is kept. Only the sampled records are parsed and counted.
+
+Every estimate comes with a bootstrap confidence interval.
+"""
+import mmap
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from fasta_io import iter_raw_records
+from nt_composition import get_byte_histogram
+from twobit import TwoBitReader
+
+# Per sampling unit (window or record) counts of A, G, C, T, N and all bases;
+# record lengths with their weights; the number of records when it is known
+# exactly, otherwise the file size used to estimate it
+ApproximateSample = namedtuple("ApproximateSample", ["base_counts", "lengths", "weights",
+                                                     "num_records", "file_size"])
+Estimate = namedtuple("Estimate", ["name", "value", "low", "high"])
+# Random generator, interval coverage and number of resamples of a bootstrap
+_Bootstrap = namedtuple("_Bootstrap", ["rng", "confidence", "rounds"])
+
+LENGTH_QUANTILES = [5, 25, 50, 75, 95]
+
+# Bytes read at every sampled offset for the composition estimate
+_WINDOW_SIZE = 1024
+_BOOTSTRAP_ROUNDS = 200
+# Resampled units (rounds x sample size) drawn at a time, bounds the
+# bootstrap arrays to some tens of megabytes whatever the sample size
+_BOOTSTRAP_CELLS = 1 << 20
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+_IS_WHITESPACE = np.zeros(256, dtype=bool)
+_IS_WHITESPACE[np.frombuffer(_WHITESPACE, dtype=np.uint8)] = True
+# Bytes of a record scanned at a time for whitespace when measuring it
+_COUNT_BLOCK_SIZE = 1 << 22
+_COUNTED_BASES = np.frombuffer(b"AGCTN", dtype=np.uint8)
+_BASES = [b"A", b"G", b"C", b"T", b"N"]
+_HEADER_LINE = re.compile(rb"^>[^\n]*", re.MULTILINE)
+
+
+def _count_bases(sequence):
+    """
+    A, G, C, T and N counts and the length of a sequence
+    :param sequence: str or bytes-like sequence without whitespace
+    :return: NumPy int64 array of 6 counts
+    """
+
+    histogram = get_byte_histogram(sequence)
+    return np.append(histogram[_COUNTED_BASES], histogram.sum())
+
+
+def _get_window_bases(buffer, offset, window_size):
+    """
+    Sequence bytes of the window starting at a byte offset, with header lines
+    and whitespace removed
+    :param buffer: mmap of the file
+    :param offset: First byte of the window
+    :param window_size: Bytes in the window
+    :return: bytes
+    """
+
+    window = buffer[offset:offset + window_size]
+    # The first line is a header when the window starts inside one
+    line_start = buffer.rfind(b"\n", 0, offset) + 1
+    if buffer[line_start:line_start + 1] == b">":
+        first_newline = window.find(b"\n")
+        window = window[first_newline:] if first_newline != -1 else b""
+    return _HEADER_LINE.sub(b"", window).translate(None, _WHITESPACE)
+
+
+def _find_record_span(buffer, offset):
+    """
+    Byte span of the record holding a byte offset
+    :param buffer: mmap of the file
+    :param offset: Byte offset
+    :return: (header start, end) or None before the first header
+    """
+
+    # The ">" of the header may be at the offset itself, not after it
+    newline_header = buffer.rfind(b"\n>", 0, offset + 1)
+    if newline_header != -1:
+        start = newline_header + 1
+    elif buffer[:1] == b">":
+        start = 0
+    else:
+        return None
+    end = buffer.find(b"\n>", start)
+    return start, len(buffer) if end == -1 else end + 1
+
+
+def _get_sequence_length(buffer, start, end, block_size=_COUNT_BLOCK_SIZE):
+    """
+    Number of sequence bytes between two offsets: the size of the range less
+    its whitespace, counted a block at a time on views of the mapping so the
+    record is never copied
+    :param buffer: mmap of the file
+    :param start: Offset of the first sequence byte
+    :param end: Offset after the last sequence byte
+    :param block_size: Bytes scanned at a time
+    :return: int
+    """
+
+    num_whitespace = 0
+    for block_start in range(start, end, block_size):
+        block = np.frombuffer(buffer, dtype=np.uint8, count=min(block_size, end - block_start), offset=block_start)
+        num_whitespace += int(np.count_nonzero(_IS_WHITESPACE[block]))
+    return end - start - num_whitespace
+
+
+def sample_offsets(fh_in, num_samples, rng, window_size=_WINDOW_SIZE):
+    """
+    Sample an uncompressed FASTA file at random byte offsets. The offsets are
+    visited in file order and a record holding several of them is measured
+    once, so a file of a few long chromosomes is read at most once.
+    :param fh_in: Filehandle of an uncompressed FASTA file opened in binary mode
+    :param num_samples: Number of offsets
+    :param rng: numpy.random.Generator
+    :param window_size: Bytes read at every offset for the composition
+    :return: ApproximateSample
+    """
+
+    file_size = os.fstat(fh_in.fileno()).st_size
+    if file_size == 0:
+        return ApproximateSample(np.zeros((0, 6), dtype=np.int64), np.zeros(0, dtype=np.int64),
+                                 np.zeros(0), 0, 0)
+
+    offsets = np.sort(rng.integers(0, file_size, size=num_samples)).tolist()
+    windows = []
+    lengths = []
+    weights = []
+    # Byte span of the last record hit, empty before the first one
+    span_start = span_end = 0
+    record_length = 0
+    with mmap.mmap(fh_in.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for offset in offsets:
+            windows.append(_get_window_bases(buffer, offset, window_size))
+            if offset >= span_end:
+                span = _find_record_span(buffer, offset)
+                if span is None:
+                    continue
+                span_start, span_end = span
+                sequence_start = buffer.find(b"\n", span_start, span_end) + 1 or span_end
+                record_length = _get_sequence_length(buffer, sequence_start, span_end)
+            # Chance of a hit is proportional to the record's bytes
+            lengths.append(record_length)
+            weights.append(1 / (span_end - span_start))
+
+    base_counts = np.array([[window.count(base) for base in _BASES] + [len(window)] for window in windows],
+                           dtype=np.int64).reshape(-1, 6)
+    return ApproximateSample(base_counts, np.array(lengths, dtype=np.int64), np.array(weights), None,
+                             file_size)
+
+
+def sample_twobit(file_name, num_samples, rng, window_size=_WINDOW_SIZE):
+    """
+    Sample a .2bit file through its index. The record count and lengths are
+    read exactly from the record headers and the composition comes from
+    windows at random base positions, unpacked on their own.
+    :param file_name: Path to a .2bit file
+    :param num_samples: Number of windows, and of record lengths kept
+    :param rng: numpy.random.Generator
+    :param window_size: Bases unpacked at every position for the composition
+    :return: ApproximateSample with the exact number of records
+    """
+
+    windows = []
+    with TwoBitReader(file_name) as reader:
+        names = reader.names()
+        lengths = np.array([reader.get_length(name) for name in names], dtype=np.int64)
+        record_ends = np.cumsum(lengths)
+        total_bases = int(record_ends[-1]) if names else 0
+
+        if total_bases:
+            positions = np.sort(rng.integers(0, total_bases, size=num_samples))
+            indices = np.searchsorted(record_ends, positions, side="right")
+            record = None
+            for index, start in zip(indices.tolist(), (positions - record_ends[indices] + lengths[indices]).tolist()):
+                # Positions are sorted, so each record is read once
+                if record is None or record.name != names[index]:
+                    record = reader.get_record(names[index])
+                windows.append(_count_bases(reader.fetch_record(record, start, start + window_size)))
+
+    # The lengths are exact, a uniform sample of them keeps the bootstrap small
+    if len(lengths) > num_samples:
+        lengths = rng.choice(lengths, size=num_samples, replace=False)
+    return ApproximateSample(np.array(windows, dtype=np.int64).reshape(-1, 6), lengths, np.ones(len(lengths)),
+                             len(names), None)
+
+
+def _sample_reservoir(items, num_samples, rng, count_item):
+    """
+    Keep a uniform sample of the items of a stream (Algorithm L), counting
+    the bases of sampled items only
+    :param items: Iterable of records
+    :param num_samples: Number of items to keep
+    :param rng: numpy.random.Generator
+    :param count_item: Function giving the _count_bases() counts of an item
+    :return: (NumPy array of per item counts, number of items)
+    """
+
+    reservoir = []
+    num_items = 0
+    items = iter(items)
+    for num_items, item in enumerate(items, start=1):
+        reservoir.append(count_item(item))
+        if num_items == num_samples:
+            break
+
+    if len(reservoir) == num_samples:
+        # Jump over the items that would not enter the reservoir
+        threshold = np.exp(np.log(rng.random()) / num_samples)
+        next_item = num_items + int(np.log(rng.random()) // np.log1p(-threshold)) + 1
+        for num_items, item in enumerate(items, start=num_items + 1):
+            if num_items == next_item:
+                reservoir[rng.integers(num_samples)] = count_item(item)
+                threshold *= np.exp(np.log(rng.random()) / num_samples)
+                next_item += int(np.log(rng.random()) // np.log1p(-threshold)) + 1
+
+    return np.array(reservoir, dtype=np.int64).reshape(-1, 6), num_items
+
+
+def _count_raw_record(record):
+    """
+    Base counts of a record from iter_raw_records()
+    :param record: Header line followed by the sequence lines, as bytes
+    :return: NumPy int64 array of 6 counts
+    """
+
+    sequence_start = record.find(b"\n") + 1 or len(record)
+    return _count_bases(record[sequence_start:].translate(None, _WHITESPACE))
+
+
+def sample_stream(fh_in, num_samples, rng):
+    """
+    Reservoir sample the records of a binary FASTA stream, e.g. a gzip or
+    BGZF file. The stream is only split at its header lines; the records
+    that are skipped are never decoded, stripped or joined line by line.
+    :param fh_in: Binary filehandle, e.g. from compressed_io.open_binary()
+    :param num_samples: Number of records to keep
+    :param rng: numpy.random.Generator
+    :return: ApproximateSample with the exact number of records
+    """
+
+    base_counts, num_records = _sample_reservoir(iter_raw_records(fh_in), num_samples, rng, _count_raw_record)
+    return ApproximateSample(base_counts, base_counts[:, 5].copy(), np.ones(len(base_counts)),
+                             num_records, None)
+
+
+def _weighted_quantiles(lengths, weights, quantiles):
+    """
+    Weighted quantiles of every row of a matrix of lengths
+    :param lengths: NumPy array, one sample per row
+    :param weights: NumPy array of the same shape
+    :param quantiles: Percentages
+    :return: NumPy array of shape (rows, len(quantiles))
+    """
+
+    order = np.argsort(lengths, axis=1)
+    sorted_lengths = np.take_along_axis(lengths, order, axis=1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+    targets = cumulative[:, -1:] * (np.array(quantiles) / 100)
+    positions = np.stack([(cumulative >= targets[:, [i]]).argmax(axis=1) for i in range(len(quantiles))], axis=1)
+    return np.take_along_axis(sorted_lengths, positions, axis=1)
+
+
+def _get_composition_estimates(base_counts, rows):
+    """
+    Base composition and GC content of the sampling units selected by rows
+    :param base_counts: NumPy array of per unit counts, see ApproximateSample
+    :param rows: NumPy index array of shape (rounds, units)
+    :return: (names, NumPy array of shape (rounds, statistics))
+    """
+
+    counts = base_counts[rows].sum(axis=1)
+    totals = np.maximum(counts[:, 5:6], 1)
+    gc_percentage = (counts[:, 1:2] + counts[:, 2:3]) / totals * 100
+    return ["A%", "G%", "C%", "T%", "N%", "GC%"], np.concatenate([counts[:, :5] / totals * 100, gc_percentage],
+                                                                 axis=1)
+
+
+def _get_length_estimates(sample, rows):
+    """
+    Record count, total bases and length distribution of the sampled records
+    selected by rows
+    :param sample: ApproximateSample
+    :param rows: NumPy index array of shape (rounds, records)
+    :return: (names, NumPy array of shape (rounds, statistics))
+    """
+
+    lengths = sample.lengths[rows]
+    weights = sample.weights[rows]
+    mean_length = (lengths * weights).sum(axis=1) / weights.sum(axis=1)
+    if sample.num_records is None:
+        # Horvitz-Thompson estimate from the size-biased hits
+        num_records = sample.file_size * weights.mean(axis=1)
+    else:
+        num_records = np.full(len(rows), sample.num_records, dtype=float)
+
+    names = ["Records", "Bases", "Mean_length"] + [f"Length_p{quantile:02d}" for quantile in LENGTH_QUANTILES]
+    return names, np.concatenate([num_records[:, None], (num_records * mean_length)[:, None], mean_length[:, None],
+                                  _weighted_quantiles(lengths, weights, LENGTH_QUANTILES)], axis=1)
+
+
+def _bootstrap(estimator, data, num_units, bootstrap):
+    """
+    Point estimates and percentile bootstrap intervals of one estimator. The
+    resamples are drawn a chunk of rounds at a time, so at most
+    _BOOTSTRAP_CELLS units are held at once.
+    :param estimator: Function taking (data, rows) and returning (names, estimates)
+    :param data: First argument of the estimator
+    :param num_units: Number of sampling units in data
+    :param bootstrap: _Bootstrap settings
+    :return: list of Estimate
+    """
+
+    names, point = estimator(data, np.arange(num_units)[None, :])
+    chunk_rounds = max(1, _BOOTSTRAP_CELLS // num_units)
+    resampled = np.concatenate([
+        estimator(data, bootstrap.rng.integers(num_units, size=(min(chunk_rounds, bootstrap.rounds - first),
+                                                                num_units)))[1]
+        for first in range(0, bootstrap.rounds, chunk_rounds)])
+    tail = (1 - bootstrap.confidence) / 2 * 100
+    low, high = np.percentile(resampled, [tail, 100 - tail], axis=0)
+    return [Estimate(*row) for row in zip(names, point[0].tolist(), low.tolist(), high.tolist())]
+
+
+def get_estimates(sample, rng, confidence=0.95, rounds=_BOOTSTRAP_ROUNDS):
+    """
+    Estimates with percentile bootstrap confidence intervals
+    :param sample: ApproximateSample
+    :param rng: numpy.random.Generator
+    :param confidence: Coverage of the intervals
+    :param rounds: Bootstrap resamples
+    :return: list of Estimate, composition first, then the record lengths
+    """
+
+    bootstrap = _Bootstrap(rng, confidence, rounds)
+    estimates = []
+    if len(sample.base_counts):
+        estimates += _bootstrap(_get_composition_estimates, sample.base_counts, len(sample.base_counts), bootstrap)
+    if len(sample.lengths):
+        estimates += _bootstrap(_get_length_estimates, sample, len(sample.lengths), bootstrap)
+    return estimates
+
+
+def write_estimates(estimates, num_samples, sampling, confidence, output_file):
+    """
+    Write the estimates table
+    :param estimates: List of Estimate from get_estimates()
+    :param num_samples: Number of sampled offsets or records
+    :param sampling: Description of the sampling, e.g. "byte offsets"
+    :param confidence: Coverage of the intervals
+    :param output_file: Open filehandle to write the table to
+    :return: Number of estimates written
+    """
+
+    print(f"# Approximate statistics from {num_samples} sampled {sampling}, "
+          f"{confidence * 100:g}% bootstrap confidence intervals", file=output_file)
+    print("Statistic\tEstimate\tCI_low\tCI_high", file=output_file)
+    for estimate in estimates:
+        print(f"{estimate.name}\t{estimate.value:.2f}\t{estimate.low:.2f}\t{estimate.high:.2f}", file=output_file)
+    return len(estimates)
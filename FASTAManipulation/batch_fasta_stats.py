@@ -0,0 +1,373 @@
+"""
+File: batch_fasta_stats.py
+This program runs the nucleotide statistics of nt_fasta_stats.py over many
+FASTA files in one go: every file given by glob patterns, directories or a
+manifest gets its own statistics table, and one summary table has a line
+per file with its record count, base composition and GC%.
+
+Files are processed by a pool of worker processes, so thousands of small
+genomes cost a few interpreter startups instead of one each. A file that
+fails (unreadable, not FASTA, ...) is retried and then skipped, the rest of
+the batch carries on; failed files are listed in the summary with their
+error and the exit status is 1.
+
+Sample command for executing the program:
+
+python3 batch_fasta_stats.py [-h] -i "genomes/*.fa.gz" -i more_genomes/ [-m manifest.txt] -d out_dir [-w 8] [-r 1]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from fasta_io import read_fasta_file
+from nt_fasta_stats import get_record_stats, write_stats
+from stats_formats import OUTPUT_FORMATS
+
+# Sums over the records of one file: counts of A, G, C, T, N and all bases
+FileTotals = namedtuple("FileTotals", ["records", "a", "g", "c", "t", "n", "length"])
+
+# Input file, output path, number of attempts, FileTotals or None, error message
+FileResult = namedtuple("FileResult", ["infile", "outfile", "attempts", "totals", "error"])
+
+# Files picked up from a directory, optionally followed by a compression suffix
+FASTA_EXTENSIONS = [".fa", ".fasta", ".fna", ".ffn", ".faa", ".fas", ".seq", ".2bit"]
+_COMPRESSED_EXTENSIONS = [".gz", ".bgz"]
+
+# Suffix of the per-file output of every output format
+_OUTPUT_SUFFIXES = {"tsv": ".stats.txt", "npy": ".stats", "parquet": ".stats.parquet"}
+
+SUMMARY_FILE = "batch_summary.txt"
+
+
+def _is_fasta_name(file_name):
+    """
+    Check whether a file name has a FASTA extension
+    :param file_name: File name or path
+    :return: True for names such as genome.fa or genome.fna.gz
+    """
+
+    root, extension = os.path.splitext(file_name.lower())
+    if extension in _COMPRESSED_EXTENSIONS:
+        extension = os.path.splitext(root)[1]
+    return extension in FASTA_EXTENSIONS
+
+
+def read_manifest(manifest_file):
+    """
+    Paths listed in a manifest, one per line. Blank lines and lines starting
+    with "#" are skipped, relative paths are relative to the manifest.
+    :param manifest_file: Path to the manifest
+    :return: list of paths
+    """
+
+    manifest_dir = os.path.dirname(manifest_file)
+    with open(manifest_file, "r", encoding="utf-8") as fh_in:
+        lines = [line.strip() for line in fh_in]
+    return [os.path.join(manifest_dir, line) for line in lines if line and not line.startswith("#")]
+
+
+def collect_input_files(sources, manifest_file=None):
+    """
+    Expand input sources into a list of files. A directory contributes its
+    FASTA files (see FASTA_EXTENSIONS), a glob pattern every file it matches
+    ("**" recurses) and anything else is taken as a file path.
+    :param sources: List of paths, directories and glob patterns
+    :param manifest_file: Path to a manifest of further paths, see read_manifest()
+    :return: list of paths without duplicates, in the order given
+    """
+
+    files = []
+    for source in sources + (read_manifest(manifest_file) if manifest_file else []):
+        if os.path.isdir(source):
+            files.extend(os.path.join(source, name) for name in sorted(os.listdir(source))
+                         if _is_fasta_name(name) and os.path.isfile(os.path.join(source, name)))
+        elif glob.has_magic(source):
+            files.extend(path for path in sorted(glob.glob(source, recursive=True)) if os.path.isfile(path))
+        else:
+            files.append(source)
+
+    return list(dict.fromkeys(files))
+
+
+def get_output_paths(files, out_dir, output_format):
+    """
+    Output path of every input file, named after the input. Inputs with the
+    same name from different directories get a number appended.
+    :param files: List of input paths
+    :param out_dir: Directory of the outputs
+    :param output_format: "tsv", "npy" or "parquet"
+    :return: list of output paths, in the order of files
+    """
+
+    used_names = set()
+    paths = []
+    for file_name in files:
+        base_name = os.path.basename(file_name)
+        name = base_name
+        copy_num = 1
+        while name in used_names:
+            copy_num += 1
+            name = f"{base_name}.{copy_num}"
+        used_names.add(name)
+        paths.append(os.path.join(out_dir, name + _OUTPUT_SUFFIXES[output_format]))
+    return paths
+
+
+def _sum_stats_rows(stats_rows, sums):
+    """
+    generator: _sum_stats_rows(stats_rows, sums)
+    Pass statistics rows through while adding them up
+    @param stats_rows: Iterable of rows from get_record_stats()
+    @param sums: List of 7 counts (records, A, G, C, T, N, length), updated in place
+    @return: generator of the same rows
+    """
+
+    for row in stats_rows:
+        sums[0] += 1
+        for i, count in enumerate(row[1:7], start=1):
+            sums[i] += count
+        yield row
+
+
+def process_file(infile, outfile, output_format):
+    """
+    Worker function: write the statistics of one FASTA file. The tools report
+    errors by printing them and exiting, so their output is captured and an
+    exit is turned into an error message instead of ending the worker. The
+    partial output of a failed file is removed.
+    :param infile: Path to a plain, gzip, BGZF or .2bit FASTA file
+    :param outfile: Path of the statistics output
+    :param output_format: "tsv", "npy" or "parquet"
+    :return: (FileTotals, None) on success, (None, error message) on failure
+    """
+
+    sums = [0] * 7
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages), contextlib.redirect_stderr(messages):
+            stats_rows = (get_record_stats(header, sequence) for header, sequence in read_fasta_file(infile))
+            write_stats(_sum_stats_rows(stats_rows, sums), outfile, output_format)
+        return FileTotals(*sums), None
+    except SystemExit as e:
+        error = " ".join(messages.getvalue().split()) or f"exited with status {e.code}"
+    except Exception as e:  # pylint: disable=broad-except
+        error = f"{type(e).__name__}: {e}"
+
+    if os.path.isdir(outfile):
+        shutil.rmtree(outfile, ignore_errors=True)
+    elif os.path.exists(outfile):
+        os.remove(outfile)
+    return None, error
+
+
+class _BatchRun:
+    """
+    State of a batch: attempts and results per file, and the process pools
+    that run the files
+    """
+
+    def __init__(self, files, outfiles, output_format, retries):
+        self.files = files
+        self.outfiles = outfiles
+        self.output_format = output_format
+        self.retries = retries
+        self.attempts = [0] * len(files)
+        self.results = [None] * len(files)
+
+    def finish(self, index, totals, error, queue):
+        """
+        Keep the result of one attempt, or queue the file again when it
+        failed and has retries left
+        :param index: Index of the file
+        :param totals: FileTotals or None
+        :param error: Error message or None
+        :param queue: deque the file is queued on again for a retry
+        :return: None
+        """
+
+        if error is not None and self.attempts[index] <= self.retries:
+            sys.stderr.write(f"Retrying {self.files[index]}: {error}\n")
+            queue.append(index)
+            return
+        if error is not None:
+            sys.stderr.write(f"Skipping {self.files[index]}: {error}\n")
+        self.results[index] = FileResult(self.files[index], self.outfiles[index], self.attempts[index], totals,
+                                         error)
+
+    def run_pool(self, queue, num_workers):
+        """
+        Run the files of a queue in a new process pool until the queue is
+        empty or a worker process dies. At most num_workers files are handed
+        to the pool at a time, so only those can have been running when a
+        worker died.
+        :param queue: deque of file indices, consumed
+        :param num_workers: Number of worker processes
+        :return: list of the indices that were running when a worker died, empty when the queue is done
+        """
+
+        running = {}
+        broken = []
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            while (queue or running) and not broken:
+                while queue and len(running) < num_workers:
+                    try:
+                        future = executor.submit(process_file, self.files[queue[0]], self.outfiles[queue[0]],
+                                                 self.output_format)
+                    except BrokenProcessPool:
+                        # The running files report the break below, this one never started
+                        break
+                    index = queue.popleft()
+                    self.attempts[index] += 1
+                    running[future] = index
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        self.finish(index, *future.result(), queue)
+                    except BrokenProcessPool:
+                        broken.append(index)
+
+        # Every file still running went down with the pool
+        return broken + list(running.values())
+
+
+def run_batch(files, outfiles, output_format, num_workers, retries):
+    """
+    Process files in a pool of worker processes, retrying failed files. When
+    a worker process dies (e.g. killed for running out of memory) the pool is
+    replaced and the files that were running are run again one at a time,
+    so the death only counts as a failed attempt of the file that caused it.
+    :param files: List of input paths
+    :param outfiles: List of output paths, from get_output_paths()
+    :param output_format: "tsv", "npy" or "parquet"
+    :param num_workers: Number of worker processes
+    :param retries: Times a failed file is tried again before it is skipped
+    :return: list of FileResult, in the order of files
+    """
+
+    batch = _BatchRun(files, outfiles, output_format, retries)
+    pending = deque(range(len(files)))
+    suspects = deque()
+    while pending or suspects:
+        # Files that were running when a worker died go first, alone
+        queue, queue_workers = (suspects, 1) if suspects else (pending, num_workers)
+        broken = batch.run_pool(queue, queue_workers)
+        if len(broken) == 1:
+            # Only one file was running, it took the worker down
+            batch.finish(broken[0], None, "worker process died", suspects)
+        else:
+            for index in broken:
+                batch.attempts[index] -= 1
+            suspects.extend(broken)
+
+    return batch.results
+
+
+def write_batch_summary(results, output_file):
+    """
+    Write one line per file and a line of totals over the successful files
+    :param results: List of FileResult from run_batch()
+    :param output_file: Open filehandle to write the summary to
+    :return: Number of failed files
+    """
+
+    print("File\tStatus\tAttempts\tRecords\tA's\tG's\tC's\tT's\tN's\tLength\tGC%\tOutput\tError", file=output_file)
+
+    sums = [0] * 7
+    num_failed = 0
+    for result in results:
+        if result.totals is None:
+            num_failed += 1
+            print(f"{result.infile}\tfailed\t{result.attempts}\t\t\t\t\t\t\t\t\t\t{result.error}",
+                  file=output_file)
+            continue
+        sums = [total + count for total, count in zip(sums, result.totals)]
+        print(f"{result.infile}\tok\t{result.attempts}\t" + "\t".join(str(count) for count in result.totals) +
+              f"\t{_get_gc_percentage(result.totals):.1f}\t{result.outfile}\t", file=output_file)
+
+    totals = FileTotals(*sums)
+    print(f"Total\t{len(results) - num_failed} ok, {num_failed} failed\t\t" +
+          "\t".join(str(count) for count in totals) + f"\t{_get_gc_percentage(totals):.1f}\t\t",
+          file=output_file)
+    return num_failed
+
+
+def _get_gc_percentage(totals):
+    """
+    GC content over all records of a file, (G + C) / length * 100
+    :param totals: FileTotals
+    :return: GC percentage as a float, 0 when there are no bases
+    """
+
+    return (totals.g + totals.c) / totals.length * 100 if totals.length else 0
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide many FASTA files to generate the nucleotide statistics of each in one run")
+    parser.add_argument("-i", "--input", action="append", default=[],
+                        help="FASTA file, directory of FASTA files or quoted glob pattern (repeatable)")
+    parser.add_argument("-m", "--manifest", type=str, help="Path to a file listing one FASTA file per line")
+    parser.add_argument("-d", "--outdir", required=True, type=str,
+                        help=f"Directory to write the per-file statistics and {SUMMARY_FILE} to")
+    parser.add_argument("-w", "--workers", default=os.cpu_count() or 1, type=int,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("-r", "--retries", default=1, type=int,
+                        help="Times a failed file is tried again before it is skipped (default: 1)")
+    parser.add_argument("-f", "--format", default="tsv", choices=OUTPUT_FORMATS,
+                        help="Output format of the per-file statistics, as in nt_fasta_stats.py (default: tsv)")
+    args = parser.parse_args()
+    if not args.input and not args.manifest:
+        parser.error("give the input files with -i/--input or -m/--manifest")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.retries < 0:
+        parser.error("--retries must not be negative")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        files = collect_input_files(args.input, args.manifest)
+        os.makedirs(args.outdir, exist_ok=True)
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+    if not files:
+        print("No input files found")
+        sys.exit(1)
+
+    outfiles = get_output_paths(files, args.outdir, args.format)
+    results = run_batch(files, outfiles, args.format, min(args.workers, len(files)), args.retries)
+
+    summary_file = os.path.join(args.outdir, SUMMARY_FILE)
+    with open(summary_file, "w", encoding="utf-8") as fh_out:
+        num_failed = write_batch_summary(results, fh_out)
+
+    sys.stderr.write(f"Processed {len(files)} files, {num_failed} failed, summary in {summary_file}\n")
+    if num_failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
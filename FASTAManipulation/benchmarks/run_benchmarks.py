@@ -0,0 +1,253 @@
+"""
+File: run_benchmarks.py
+Times the stages of the FASTA tools on synthetic inputs and reports
+throughput and peak memory as JSON. Results can be saved as a baseline and
+later runs compared against it, so throughput regressions show up before
+they reach production.
+
+Every stage runs in a fresh child process, so its peak RSS is not inflated
+by earlier stages.
+
+Sample command for executing the program (from the FASTAManipulation folder):
+
+python3 -m benchmarks.run_benchmarks [-h] [-b 20000000] [-o results.json]
+python3 -m benchmarks.run_benchmarks --save-baseline baseline.json
+python3 -m benchmarks.run_benchmarks --baseline baseline.json [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import nt_fasta_stats
+import sec_structure_split
+from benchmarks.synthetic_fasta import PROFILES, generate_fasta
+from fasta_io import read_fasta_mmap
+from fasta_profile import get_peak_rss
+
+# Profiles benchmarked by default and the stages run on each of them
+_NUCLEOTIDE_PROFILES = ["tiny_records", "chromosomes", "unwrapped", "n_rich"]
+_NUCLEOTIDE_STAGES = ["get_fasta_lists", "read_fasta_mmap", "output_results_to_files", "stats_pipeline"]
+_SPLIT_STAGES = ["sec_structure_split"]
+
+
+def _stage_get_fasta_lists(file_name):
+    """
+    Parse the whole file into header and sequence lists
+    :param file_name: Path to a FASTA file
+    :return: (seconds, number of records)
+    """
+
+    start = time.perf_counter()
+    with open(file_name, "r", encoding="utf-8") as fh_in:
+        header_list, _ = nt_fasta_stats.get_fasta_lists(fh_in)
+    return time.perf_counter() - start, len(header_list)
+
+
+def _stage_read_fasta_mmap(file_name):
+    """
+    Walk every record with the memory-mapped reader
+    :param file_name: Path to a FASTA file
+    :return: (seconds, number of records)
+    """
+
+    start = time.perf_counter()
+    num_records = 0
+    with open(file_name, "rb") as fh_in:
+        for num_records, _ in enumerate(read_fasta_mmap(fh_in), start=1):
+            pass
+    return time.perf_counter() - start, num_records
+
+
+def _stage_output_results_to_files(file_name):
+    """
+    Compute and write the statistics table from already parsed lists
+    :param file_name: Path to a FASTA file
+    :return: (seconds, number of records), parsing is not timed
+    """
+
+    with open(file_name, "r", encoding="utf-8") as fh_in:
+        header_list, sequence_list = nt_fasta_stats.get_fasta_lists(fh_in)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as fh_out:
+        nt_fasta_stats.output_results_to_files(header_list, sequence_list, fh_out)
+    return time.perf_counter() - start, len(header_list)
+
+
+def _stage_stats_pipeline(file_name):
+    """
+    Parse, compute and write the statistics table the way the CLI does
+    :param file_name: Path to a FASTA file
+    :return: (seconds, number of records)
+    """
+
+    start = time.perf_counter()
+    with open(file_name, "rb") as fh_in, open(os.devnull, "w", encoding="utf-8") as fh_out:
+        num_records = nt_fasta_stats.output_records_to_file(read_fasta_mmap(fh_in), fh_out)
+    return time.perf_counter() - start, num_records
+
+
+def _stage_sec_structure_split(file_name):
+    """
+    Split a combined sequence/secondary structure file the way the CLI does
+    :param file_name: Path to a FASTA file in the PDB seqres layout
+    :return: (seconds, number of records)
+    """
+
+    start = time.perf_counter()
+    with open(file_name, "rb") as fh_in, \
+            open(os.devnull, "w", encoding="utf-8") as fh_out1, \
+            open(os.devnull, "w", encoding="utf-8") as fh_out2:
+        records = read_fasta_mmap(fh_in, keep_whitespace=True)
+        num_proteins, num_ss = sec_structure_split.split_records(records, fh_out1, fh_out2)
+    return time.perf_counter() - start, num_proteins + num_ss
+
+
+_STAGE_FUNCTIONS = {
+    "get_fasta_lists": _stage_get_fasta_lists,
+    "read_fasta_mmap": _stage_read_fasta_mmap,
+    "output_results_to_files": _stage_output_results_to_files,
+    "stats_pipeline": _stage_stats_pipeline,
+    "sec_structure_split": _stage_sec_structure_split,
+}
+
+
+def _run_stage_in_child(stage, file_name):
+    """
+    Child process entry point: run one stage and measure its peak memory
+    :param stage: Key of _STAGE_FUNCTIONS
+    :param file_name: Path to the input file
+    :return: (seconds, number of records, peak RSS in bytes)
+    """
+
+    seconds, num_records = _STAGE_FUNCTIONS[stage](file_name)
+    return seconds, num_records, get_peak_rss()
+
+
+def run_stage(stage, file_name, repeats=1):
+    """
+    Time one stage on one input, each repeat in a fresh process
+    :param stage: Key of _STAGE_FUNCTIONS
+    :param file_name: Path to the input file
+    :param repeats: Number of runs, the fastest one is reported
+    :return: dictionary with seconds, mb_per_s, records_per_s and peak_rss_bytes
+    """
+
+    file_size = os.path.getsize(file_name)
+    runs = []
+    for _ in range(repeats):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            runs.append(executor.submit(_run_stage_in_child, stage, file_name).result())
+
+    seconds, num_records, _ = min(runs)
+    seconds = max(seconds, 1e-9)
+    return {"seconds": round(seconds, 6),
+            "records": num_records,
+            "bytes": file_size,
+            "mb_per_s": round(file_size / seconds / 1e6, 3),
+            "records_per_s": round(num_records / seconds, 1),
+            "peak_rss_bytes": max(run[2] for run in runs)}
+
+
+def run_benchmarks(work_dir, total_bases, profiles=None, repeats=1, seed=42):
+    """
+    Generate every synthetic input and time the stages that apply to it
+    :param work_dir: Directory for the generated inputs
+    :param total_bases: Approximate size of each input
+    :param profiles: Profiles to run, default every nucleotide profile plus pdb_seqres
+    :param repeats: Runs per stage, the fastest one is reported
+    :param seed: Random seed for the inputs
+    :return: dictionary of profile -> stage -> result
+    """
+
+    if profiles is None:
+        profiles = _NUCLEOTIDE_PROFILES + ["pdb_seqres"]
+
+    results = {}
+    for profile in profiles:
+        file_name = os.path.join(work_dir, f"{profile}.fasta")
+        generate_fasta(file_name, profile, total_bases, seed)
+        stages = _SPLIT_STAGES if profile == "pdb_seqres" else _NUCLEOTIDE_STAGES
+        results[profile] = {stage: run_stage(stage, file_name, repeats) for stage in stages}
+        os.remove(file_name)
+
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Find stages whose throughput dropped below the baseline
+    :param results: Output of run_benchmarks()
+    :param baseline: Earlier output of run_benchmarks()
+    :param tolerance: Allowed relative slowdown, e.g. 0.2 for 20%
+    :return: list of (profile, stage, baseline MB/s, current MB/s) regressions
+    """
+
+    regressions = []
+    for profile, stages in results.items():
+        for stage, result in stages.items():
+            previous = baseline.get(profile, {}).get(stage)
+            if previous is None:
+                continue
+            if result["mb_per_s"] < previous["mb_per_s"] * (1 - tolerance):
+                regressions.append((profile, stage, previous["mb_per_s"], result["mb_per_s"]))
+    return regressions
+
+
+def get_cli_args():
+    """
+    void: get_cli_args()
+    Takes: no arguments
+    @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark the FASTA tools on synthetic inputs")
+    parser.add_argument("-b", "--bases", default=20_000_000, type=int,
+                        help="Approximate bases per synthetic input (default: 20000000)")
+    parser.add_argument("-p", "--profile", action="append", choices=sorted(PROFILES),
+                        help="Profile to run (repeatable, default: all)")
+    parser.add_argument("-r", "--repeats", default=3, type=int, help="Runs per stage, fastest is kept")
+    parser.add_argument("-s", "--seed", default=42, type=int, help="Random seed (default: 42)")
+    parser.add_argument("-o", "--outfile", type=str, help="Path to write the JSON results (default: stdout)")
+    parser.add_argument("--baseline", type=str, help="JSON results to compare against")
+    parser.add_argument("--tolerance", default=0.2, type=float,
+                        help="Allowed relative throughput drop before a regression is reported")
+    parser.add_argument("--save-baseline", type=str, help="Also write the results to this baseline file")
+    return parser.parse_args()
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_benchmarks(work_dir, args.bases, args.profile, args.repeats, args.seed)
+
+    report = json.dumps(results, indent=2, sort_keys=True)
+    if args.outfile:
+        with open(args.outfile, "w", encoding="utf-8") as fh_out:
+            fh_out.write(report + "\n")
+    else:
+        print(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh_out:
+            fh_out.write(report + "\n")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as fh_in:
+            baseline = json.load(fh_in)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for profile, stage, previous, current in regressions:
+            sys.stderr.write(f"Regression: {profile}/{stage} {current} MB/s, baseline {previous} MB/s\n")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
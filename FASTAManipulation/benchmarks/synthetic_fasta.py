@@ -0,0 +1,144 @@
+"""
+File: synthetic_fasta.py
+Deterministic synthetic FASTA inputs for the benchmark suite.
+
+The same profile, size and seed always produce byte-identical files, so
+timings from different runs and machines are measured on the same input.
+
+Sample command for executing the program:
+
+python3 -m benchmarks.synthetic_fasta [-h] -p tiny_records -b 10000000 -o tiny.fasta [-s 42]
+"""
+import argparse
+
+import numpy as np
+
+_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+_SECONDARY_STRUCTURE = np.frombuffer(b"HHHHEEEGGTTS    ", dtype=np.uint8)
+_AMINO_ACIDS = np.frombuffer(b"ACDEFGHIKLMNPQRSTVWY", dtype=np.uint8)
+_LINE_WIDTH = 60
+
+# Record length range (inclusive) and line width of each profile,
+# a line width of 0 writes every sequence on a single line
+PROFILES = {
+    "tiny_records": {"min_length": 50, "max_length": 300, "line_width": _LINE_WIDTH},
+    "chromosomes": {"min_length": 2_000_000, "max_length": 5_000_000, "line_width": _LINE_WIDTH},
+    "unwrapped": {"min_length": 1_000, "max_length": 20_000, "line_width": 0},
+    "n_rich": {"min_length": 10_000, "max_length": 100_000, "line_width": _LINE_WIDTH},
+    "pdb_seqres": {"min_length": 50, "max_length": 500, "line_width": 80},
+}
+
+
+def generate_fasta(file_name, profile, total_bases, seed=42):
+    """
+    Write a synthetic FASTA file
+    :param file_name: Path of the file to write
+    :param profile: One of the PROFILES keys
+    :param total_bases: Approximate number of sequence characters to write
+    :param seed: Random seed, the output only depends on profile, size and seed
+    :return: (number of records, number of bytes written)
+    """
+
+    settings = PROFILES[profile]
+    rng = np.random.default_rng(seed)
+    num_records = 0
+    num_bytes = 0
+    bases_left = total_bases
+
+    with open(file_name, "wb") as fh_out:
+        while bases_left > 0:
+            length = int(rng.integers(settings["min_length"], settings["max_length"] + 1))
+            length = min(length, bases_left)
+            num_records += 1
+            bases_left -= length
+
+            if profile == "pdb_seqres":
+                records = _make_pdb_records(rng, num_records, length)
+            else:
+                records = [(f"SYN_{num_records:09d}.1 synthetic {profile} record",
+                            _make_nucleotides(rng, length, profile == "n_rich"))]
+
+            for header, sequence in records:
+                record = _format_record(header, sequence, settings["line_width"])
+                fh_out.write(record)
+                num_bytes += len(record)
+
+    return num_records, num_bytes
+
+
+def _make_nucleotides(rng, length, n_rich):
+    """
+    Random nucleotide sequence
+    :param rng: NumPy random generator
+    :param length: Number of bases
+    :param n_rich: Add N runs (assembly gaps) covering roughly a third of the sequence
+    :return: sequence as bytes
+    """
+
+    sequence = _BASES[rng.integers(0, len(_BASES), size=length)]
+    if n_rich and length > 0:
+        num_gaps = max(1, length // 5000)
+        gap_starts = rng.integers(0, length, size=num_gaps)
+        gap_lengths = rng.integers(100, 3400, size=num_gaps)
+        for start, gap_length in zip(gap_starts, gap_lengths):
+            sequence[start:start + gap_length] = ord("N")
+    return sequence.tobytes()
+
+
+def _make_pdb_records(rng, record_num, length):
+    """
+    A protein sequence record and its secondary structure record, in the
+    layout of the combined PDB seqres file read by sec_structure_split.py
+    :param rng: NumPy random generator
+    :param record_num: Record number used in the header
+    :param length: Number of residues
+    :return: list of two (header, sequence) tuples
+    """
+
+    protein = _AMINO_ACIDS[rng.integers(0, len(_AMINO_ACIDS), size=length)].tobytes()
+    structure = _SECONDARY_STRUCTURE[rng.integers(0, len(_SECONDARY_STRUCTURE), size=length)].tobytes()
+    pdb_id = f"{record_num:04X}"[-4:]
+    return [(f"{pdb_id}:A:sequence", protein), (f"{pdb_id}:A:secstr", structure)]
+
+
+def _format_record(header, sequence, line_width):
+    """
+    Render one FASTA record
+    :param header: Header without the ">"
+    :param sequence: Sequence bytes
+    :param line_width: Bases per line, 0 for a single line
+    :return: record as bytes
+    """
+
+    if line_width:
+        lines = [sequence[i:i + line_width] for i in range(0, len(sequence), line_width)]
+    else:
+        lines = [sequence]
+    return b">" + header.encode("utf-8") + b"\n" + b"\n".join(lines) + b"\n"
+
+
+def get_cli_args():
+    """
+    void: get_cli_args()
+    Takes: no arguments
+    @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic FASTA file")
+    parser.add_argument("-p", "--profile", required=True, choices=sorted(PROFILES), help="Kind of input")
+    parser.add_argument("-b", "--bases", required=True, type=int, help="Approximate number of bases")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
+    parser.add_argument("-s", "--seed", default=42, type=int, help="Random seed (default: 42)")
+    return parser.parse_args()
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+    num_records, num_bytes = generate_fasta(args.outfile, args.profile, args.bases, args.seed)
+    print(f"Wrote {num_records} records ({num_bytes} bytes) to {args.outfile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+File: compressed_io.py
+Transparent reading of plain, gzip and BGZF compressed input files.
+
+The compression is detected from the magic bytes at the start of the file,
+not from the file extension. BGZF files (bgzip, samtools) are made of
+independent deflate blocks, so they are decompressed by a thread pool;
+zlib releases the GIL while inflating, so the blocks really do decompress
+in parallel.
+"""
+import gzip
+import io
+import os
+import struct
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_GZIP_MAGIC = b"\x1f\x8b"
+# gzip magic, deflate method and FEXTRA flag, then the "BC" subfield of length 2
+_BGZF_HEADER_START = b"\x1f\x8b\x08\x04"
+_BGZF_SUBFIELD = b"BC\x02\x00"
+_BGZF_FIXED_HEADER_SIZE = 12
+_BGZF_TRAILER_SIZE = 8
+
+# Blocks decompressed ahead of the reader per thread, bounds memory use
+_BLOCKS_AHEAD_PER_THREAD = 4
+
+
+def get_compression(file_name):
+    """
+    Detect the compression of a file from its first bytes
+    :param file_name: Path to the file
+    :return: "bgzf", "gzip" or None for uncompressed files
+    """
+
+    with open(file_name, "rb") as fh_in:
+        magic = fh_in.read(16)
+
+    if magic[:4] == _BGZF_HEADER_START and magic[12:16] == _BGZF_SUBFIELD:
+        return "bgzf"
+    if magic[:2] == _GZIP_MAGIC:
+        return "gzip"
+    return None
+
+
+def open_binary(file_name, num_threads=None):
+    """
+    Open a plain, gzip or BGZF file for reading as bytes
+    :param file_name: Path to the file
+    :param num_threads: Threads used to decompress BGZF blocks, default one per CPU
+    :return: binary filehandle
+    """
+
+    compression = get_compression(file_name)
+    if compression == "bgzf":
+        return io.BufferedReader(BgzfReader(file_name, num_threads))
+    if compression == "gzip":
+        return gzip.open(file_name, "rb")
+    return open(file_name, "rb")
+
+
+def open_text(file_name, num_threads=None):
+    """
+    Open a plain, gzip or BGZF file for reading as UTF-8 text, replacing
+    bytes that are not UTF-8 like the memory-mapped FASTA reader does
+    :param file_name: Path to the file
+    :param num_threads: Threads used to decompress BGZF blocks, default one per CPU
+    :return: text filehandle
+    """
+
+    compression = get_compression(file_name)
+    if compression == "bgzf":
+        return io.TextIOWrapper(io.BufferedReader(BgzfReader(file_name, num_threads)), encoding="utf-8",
+                                errors="replace")
+    if compression == "gzip":
+        return gzip.open(file_name, "rt", encoding="utf-8", errors="replace")
+    return open(file_name, "r", encoding="utf-8", errors="replace")
+
+
+def iter_bgzf_blocks(fh_in):
+    """
+    generator: iter_bgzf_blocks(fh_in)
+    Split a BGZF file into its compressed blocks without inflating them
+    @param fh_in: BGZF filehandle opened in binary mode
+    @return: generator of (deflate data, crc32, uncompressed size) tuples
+    """
+
+    while True:
+        header = fh_in.read(_BGZF_FIXED_HEADER_SIZE)
+        if not header:
+            return
+        if len(header) < _BGZF_FIXED_HEADER_SIZE or header[:4] != _BGZF_HEADER_START:
+            _exit_bad_bgzf(fh_in)
+
+        extra_length = struct.unpack("<H", header[10:12])[0]
+        extra = fh_in.read(extra_length)
+        block_size = _get_bgzf_block_size(extra)
+        if block_size is None:
+            _exit_bad_bgzf(fh_in)
+
+        data_size = block_size - _BGZF_FIXED_HEADER_SIZE - extra_length - _BGZF_TRAILER_SIZE
+        data = fh_in.read(data_size)
+        trailer = fh_in.read(_BGZF_TRAILER_SIZE)
+        if len(data) != data_size or len(trailer) != _BGZF_TRAILER_SIZE:
+            _exit_bad_bgzf(fh_in)
+
+        crc, uncompressed_size = struct.unpack("<II", trailer)
+        yield data, crc, uncompressed_size
+
+
+def _get_bgzf_block_size(extra):
+    """
+    Find the BSIZE value in the gzip extra field of a BGZF block
+    :param extra: The extra field bytes
+    :return: total block size in bytes, or None if there is no BC subfield
+    """
+
+    position = 0
+    while position + 4 <= len(extra):
+        subfield_id = extra[position:position + 2]
+        subfield_length = struct.unpack("<H", extra[position + 2:position + 4])[0]
+        if subfield_id == b"BC" and subfield_length == 2:
+            return struct.unpack("<H", extra[position + 4:position + 6])[0] + 1
+        position += 4 + subfield_length
+    return None
+
+
+def inflate_bgzf_block(block):
+    """
+    Decompress one BGZF block and check it against its trailer
+    :param block: (deflate data, crc32, uncompressed size) from iter_bgzf_blocks()
+    :return: decompressed bytes
+    """
+
+    data, crc, uncompressed_size = block
+    try:
+        uncompressed = zlib.decompress(data, -zlib.MAX_WBITS)
+    except zlib.error as e:
+        raise ValueError(f"Corrupt BGZF block: {e}") from e
+    if len(uncompressed) != uncompressed_size or zlib.crc32(uncompressed) != crc:
+        raise ValueError("Corrupt BGZF block: size or CRC32 does not match")
+    return uncompressed
+
+
+def _exit_bad_bgzf(fh_in):
+    """
+    Report a truncated or malformed BGZF file and exit
+    :param fh_in: The BGZF filehandle
+    :return: None, the program exits with status 1
+    """
+
+    print(f"{fh_in.name} is not a valid BGZF file", file=sys.stderr)
+    sys.exit(1)
+
+
+class _BlockInflater:
+    """
+    Inflate the blocks of a BGZF file on a thread pool, keeping a bounded
+    number of blocks in flight ahead of the one being consumed
+    """
+
+    def __init__(self, blocks, num_threads):
+        self._blocks = blocks
+        self._executor = ThreadPoolExecutor(max_workers=num_threads)
+        self._max_pending = num_threads * _BLOCKS_AHEAD_PER_THREAD
+        self._pending = deque()
+
+    def next_block(self):
+        """
+        Wait for the next block in file order
+        :return: decompressed bytes, None after the last block
+        """
+
+        while len(self._pending) < self._max_pending:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self._pending.append(self._executor.submit(inflate_bgzf_block, block))
+        if not self._pending:
+            return None
+        return self._pending.popleft().result()
+
+    def close(self):
+        """
+        Cancel the blocks not yet started and stop the threads
+        :return: None
+        """
+
+        for future in self._pending:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+
+class BgzfReader(io.RawIOBase):
+    """
+    Read-only raw stream over a BGZF file. Blocks are read in order and
+    inflated by a thread pool while the caller consumes earlier blocks;
+    wrap it in io.BufferedReader/io.TextIOWrapper for line-based reading.
+    """
+
+    def __init__(self, file_name, num_threads=None):
+        super().__init__()
+        self.name = file_name
+        self._fh_in = open(file_name, "rb")
+        self._inflater = _BlockInflater(iter_bgzf_blocks(self._fh_in), num_threads or os.cpu_count() or 1)
+        self._current = memoryview(b"")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        """
+        Fill buffer with decompressed bytes
+        :param buffer: Writable buffer
+        :return: number of bytes written, 0 at the end of the file
+        """
+
+        while self._position >= len(self._current):
+            try:
+                block = self._inflater.next_block()
+            except ValueError as e:
+                print(f"{self.name}: {e}", file=sys.stderr)
+                sys.exit(1)
+            if block is None:
+                return 0
+            self._current = memoryview(block)
+            self._position = 0
+
+        size = min(len(buffer), len(self._current) - self._position)
+        buffer[:size] = self._current[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._inflater.close()
+            self._fh_in.close()
+        super().close()
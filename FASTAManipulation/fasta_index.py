@@ -0,0 +1,292 @@
+"""
+File: fasta_index.py
+Builds a samtools-compatible .fai index for a FASTA file and fetches whole
+records or subranges by seeking straight to them.
+
+Sample command for executing the program:
+
+python3 fasta_index.py [-h] -i input_file.fasta
+python3 fasta_index.py [-h] -i input_file.fasta -r chr21 -r chr21:1000-2000 [-o regions.fasta]
+"""
+import argparse
+import os
+import sys
+from collections import namedtuple
+
+FaiEntry = namedtuple("FaiEntry", ["name", "length", "offset", "line_bases", "line_bytes"])
+
+# Line width used when writing fetched sequences back out as FASTA
+_FASTA_LINE_WIDTH = 60
+
+
+def get_fai_path(file_name):
+    """
+    Path of the .fai sidecar for a FASTA file
+    :param file_name: Path to the FASTA file
+    :return: Path with ".fai" appended, as samtools names it
+    """
+
+    return f"{file_name}.fai"
+
+
+def build_fasta_index(file_name):
+    """
+    Scan a FASTA file once and describe where every record's bases live
+    :param file_name: Path to an uncompressed FASTA file
+    :return: list of FaiEntry, in file order
+    """
+
+    # Initializing variables
+    entries = []
+    record = None
+    offset = 0
+
+    with open(file_name, "rb") as fh_in:
+        for line_num, line in enumerate(fh_in, start=1):
+            if line.startswith(b">"):
+                if record is not None:
+                    entries.append(_finish_fai_entry(record))
+                name_fields = line[1:].split()
+                if not name_fields:
+                    _exit_bad_index(file_name, line_num, "header without a sequence name")
+                record = {"name": name_fields[0].decode("utf-8"), "offset": offset + len(line),
+                          "length": 0, "line_bases": 0, "line_bytes": 0, "short_line": False}
+            elif record is None:
+                if line.strip():
+                    _exit_bad_index(file_name, line_num, "sequence data before the first header")
+            else:
+                _add_fai_line(record, line, file_name, line_num)
+            offset += len(line)
+
+    if record is not None:
+        entries.append(_finish_fai_entry(record))
+
+    return entries
+
+
+def _add_fai_line(record, line, file_name, line_num):
+    """
+    Account for one sequence line, enforcing samtools' rule that every line
+    of a record except the last has the same length
+    :param record: Dictionary describing the record being indexed
+    :param line: Raw sequence line, including its line ending
+    :param file_name: Path to the FASTA file, for error messages
+    :param line_num: Line number, for error messages
+    :return: None
+    """
+
+    num_bases = len(line.rstrip(b"\r\n"))
+    if num_bases == 0:
+        record["short_line"] = True  # Only blank lines may follow a blank line
+        return
+    if record["short_line"]:
+        _exit_bad_index(file_name, line_num, "different line length in sequence")
+
+    if record["line_bases"] == 0:
+        record["line_bases"] = num_bases
+        record["line_bytes"] = len(line)
+    elif num_bases > record["line_bases"]:
+        _exit_bad_index(file_name, line_num, "different line length in sequence")
+
+    if num_bases < record["line_bases"] or len(line) != record["line_bytes"]:
+        record["short_line"] = True
+    record["length"] += num_bases
+
+
+def _finish_fai_entry(record):
+    """
+    Convert the working dictionary of a record into a FaiEntry
+    :param record: Dictionary describing the record
+    :return: FaiEntry
+    """
+
+    return FaiEntry(record["name"], record["length"], record["offset"],
+                    record["line_bases"], record["line_bytes"])
+
+
+def _exit_bad_index(file_name, line_num, reason):
+    """
+    Report why a FASTA file cannot be indexed and exit
+    :param file_name: Path to the FASTA file
+    :param line_num: Offending line number
+    :param reason: Short description of the problem
+    :return: None, the program exits with status 1
+    """
+
+    print(f"Cannot index {file_name}: {reason} at line {line_num}", file=sys.stderr)
+    sys.exit(1)
+
+
+def write_fai(entries, fai_path):
+    """
+    Write index entries in the five-column samtools .fai layout
+    :param entries: Iterable of FaiEntry
+    :param fai_path: Path of the .fai file to write
+    :return: None
+    """
+
+    with open(fai_path, "w", encoding="utf-8") as fh_out:
+        for entry in entries:
+            fh_out.write("\t".join(str(field) for field in entry) + "\n")
+
+
+def read_fai(fai_path):
+    """
+    Load a .fai file
+    :param fai_path: Path of the .fai file
+    :return: dictionary of sequence name -> FaiEntry, in file order
+    """
+
+    index = {}
+    with open(fai_path, "r", encoding="utf-8") as fh_in:
+        for line in fh_in:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 5:
+                continue
+            index[fields[0]] = FaiEntry(fields[0], *(int(field) for field in fields[1:5]))
+    return index
+
+
+def get_fasta_index(file_name, create=False):
+    """
+    Return the index of a FASTA file if its .fai sidecar is present and not
+    older than the FASTA file itself
+    :param file_name: Path to an uncompressed FASTA file
+    :param create: Build and write the .fai file when it is missing or stale
+    :return: dictionary of sequence name -> FaiEntry, or None
+    """
+
+    fai_path = get_fai_path(file_name)
+    if os.path.exists(fai_path) and os.path.getmtime(fai_path) >= os.path.getmtime(file_name):
+        return read_fai(fai_path)
+
+    if not create:
+        return None
+
+    entries = build_fasta_index(file_name)
+    write_fai(entries, fai_path)
+    return {entry.name: entry for entry in entries}
+
+
+def parse_region(region):
+    """
+    Parse a samtools-style region: "name", "name:start" or "name:start-end",
+    1-based and inclusive. Commas in the coordinates are ignored.
+    :param region: Region string
+    :return: (name, start, end), start and end are None when not given
+    """
+
+    name, _, coordinates = region.rpartition(":")
+    if not name:
+        return region, None, None
+
+    start_text, _, end_text = coordinates.replace(",", "").partition("-")
+    try:
+        start = int(start_text)
+        end = int(end_text) if end_text else None
+    except ValueError:
+        # The colon is part of the sequence name
+        return region, None, None
+
+    return name, start, end
+
+
+def fetch_sequence(fh_in, entry, start=None, end=None):
+    """
+    Read a record, or a 1-based inclusive subrange of it, by seeking straight
+    to its bases
+    :param fh_in: FASTA filehandle opened in binary mode
+    :param entry: FaiEntry of the record
+    :param start: First base to return (1-based), default the first base
+    :param end: Last base to return (inclusive), default the last base
+    :return: sequence as bytes, newlines removed
+    """
+
+    start = 1 if start is None else max(start, 1)
+    end = entry.length if end is None else min(end, entry.length)
+    if start > end:
+        return b""
+
+    first_byte = _get_base_offset(entry, start - 1)
+    last_byte = _get_base_offset(entry, end - 1)
+    fh_in.seek(first_byte)
+    return fh_in.read(last_byte - first_byte + 1).translate(None, b"\r\n")
+
+
+def _get_base_offset(entry, position):
+    """
+    Byte offset of a 0-based base position inside a record
+    :param entry: FaiEntry of the record
+    :param position: 0-based position of the base
+    :return: Byte offset in the FASTA file
+    """
+
+    line_num, column = divmod(position, entry.line_bases)
+    return entry.offset + line_num * entry.line_bytes + column
+
+
+def fetch_region(file_name, region, index=None):
+    """
+    Fetch a samtools-style region from an indexed FASTA file
+    :param file_name: Path to an uncompressed FASTA file
+    :param region: "name", "name:start" or "name:start-end"
+    :param index: Index from get_fasta_index(), built if not given
+    :return: sequence as bytes
+    """
+
+    if index is None:
+        index = get_fasta_index(file_name, create=True)
+
+    name, start, end = parse_region(region)
+    if name not in index:
+        print(f"Sequence {name} not found in {file_name}", file=sys.stderr)
+        sys.exit(1)
+
+    with open(file_name, "rb") as fh_in:
+        return fetch_sequence(fh_in, index[name], start, end)
+
+
+def get_cli_args():
+    """
+    void: get_cli_args()
+    Takes: no arguments
+    @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Index a FASTA file (.fai) and fetch records or regions from it")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to FASTA file to index")
+    parser.add_argument("-r", "--region", action="append", default=[],
+                        help="Region to fetch as name, name:start or name:start-end (repeatable)")
+    parser.add_argument("-o", "--outfile", type=str, help="Path to write fetched regions (default: stdout)")
+    return parser.parse_args()
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    index = get_fasta_index(args.infile)
+    if index is None or not args.region:
+        entries = build_fasta_index(args.infile)
+        write_fai(entries, get_fai_path(args.infile))
+        index = {entry.name: entry for entry in entries}
+
+    if not args.region:
+        sys.stderr.write(f"Indexed {len(index)} sequences into {get_fai_path(args.infile)}\n")
+        return
+
+    fh_out = open(args.outfile, "w", encoding="utf-8") if args.outfile else sys.stdout
+    for region in args.region:
+        sequence = fetch_region(args.infile, region, index).decode("utf-8")
+        fh_out.write(f">{region}\n")
+        for i in range(0, len(sequence), _FASTA_LINE_WIDTH):
+            fh_out.write(sequence[i:i + _FASTA_LINE_WIDTH] + "\n")
+
+    if fh_out is not sys.stdout:
+        fh_out.close()
+
+
+if __name__ == "__main__":
+    main()
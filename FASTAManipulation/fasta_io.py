@@ -0,0 +1,349 @@
+"""
+File: fasta_io.py
+Shared FASTA reading helpers for the FASTAManipulation tools.
+
+The readers in this module stream records one at a time, so the memory
+used by a tool is bounded by the largest single record rather than by the
+size of the whole file.
+"""
+import mmap
+import os
+import sys
+
+from compressed_io import get_compression, open_text
+from twobit import is_twobit, read_twobit_records
+
+# Bytes read at a time while searching for the next header line
+_SEARCH_BLOCK_SIZE = 1 << 16
+
+# Bytes read at a time by the raw record splitter
+_STREAM_BLOCK_SIZE = 1 << 22
+
+# Bytes removed from sequence data by the memory-mapped reader
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+_LINE_ENDINGS = b"\r\n"
+
+# Whitespace left inside a stripped text line, deleted like the memory-mapped
+# reader deletes it so both readers give the same sequences
+_INNER_WHITESPACE = " \t\x0b\x0c"
+_DELETE_INNER_WHITESPACE = str.maketrans("", "", _INNER_WHITESPACE)
+
+
+def read_fasta_records(fh_in, keep_whitespace=False):
+    """
+    generator: read_fasta_records(fh_in)
+    Takes: an iterable of lines (usually an open filehandle) and yields
+    one (header, sequence) pair per FASTA record, in file order.
+    Sequence lines are collected in a list and joined once per record,
+    so long multi-line records are assembled in linear time. Whitespace is
+    deleted from sequences, as the memory-mapped reader does.
+    @param fh_in: Iterable of text lines in FASTA format
+    @param keep_whitespace: Only remove line endings from sequence lines,
+    for records such as secondary structures where spaces are data
+    @return: generator of (header, sequence) tuples, header without the ">"
+    """
+
+    # Initializing variables
+    header = None
+    sequence_chunks = []
+
+    for line in fh_in:
+        if keep_whitespace:
+            line = line.rstrip("\r\n")
+        else:
+            line = line.strip()  # Remove leading/trailing whitespace
+        if not line:
+            continue  # Skip empty lines
+
+        if line[0] == ">":
+            if header is not None:
+                yield header, _join_sequence(sequence_chunks, keep_whitespace)
+            header = line[1:].rstrip()  # Remove the ">" character
+            sequence_chunks = []
+        elif header is None:
+            _exit_not_fasta()
+        else:
+            sequence_chunks.append(line)
+
+    if header is not None:
+        yield header, _join_sequence(sequence_chunks, keep_whitespace)
+
+
+def _join_sequence(sequence_chunks, keep_whitespace):
+    """
+    Join the stripped lines of a record, deleting the whitespace inside them
+    unless it is kept
+    :param sequence_chunks: List of sequence lines
+    :param keep_whitespace: Keep the whitespace inside the lines
+    :return: sequence as str
+    """
+
+    sequence = "".join(sequence_chunks)
+    if keep_whitespace or not any(character in sequence for character in _INNER_WHITESPACE):
+        return sequence
+    return sequence.translate(_DELETE_INNER_WHITESPACE)
+
+
+def _exit_not_fasta():
+    """
+    Print the standard "not FASTA" message and exit
+    :return: None, the program exits with status 1
+    """
+
+    print("Found sequence data before the first FASTA header", file=sys.stderr)
+    print("Did you provide a FASTA formatted file?", file=sys.stderr)
+    sys.exit(1)
+
+
+def find_record_boundaries(file_name, num_shards):
+    """
+    Split a FASTA file into byte ranges that each start on a record header
+    :param file_name: Path to an uncompressed FASTA file
+    :param num_shards: Number of ranges wanted, fewer are returned when the
+    file has fewer records than shards
+    :return: list of (start, end) byte offsets covering the whole file, in order
+    """
+
+    with open(file_name, "rb") as fh_in:
+        fh_in.seek(0, os.SEEK_END)
+        file_size = fh_in.tell()
+
+        boundaries = [0]
+        for shard in range(1, num_shards):
+            target = max(file_size * shard // num_shards, boundaries[-1])
+            record_start = _find_next_header(fh_in, target)
+            if record_start >= file_size:
+                break
+            if record_start > boundaries[-1]:
+                boundaries.append(record_start)
+
+    boundaries.append(file_size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _find_next_header(fh_in, position):
+    """
+    Find the offset of the first header line starting at or after position
+    :param fh_in: Filehandle opened in binary mode
+    :param position: Byte offset to start searching from
+    :return: offset of the ">" of the next header, or the file size if none
+    """
+
+    if position == 0:
+        return 0
+
+    # Step back one byte so a header starting exactly at position is found
+    fh_in.seek(position - 1)
+    offset = position - 1
+    previous = b""
+    while True:
+        block = fh_in.read(_SEARCH_BLOCK_SIZE)
+        if not block:
+            return offset + len(previous)
+        buffer = previous + block
+        found = buffer.find(b"\n>")
+        if found != -1:
+            return offset + found + 1
+        # Keep the last byte in case "\n>" straddles two blocks
+        offset += len(buffer) - 1
+        previous = buffer[-1:]
+
+
+def read_fasta_range(file_name, start, end):
+    """
+    generator: read_fasta_range(file_name, start, end)
+    Yields the records whose header starts inside the byte range [start, end).
+    A record starting before end is read to its end even past the range, so
+    ranges from find_record_boundaries() cover every record exactly once.
+    @param file_name: Path to an uncompressed FASTA file
+    @param start: Byte offset of a header line, or 0
+    @param end: Byte offset where the next range starts
+    @return: generator of (header, sequence) tuples, sequences are bytes-like
+    """
+
+    with open(file_name, "rb") as fh_in:
+        yield from read_fasta_mmap(fh_in, start, end)
+
+
+def read_fasta_mmap(fh_in, start=0, end=None, keep_whitespace=False):
+    """
+    generator: read_fasta_mmap(fh_in)
+    Memory-mapped FASTA reader. Record boundaries are found with find() on
+    the mapping and no line is decoded or stripped one at a time: a record
+    on a single line is yielded as a zero-copy memoryview of the file, a
+    wrapped record is copied once and has all its whitespace deleted in one
+    bytes.translate() call.
+    The sequence views are only valid while the generator is running.
+    @param fh_in: Filehandle of an uncompressed FASTA file opened in binary mode
+    @param start: Only yield records whose header starts at or after this offset
+    @param end: Only yield records whose header starts before this offset
+    @param keep_whitespace: Only remove line endings from the sequence, for
+    records such as secondary structures where spaces are data
+    @return: generator of (header, sequence) tuples, header is a str without
+    the ">" and sequence is a bytes-like object (memoryview or bytes)
+    """
+
+    file_size = os.fstat(fh_in.fileno()).st_size
+    if file_size == 0:
+        return  # An empty file cannot be mapped and has no records
+
+    buffer = mmap.mmap(fh_in.fileno(), 0, access=mmap.ACCESS_READ)
+    file_view = memoryview(buffer)
+    delete_bytes = _LINE_ENDINGS if keep_whitespace else _WHITESPACE
+    try:
+        for header_start, seq_start, seq_end in iter_record_spans(buffer, start, end):
+            header = buffer[header_start + 1:seq_start].decode("utf-8", errors="replace").rstrip()
+            yield header, _get_sequence_view(buffer, file_view, seq_start, seq_end, delete_bytes)
+    finally:
+        file_view.release()
+        _close_mapping(buffer)
+
+
+def iter_record_spans(buffer, start=0, end=None):
+    """
+    generator: iter_record_spans(buffer)
+    Locate records in a bytes-like buffer without copying any sequence data
+    @param buffer: bytes, mmap or other object supporting find()
+    @param start: Only yield records whose header starts at or after this offset
+    @param end: Only yield records whose header starts before this offset
+    @return: generator of (header_start, seq_start, seq_end) byte offsets, where
+    header_start is the offset of ">" and the sequence lines span [seq_start, seq_end)
+    """
+
+    buffer_size = len(buffer)
+    end = buffer_size if end is None else min(end, buffer_size)
+
+    record_start = _find_header_in_buffer(buffer, start)
+    if start == 0 and record_start != 0 and buffer[:record_start].strip():
+        _exit_not_fasta()
+
+    while record_start < end:
+        header_end = buffer.find(b"\n", record_start)
+        seq_start = buffer_size if header_end == -1 else header_end + 1
+        next_record = _find_header_in_buffer(buffer, seq_start)
+        yield record_start, seq_start, next_record
+        record_start = next_record
+
+
+def iter_raw_records(fh_in, block_size=_STREAM_BLOCK_SIZE):
+    """
+    generator: iter_raw_records(fh_in)
+    Split a binary stream into records at every "\n>" without decoding or
+    stripping any line, for callers that only look inside a few records
+    @param fh_in: Binary filehandle, e.g. from compressed_io.open_binary()
+    @param block_size: Bytes read at a time
+    @return: generator of record bytes, the header line without the ">"
+    followed by the sequence lines as they are in the file
+    """
+
+    chunks = []
+    in_record = False
+    # A newline ending a block is held back until the next block shows
+    # whether a header follows it; the stream starts as if after a newline
+    held = b"\n"
+    for block in iter(lambda: fh_in.read(block_size), b""):
+        pieces = (held + block).split(b"\n>")
+        held = b""
+        if pieces[-1].endswith(b"\n"):
+            pieces[-1] = pieces[-1][:-1]
+            held = b"\n"
+        if in_record:
+            chunks.append(pieces[0])
+        elif pieces[0].strip():
+            _exit_not_fasta()
+        for piece in pieces[1:]:
+            if in_record:
+                yield b"".join(chunks)
+            in_record = True
+            chunks = [piece]
+
+    if in_record:
+        yield b"".join(chunks) + held
+
+
+def _find_header_in_buffer(buffer, position):
+    """
+    Offset of the first header line starting at or after position
+    :param buffer: bytes-like object supporting find()
+    :param position: Offset to search from, assumed to be at a line start
+    :return: offset of the ">" or the buffer size when there is none
+    """
+
+    if position < len(buffer) and buffer[position:position + 1] == b">":
+        return position
+
+    found = buffer.find(b"\n>", position)
+    return len(buffer) if found == -1 else found + 1
+
+
+def _get_sequence_view(buffer, file_view, seq_start, seq_end, delete_bytes):
+    """
+    Sequence of a record with the unwanted bytes removed
+    :param buffer: The mmap of the file
+    :param file_view: memoryview over the whole mmap
+    :param seq_start: Offset of the first sequence byte
+    :param seq_end: Offset just past the last sequence byte
+    :param delete_bytes: Bytes to remove, always including the line endings
+    :return: memoryview slice when there is nothing to delete inside, bytes otherwise
+    """
+
+    # Trim at both ends without copying anything
+    while seq_start < seq_end and buffer[seq_start] in delete_bytes:
+        seq_start += 1
+    while seq_end > seq_start and buffer[seq_end - 1] in delete_bytes:
+        seq_end -= 1
+
+    # A view is only possible without any byte to delete inside; line endings
+    # are looked for first as they rule it out soonest
+    search_bytes = _LINE_ENDINGS + delete_bytes
+    if all(buffer.find(search_bytes[i:i + 1], seq_start, seq_end) == -1 for i in range(len(search_bytes))):
+        return file_view[seq_start:seq_end]
+
+    return buffer[seq_start:seq_end].translate(None, delete_bytes)
+
+
+def _close_mapping(buffer):
+    """
+    Close an mmap, leaving it to the garbage collector when callers still
+    hold sequence views into it
+    :param buffer: The mmap to close
+    :return: None
+    """
+
+    try:
+        buffer.close()
+    except BufferError:
+        pass
+
+
+def read_fasta_file(file_name, keep_whitespace=False):
+    """
+    generator: read_fasta_file(file_name)
+    Open a FASTA file and yield its records with the fastest reader that
+    applies: plain files are memory-mapped, gzip/BGZF files are streamed
+    through the decompressor and .2bit files are unpacked record by record.
+    Exits with the error message when the file cannot be opened.
+    @param file_name: Path to a plain, gzip, BGZF or .2bit FASTA file
+    @param keep_whitespace: Only remove line endings from sequences
+    @return: generator of (header, sequence) tuples, sequences are str or bytes-like
+    """
+
+    try:
+        if is_twobit(file_name):
+            fh_in = None
+        else:
+            compressed = get_compression(file_name) is not None
+            fh_in = open_text(file_name) if compressed else open(file_name, "rb")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    if fh_in is None:
+        yield from read_twobit_records(file_name)
+        return
+
+    with fh_in:
+        if compressed:
+            yield from read_fasta_records(fh_in, keep_whitespace)
+        else:
+            yield from read_fasta_mmap(fh_in, keep_whitespace=keep_whitespace)
@@ -0,0 +1,284 @@
+"""
+File: fasta_pipeline.py
+This program reads a FASTA file once and streams its records to several
+analyses at the same time, e.g. the nucleotide statistics of
+nt_fasta_stats.py, the protein / secondary structure split of
+sec_structure_split.py and a record length histogram.
+
+Every consumer runs in its own thread and is fed batches of records through
+a bounded queue, so one slow consumer holds the reader back instead of
+letting records pile up in memory. All consumers share the same batches;
+the input is read and parsed a single time however many analyses run.
+New analyses are added with register_consumer().
+
+The reader keeps the spaces inside sequence lines when any consumer needs
+them (split); the other consumers then get the sequences with all
+whitespace removed, as the memory-mapped reader does for wrapped records.
+
+Sample command for executing the program:
+
+python3 fasta_pipeline.py [-h] -i pdb_seqres.txt -c stats -c split -c lengths [-d out_dir] [-b 100]
+"""
+import argparse
+import os
+import queue
+import sys
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import nt_fasta_stats
+import sec_structure_split
+from fasta_io import read_fasta_file
+
+# run(records, args) -> message for stderr; keep_whitespace asks the reader
+# to keep spaces inside sequence lines, as secondary structures need
+Consumer = namedtuple("Consumer", ["run", "keep_whitespace"])
+
+# Sequence bytes per batch handed to the consumers, and batches a consumer
+# may fall behind the reader before the reader waits for it
+_BATCH_SIZE = 1 << 20
+_QUEUE_BATCHES = 4
+
+# Seconds between checks for a failed consumer while its queue is full
+_PUT_TIMEOUT = 0.1
+
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+
+
+def _run_stats(records, args):
+    """
+    Consumer: nucleotide statistics table, as written by nt_fasta_stats.py
+    :param records: Iterable of (header, sequence) tuples
+    :param args: Parsed command line arguments
+    :return: Message for stderr
+    """
+
+    out_file = os.path.join(args.outdir, "nt_stats.txt")
+    outfile = nt_fasta_stats.get_filehandle(out_file, "w")
+    with outfile:
+        num_rows = nt_fasta_stats.output_records_to_file(records, outfile)
+    return f"Wrote {num_rows} statistics rows to {out_file}"
+
+
+def _run_split(records, args):
+    """
+    Consumer: protein and secondary structure files, as written by sec_structure_split.py
+    :param records: Iterable of (header, sequence) tuples, whitespace kept
+    :param args: Parsed command line arguments
+    :return: Message for stderr
+    """
+
+    buffer_size = sec_structure_split.OUTPUT_BUFFER_SIZE
+    fh_out1 = sec_structure_split.get_filehandle(os.path.join(args.outdir, "pdb_protein.fasta"), "w", buffer_size)
+    fh_out2 = sec_structure_split.get_filehandle(os.path.join(args.outdir, "pdb_ss.fasta"), "w", buffer_size)
+    with fh_out1, fh_out2:
+        num_proteins, num_ss = sec_structure_split.split_records(records, fh_out1, fh_out2)
+    return f"Found {num_proteins} protein sequences\nFound {num_ss} ss sequences"
+
+
+def _run_lengths(records, args):
+    """
+    Consumer: histogram of record lengths
+    :param records: Iterable of (header, sequence) tuples
+    :param args: Parsed command line arguments
+    :return: Message for stderr
+    """
+
+    lengths = np.fromiter((len(sequence) for _, sequence in records), dtype=np.int64)
+    out_file = os.path.join(args.outdir, "length_histogram.txt")
+    outfile = nt_fasta_stats.get_filehandle(out_file, "w")
+    with outfile:
+        write_length_histogram(get_length_histogram(lengths, args.bin_size), args.bin_size, outfile)
+    return f"Wrote the length histogram of {len(lengths)} records to {out_file}"
+
+
+CONSUMERS = {
+    "stats": Consumer(_run_stats, False),
+    "split": Consumer(_run_split, True),
+    "lengths": Consumer(_run_lengths, False),
+}
+
+
+def register_consumer(name, run, keep_whitespace=False):
+    """
+    Make a new analysis available to the pipeline
+    :param name: Name used to select it with -c/--consumer
+    :param run: Function taking (records, args) and returning a message for stderr
+    :param keep_whitespace: The consumer needs the spaces inside sequence lines
+    :return: None
+    """
+
+    CONSUMERS[name] = Consumer(run, keep_whitespace)
+
+
+def get_length_histogram(lengths, bin_size):
+    """
+    Number of records in each length bin
+    :param lengths: NumPy array of record lengths
+    :param bin_size: Width of a bin in bases
+    :return: NumPy array, entry i counts lengths from i * bin_size up to (i + 1) * bin_size
+    """
+
+    return np.bincount(lengths // bin_size) if len(lengths) else np.zeros(0, dtype=np.int64)
+
+
+def write_length_histogram(histogram, bin_size, output_file):
+    """
+    Write the non-empty bins of a length histogram
+    :param histogram: Counts from get_length_histogram()
+    :param bin_size: Width of a bin in bases
+    :param output_file: Open filehandle to write the table to
+    :return: Number of bins written
+    """
+
+    print("Min_length\tMax_length\tRecords", file=output_file)
+
+    bins = np.flatnonzero(histogram)
+    for bin_index, count in zip(bins.tolist(), histogram[bins].tolist()):
+        print(f"{bin_index * bin_size}\t{(bin_index + 1) * bin_size - 1}\t{count}", file=output_file)
+    return len(bins)
+
+
+def iter_record_batches(records):
+    """
+    generator: iter_record_batches(records)
+    Group records into batches of about _BATCH_SIZE sequence bytes. Sequences
+    are copied out of the reader's memory map, so they stay valid after the
+    reader has moved on.
+    @param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    @return: generator of lists of (header, str or bytes sequence) tuples
+    """
+
+    batch = []
+    batch_size = 0
+    for header, sequence in records:
+        if not isinstance(sequence, (str, bytes)):
+            sequence = bytes(sequence)
+        batch.append((header, sequence))
+        batch_size += len(sequence)
+        if batch_size >= _BATCH_SIZE:
+            yield batch
+            batch = []
+            batch_size = 0
+
+    if batch:
+        yield batch
+
+
+def _iter_queue(batch_queue, strip_whitespace):
+    """
+    generator: _iter_queue(batch_queue, strip_whitespace)
+    Records of the batches put on a queue, up to the None that ends the input
+    @param batch_queue: queue.Queue of record batches
+    @param strip_whitespace: Remove the whitespace the reader kept for other consumers
+    @return: generator of (header, sequence) tuples
+    """
+
+    while True:
+        batch = batch_queue.get()
+        if batch is None:
+            return
+        if strip_whitespace:
+            for header, sequence in batch:
+                if isinstance(sequence, str):
+                    yield header, "".join(sequence.split())
+                else:
+                    yield header, sequence.translate(None, _WHITESPACE)
+        else:
+            yield from batch
+
+
+def _put(batch_queue, future, batch):
+    """
+    Put a batch on a consumer's queue, giving up when the consumer has stopped
+    :param batch_queue: queue.Queue of the consumer
+    :param future: Future of the consumer thread
+    :param batch: Record batch, or None to end the input
+    :return: False when the consumer has stopped, e.g. after an error
+    """
+
+    while True:
+        try:
+            batch_queue.put(batch, timeout=_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            if future.done():
+                return False
+
+
+def run_pipeline(records, consumers, args, keep_whitespace=False):
+    """
+    Stream records to several consumers, each running in its own thread
+    :param records: Iterable of (header, sequence) tuples, read a single time
+    :param consumers: List of Consumer
+    :param args: Parsed command line arguments, passed on to every consumer
+    :param keep_whitespace: True when the records keep the spaces inside sequence lines
+    :return: list of the consumers' messages, in the order of consumers
+    """
+
+    queues = [queue.Queue(maxsize=_QUEUE_BATCHES) for _ in consumers]
+    with ThreadPoolExecutor(max_workers=len(consumers)) as executor:
+        futures = [executor.submit(consumer.run, _iter_queue(batch_queue,
+                                                             keep_whitespace and not consumer.keep_whitespace),
+                                   args)
+                   for consumer, batch_queue in zip(consumers, queues)]
+        running = list(zip(queues, futures))
+        try:
+            for batch in iter_record_batches(records):
+                running = [(batch_queue, future) for batch_queue, future in running
+                           if _put(batch_queue, future, batch)]
+                if not running:
+                    break
+        finally:
+            # End the input of every consumer, also when the reader failed
+            for batch_queue, future in running:
+                _put(batch_queue, future, None)
+
+    return [future.result() for future in futures]
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a FASTA file to run several analyses on it in a single pass")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-c", "--consumer", action="append", required=True, choices=sorted(CONSUMERS),
+                        help="Analysis to run (repeatable): stats writes nt_stats.txt, split writes "
+                             "pdb_protein.fasta and pdb_ss.fasta, lengths writes length_histogram.txt")
+    parser.add_argument("-d", "--outdir", default=".", type=str,
+                        help="Directory to write the output files to (default: current directory)")
+    parser.add_argument("-b", "--bin-size", default=100, type=int,
+                        help="Width of a length histogram bin in bases (default: 100)")
+    args = parser.parse_args()
+    if args.bin_size < 1:
+        parser.error("--bin-size must be at least 1")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    if not os.path.isdir(args.outdir):
+        print(f"{args.outdir} is not a directory")
+        sys.exit(1)
+
+    # Each analysis runs once, in the order given
+    consumers = [CONSUMERS[name] for name in dict.fromkeys(args.consumer)]
+    keep_whitespace = any(consumer.keep_whitespace for consumer in consumers)
+    records = read_fasta_file(args.infile, keep_whitespace)
+
+    for message in run_pipeline(records, consumers, args, keep_whitespace):
+        sys.stderr.write(f"{message}\n")
+
+
+if __name__ == "__main__":
+    main()
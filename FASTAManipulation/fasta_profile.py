@@ -0,0 +1,311 @@
+"""
+File: fasta_profile.py
+Per-stage timing and memory instrumentation behind the --profile option of
+nt_fasta_stats.py and sec_structure_split.py.
+
+The tools stream records through a chain of generators (parse, compute,
+write), so the stages run interleaved rather than one after the other.
+StageProfiler charges every stretch of time to the stage that is running:
+iterating a wrapped generator switches to its stage and switches back when
+the next item comes out, so each stage gets its own time and not the time
+of the stages nested inside it.
+
+A run reports wall time and records/s of every stage, bytes/s of the parse
+stage (the one stage that reads the whole input) and the peak RSS of the
+process as one line of JSON on stderr, or writes it to a file.
+Peak Python memory per stage (tracemalloc) and a cProfile dump are optional,
+as both slow the run down.
+"""
+import contextlib
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+# Stage that reads the input file, the only one whose bytes/s is reported
+_PARSE_STAGE = "parse"
+
+
+def get_peak_rss():
+    """
+    Peak resident set size of the current process
+    :return: bytes
+    """
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _StageClock:
+    """
+    Wall clock of a run, and self time, record count and peak traced memory
+    of each of its stages
+    """
+
+    def __init__(self, trace_memory):
+        """
+        :param trace_memory: Read the tracemalloc peak whenever a stage stops running
+        """
+
+        self.trace_memory = trace_memory
+        # Stage name to its {"seconds", "records", "peak_traced_bytes"}, in
+        # the order the stages are first seen
+        self.stages = {}
+        self.wall_seconds = 0.0
+        self._current = None
+        self._switched = 0.0
+        self._started = 0.0
+
+    def start(self):
+        """
+        Start the wall clock
+        :return: None
+        """
+
+        self._started = self._switched = time.perf_counter()
+
+    def stop(self):
+        """
+        Charge the running stage and stop the wall clock
+        :return: None
+        """
+
+        self.switch(None)
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def add_stage(self, stage):
+        """
+        Register a stage, stages are reported in the order they are first seen
+        :param stage: Stage name
+        :return: None
+        """
+
+        if stage not in self.stages:
+            self.stages[stage] = {"seconds": 0.0, "records": 0, "peak_traced_bytes": 0}
+
+    def switch(self, stage):
+        """
+        Charge the time since the last switch to the running stage and make
+        another stage the running one
+        :param stage: Stage that runs from now on, None for none
+        :return: Stage that was running before
+        """
+
+        now = time.perf_counter()
+        previous = self._current
+        if previous is not None:
+            stats = self.stages[previous]
+            stats["seconds"] += now - self._switched
+            if self.trace_memory:
+                stats["peak_traced_bytes"] = max(stats["peak_traced_bytes"], tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+        self._current = stage
+        self._switched = now
+        return previous
+
+
+class StageProfiler:
+    """
+    Self time, record counts and peak traced memory of the stages of a run.
+    A disabled profiler hands iterables back unchanged and times nothing, so
+    the tools can call it unconditionally.
+    """
+
+    def __init__(self, tool, input_file=None, enabled=True, trace_memory=False, cprofile_file=None):
+        """
+        :param tool: Name of the tool, reported in the summary
+        :param input_file: Path of the input, its size on disk is the bytes of the parse bytes/s
+        :param enabled: False makes every method a no-op
+        :param trace_memory: Trace Python allocations to report peak memory per stage
+        :param cprofile_file: Path to dump cProfile statistics to, None for no cProfile
+        """
+
+        self.tool = tool
+        self.input_file = input_file
+        self.enabled = enabled
+        self.cprofile_file = cprofile_file
+        self.input_bytes = 0
+        self._clock = _StageClock(trace_memory)
+        self._cprofile = None
+
+    def start(self):
+        """
+        Start the wall clock, and tracemalloc and cProfile when requested
+        :return: None
+        """
+
+        if not self.enabled:
+            return
+        if self.input_file is not None and os.path.isfile(self.input_file):
+            self.input_bytes = os.path.getsize(self.input_file)
+        if self._clock.trace_memory:
+            tracemalloc.start()
+        if self.cprofile_file:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._clock.start()
+
+    def stop(self):
+        """
+        Stop the wall clock and tracing, and write the cProfile statistics
+        :return: None
+        """
+
+        if not self.enabled:
+            return
+        self._clock.stop()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_file)
+            self._cprofile = None
+        if self._clock.trace_memory:
+            tracemalloc.stop()
+
+    def wrap(self, stage, iterable):
+        """
+        Charge the time spent producing the items of an iterable to a stage
+        and count the items as its records
+        :param stage: Stage name, e.g. "parse" or "compute"
+        :param iterable: Iterable to time, e.g. a generator of records
+        :return: iterable yielding the same items
+        """
+
+        if not self.enabled:
+            return iterable
+        return self._iter_stage(stage, iter(iterable))
+
+    def _iter_stage(self, stage, iterator):
+        """
+        generator: _iter_stage(stage, iterator)
+        @param stage: Stage name
+        @param iterator: Iterator whose next() calls are timed
+        @return: generator of the items of iterator
+        """
+
+        # Registered on first use, a stage that never runs (e.g. parsing in
+        # sharded mode, where workers parse) is left out of the summary
+        self._clock.add_stage(stage)
+        stats = self._clock.stages[stage]
+        while True:
+            previous = self._clock.switch(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._clock.switch(previous)
+            stats["records"] += 1
+            yield item
+
+    @contextlib.contextmanager
+    def stage(self, stage):
+        """
+        Charge the time spent in a block to a stage, e.g. the write call that
+        drives the wrapped generators
+        :param stage: Stage name
+        :return: context manager
+        """
+
+        if not self.enabled:
+            yield
+            return
+        self._clock.add_stage(stage)
+        previous = self._clock.switch(stage)
+        try:
+            yield
+        finally:
+            self._clock.switch(previous)
+
+    def add_records(self, stage, num_records):
+        """
+        Count records for a stage timed with stage() rather than wrap()
+        :param stage: Stage name
+        :param num_records: Number of records to add
+        :return: None
+        """
+
+        if self.enabled:
+            self._clock.add_stage(stage)
+            self._clock.stages[stage]["records"] += num_records
+
+    def get_summary(self):
+        """
+        Summary of a stopped run
+        :return: dictionary ready for json.dumps()
+        """
+
+        stages = {}
+        for stage, stats in self._clock.stages.items():
+            elapsed = max(stats["seconds"], 1e-9)
+            stages[stage] = {"seconds": round(stats["seconds"], 6),
+                             "records": stats["records"],
+                             "records_per_s": round(stats["records"] / elapsed, 1)}
+            if stage == _PARSE_STAGE:
+                stages[stage]["bytes_per_s"] = round(self.input_bytes / elapsed, 1)
+            if self._clock.trace_memory:
+                stages[stage]["peak_traced_bytes"] = stats["peak_traced_bytes"]
+
+        return {"tool": self.tool,
+                "input": self.input_file,
+                "input_bytes": self.input_bytes,
+                "wall_seconds": round(self._clock.wall_seconds, 6),
+                "peak_rss_bytes": get_peak_rss(),
+                "stages": stages}
+
+    def write_summary(self, json_file=None):
+        """
+        Write the summary as JSON to a file, or as a single line to stderr
+        so it lands in the logs of the run
+        :param json_file: Path of the JSON file, None for stderr
+        :return: None
+        """
+
+        if not self.enabled:
+            return
+        summary = self.get_summary()
+        if json_file is None:
+            sys.stderr.write(f"profile: {json.dumps(summary, sort_keys=True)}\n")
+            return
+        try:
+            with open(json_file, "w", encoding="utf-8") as fh_out:
+                fh_out.write(json.dumps(summary, indent=2, sort_keys=True) + "\n")
+        except OSError as e:
+            print(e)
+            sys.exit(1)
+
+
+def add_profile_arguments(parser):
+    """
+    Add the --profile options to a tool's argument parser
+    :param parser: argparse.ArgumentParser
+    :return: None
+    """
+
+    parser.add_argument("--profile", action="store_true",
+                        help="Report time, records/s and peak memory of the parse, compute and write "
+                             "stages, and bytes/s of parsing, as one line of JSON on stderr")
+    parser.add_argument("--profile-json", type=str,
+                        help="Write the --profile summary to this JSON file instead (implies --profile)")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Also report peak Python memory per stage with tracemalloc, "
+                             "slower (implies --profile)")
+    parser.add_argument("--profile-cprofile", type=str,
+                        help="Dump cProfile statistics of the run to this file (implies --profile)")
+
+
+def get_profiler(args, tool, input_file):
+    """
+    Build the profiler asked for on the command line
+    :param args: Parsed arguments of a parser set up with add_profile_arguments()
+    :param tool: Name of the tool, reported in the summary
+    :param input_file: Path of the input file
+    :return: StageProfiler, disabled unless a --profile option is given
+    """
+
+    enabled = bool(args.profile or args.profile_json or args.profile_memory or args.profile_cprofile)
+    return StageProfiler(tool, input_file, enabled=enabled, trace_memory=args.profile_memory,
+                         cprofile_file=args.profile_cprofile)
@@ -0,0 +1,185 @@
+"""
+File: fasta_rev_comp.py
+This program writes the reverse complement of every record of a FASTA file.
+
+Complementing is one bytes.translate() call with a table covering every
+IUPAC code in both cases, and reversing is a slice. Plain files are
+memory-mapped and each record is walked backwards from its end, a chunk at a
+time, so even a chromosome is never held in memory twice. gzip, BGZF and
+.2bit input cannot be read backwards and is reverse complemented one whole
+record at a time.
+
+Sample command for executing the program:
+
+python3 fasta_rev_comp.py [-h] -i input_file.fasta -o output_file.fasta [-l 60]
+OR
+python3 fasta_rev_comp.py --infile input_file.fasta --outfile output_file.fasta --line-width 0
+"""
+import argparse
+import mmap
+import os
+import sys
+
+import numpy as np
+
+from compressed_io import get_compression
+from fasta_io import iter_record_spans, read_fasta_file
+from twobit import is_twobit
+
+# The IUPAC complement table is defined once, in BasicPythonCodes/rev_comp.py:
+# U (RNA) complements to A and bytes that are not nucleotide codes are copied
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "BasicPythonCodes"))
+from rev_comp import BYTES_COMPLEMENT_TABLE  # noqa: E402 pylint: disable=wrong-import-position,wrong-import-order
+
+_WHITESPACE = b" \t\n\r\x0b\x0c"
+
+# Bytes of a record read at a time while walking it backwards
+_CHUNK_SIZE = 1 << 22
+_LINE_WIDTH = 60
+
+
+def reverse_complement(sequence):
+    """
+    Reverse complement of a sequence, whitespace is dropped
+    :param sequence: bytes-like or str sequence
+    :return: bytes
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    return bytes(sequence).translate(BYTES_COMPLEMENT_TABLE, _WHITESPACE)[::-1]
+
+
+def iter_reverse_complement_chunks(buffer, seq_start, seq_end, chunk_size=_CHUNK_SIZE):
+    """
+    generator: iter_reverse_complement_chunks(buffer, seq_start, seq_end)
+    Reverse complement the sequence lines of a record from its last byte
+    backwards, one chunk at a time
+    @param buffer: bytes-like object holding the file, e.g. an mmap
+    @param seq_start: Offset of the first sequence byte
+    @param seq_end: Offset just past the last sequence byte
+    @param chunk_size: Bytes read per chunk
+    @return: generator of bytes, in output order
+    """
+
+    position = seq_end
+    while position > seq_start:
+        chunk_start = max(seq_start, position - chunk_size)
+        yield reverse_complement(buffer[chunk_start:position])
+        position = chunk_start
+
+
+def write_wrapped(chunks, output_file, line_width=_LINE_WIDTH):
+    """
+    Write sequence chunks as lines of a fixed width, whatever the chunk sizes
+    :param chunks: Iterable of bytes
+    :param output_file: Filehandle opened in binary mode
+    :param line_width: Bases per line, 0 writes the sequence on one line
+    :return: Number of bases written
+    """
+
+    num_bases = 0
+    pending = b""
+    for chunk in chunks:
+        num_bases += len(chunk)
+        if not line_width:
+            output_file.write(chunk)
+            continue
+
+        pending += chunk
+        num_full = len(pending) // line_width
+        if num_full:
+            # Lay the full lines out as rows and add a newline column
+            lines = np.empty((num_full, line_width + 1), dtype=np.uint8)
+            lines[:, :line_width] = np.frombuffer(pending, dtype=np.uint8, count=num_full * line_width) \
+                .reshape(num_full, line_width)
+            lines[:, line_width] = ord("\n")
+            output_file.write(lines.tobytes())
+            pending = pending[num_full * line_width:]
+
+    if pending or (num_bases and not line_width):
+        output_file.write(pending + b"\n")
+    return num_bases
+
+
+def reverse_complement_mmap(fh_in, output_file, line_width=_LINE_WIDTH):
+    """
+    Reverse complement every record of an uncompressed FASTA file, walking
+    each record backwards through a memory map
+    :param fh_in: Filehandle of an uncompressed FASTA file opened in binary mode
+    :param output_file: Filehandle opened in binary mode
+    :param line_width: Bases per line, 0 writes each sequence on one line
+    :return: Number of records written
+    """
+
+    if os.fstat(fh_in.fileno()).st_size == 0:
+        return 0
+
+    num_records = 0
+    with mmap.mmap(fh_in.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for num_records, (header_start, seq_start, seq_end) in enumerate(iter_record_spans(buffer), start=1):
+            output_file.write(b">" + buffer[header_start + 1:seq_start].rstrip() + b"\n")
+            chunks = iter_reverse_complement_chunks(buffer, seq_start, seq_end, _CHUNK_SIZE)
+            write_wrapped(chunks, output_file, line_width)
+
+    return num_records
+
+
+def reverse_complement_records(records, output_file, line_width=_LINE_WIDTH):
+    """
+    Reverse complement records that are read one whole record at a time
+    :param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    :param output_file: Filehandle opened in binary mode
+    :param line_width: Bases per line, 0 writes each sequence on one line
+    :return: Number of records written
+    """
+
+    num_records = 0
+    for num_records, (header, sequence) in enumerate(records, start=1):
+        output_file.write(f">{header}\n".encode("utf-8"))
+        write_wrapped([reverse_complement(sequence)], output_file, line_width)
+
+    return num_records
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a FASTA file to reverse complement every record")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
+    parser.add_argument("-l", "--line-width", default=_LINE_WIDTH, type=int,
+                        help=f"Bases per output line, 0 for one line per sequence (default: {_LINE_WIDTH})")
+    args = parser.parse_args()
+    if args.line_width < 0:
+        parser.error("--line-width must not be negative")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        streamed = is_twobit(args.infile) or get_compression(args.infile) is not None
+        fh_in = open(args.infile, "rb")
+        outfile = open(args.outfile, "wb")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    with fh_in, outfile:
+        if streamed:
+            reverse_complement_records(read_fasta_file(args.infile), outfile, args.line_width)
+        else:
+            reverse_complement_mmap(fh_in, outfile, args.line_width)
+
+
+if __name__ == "__main__":
+    main()
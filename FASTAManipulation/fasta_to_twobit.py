@@ -0,0 +1,90 @@
+"""
+File: fasta_to_twobit.py
+This program converts a FASTA file to the packed .2bit format, or a .2bit
+file back to FASTA. The direction is picked from the input file's contents.
+
+Sample command for executing the program:
+
+python3 fasta_to_twobit.py [-h] -i genome.fa -o genome.2bit
+python3 fasta_to_twobit.py -i genome.2bit -o genome.fa [-r chr1:1000-2000] [--no-mask]
+"""
+import argparse
+import sys
+
+from fasta_index import parse_region
+from fasta_io import read_fasta_file
+from twobit import TwoBitReader, is_twobit, write_twobit
+
+_FASTA_LINE_WIDTH = 60
+
+
+def write_twobit_as_fasta(file_name, output_file, regions=None, soft_mask=True):
+    """
+    Write records or regions of a .2bit file as FASTA
+    :param file_name: Path to a .2bit file
+    :param output_file: Open filehandle to write the records to
+    :param regions: Regions as name, name:start or name:start-end (1-based, inclusive), default every record
+    :param soft_mask: Write soft-masked bases in lowercase
+    :return: Number of records written
+    """
+
+    with TwoBitReader(file_name) as reader:
+        names = reader.names()
+        regions = regions or names
+        for region in regions:
+            name, start, end = parse_region(region)
+            if name not in names:
+                print(f"{name} is not in {file_name}")
+                sys.exit(1)
+
+            start = 0 if start is None else start - 1
+            sequence = reader.fetch(name, start, end, soft_mask).decode("ascii")
+            output_file.write(f">{region}\n")
+            for i in range(0, len(sequence), _FASTA_LINE_WIDTH):
+                output_file.write(sequence[i:i + _FASTA_LINE_WIDTH] + "\n")
+
+    return len(regions)
+
+
+def get_cli_args():
+    """
+    void: get_cli_args()
+    Takes: no arguments
+    @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Convert a FASTA file to .2bit, or a .2bit file back to FASTA")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
+    parser.add_argument("-r", "--region", action="append", default=[],
+                        help="Region of a .2bit input to write as name, name:start or name:start-end (repeatable)")
+    parser.add_argument("--no-mask", action="store_true",
+                        help="Write soft-masked bases of a .2bit input in uppercase")
+    return parser.parse_args()
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        twobit_input = is_twobit(args.infile)
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    if twobit_input:
+        with open(args.outfile, "w", encoding="utf-8") as fh_out:
+            write_twobit_as_fasta(args.infile, fh_out, args.region, not args.no_mask)
+    else:
+        if args.region:
+            print("--region needs a .2bit input")
+            sys.exit(1)
+        num_records = write_twobit(read_fasta_file(args.infile), args.outfile)
+        print(f"Wrote {num_records} records to {args.outfile}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+File: fastq_io.py
+Streaming FASTQ reader for plain, gzip and BGZF compressed files.
+
+The file is read in large blocks and each block is split into lines with one
+bytes.split() call; names, sequences and qualities are then every fourth
+line of the block, taken with list slices. No line is read or stripped one
+at a time, and memory is bounded by the block size whatever the number of
+reads. Records must use the standard four-line layout (no wrapped sequence
+or quality lines), as every current sequencer writes.
+"""
+import sys
+from collections import namedtuple
+
+from compressed_io import open_binary
+
+FastqBatch = namedtuple("FastqBatch", ["names", "sequences", "qualities"])
+
+# Bytes read from the file at a time, each block yields one batch of reads
+_BLOCK_SIZE = 1 << 22
+
+
+def read_fastq_batches(fh_in, block_size=_BLOCK_SIZE):
+    """
+    generator: read_fastq_batches(fh_in)
+    Parse a FASTQ file a block of reads at a time. Exits with an error
+    message on a malformed record.
+    @param fh_in: Filehandle opened in binary mode, e.g. from open_binary()
+    @param block_size: Bytes read at a time
+    @return: generator of FastqBatch, lists of names (str, without the "@"),
+    sequences (bytes) and qualities (bytes)
+    """
+
+    pending = b""
+    num_reads = 0
+    while True:
+        block = fh_in.read(block_size)
+        if not block:
+            break
+        if b"\r" in block:
+            block = block.replace(b"\r", b"")
+        lines = (pending + block).split(b"\n")
+
+        # Complete records only, the rest is carried over to the next block
+        num_complete = (len(lines) - 1) // 4 * 4
+        pending = b"\n".join(lines[num_complete:])
+        if num_complete:
+            batch = _get_batch(lines[:num_complete], num_reads)
+            num_reads += len(batch.names)
+            yield batch
+
+    # Drop the empty line after the final newline and any blank lines after
+    # it, but not the empty sequence and quality lines of a zero-length read
+    lines = pending.split(b"\n")
+    while len(lines) % 4 and lines[-1] == b"":
+        lines.pop()
+    if lines:
+        if len(lines) % 4:
+            _exit_bad_fastq(num_reads + len(lines) // 4 + 1, "the file ends in the middle of a record")
+        yield _get_batch(lines, num_reads)
+
+
+def _get_batch(lines, num_reads):
+    """
+    Split the lines of whole records into names, sequences and qualities
+    :param lines: List of lines, a multiple of four
+    :param num_reads: Reads parsed before these lines, for error messages
+    :return: FastqBatch
+    """
+
+    headers = lines[0::4]
+    sequences = lines[1::4]
+    separators = lines[2::4]
+    qualities = lines[3::4]
+
+    if not all(map(bytes.startswith, headers, [b"@"] * len(headers))) or \
+            not all(map(bytes.startswith, separators, [b"+"] * len(separators))):
+        bad_read = next(i for i, (header, separator) in enumerate(zip(headers, separators))
+                        if not header.startswith(b"@") or not separator.startswith(b"+"))
+        _exit_bad_fastq(num_reads + bad_read + 1, "expected an @ header and a + separator line")
+    if list(map(len, sequences)) != list(map(len, qualities)):
+        bad_read = next(i for i, (sequence, quality) in enumerate(zip(sequences, qualities))
+                        if len(sequence) != len(quality))
+        _exit_bad_fastq(num_reads + bad_read + 1, "sequence and quality lengths differ")
+
+    names = [header[1:].decode("utf-8").rstrip() for header in headers]
+    return FastqBatch(names, sequences, qualities)
+
+
+def _exit_bad_fastq(read_number, reason):
+    """
+    Report a malformed FASTQ record and exit
+    :param read_number: 1-based number of the offending read
+    :param reason: What is wrong with it
+    :return: None, exits with status 1
+    """
+
+    print(f"Malformed FASTQ record {read_number}: {reason}")
+    sys.exit(1)
+
+
+def read_fastq_records(fh_in):
+    """
+    generator: read_fastq_records(fh_in)
+    Yield the reads of a FASTQ file one at a time
+    @param fh_in: Filehandle opened in binary mode, e.g. from open_binary()
+    @return: generator of (name, sequence bytes, quality bytes) tuples
+    """
+
+    for batch in read_fastq_batches(fh_in):
+        yield from zip(*batch)
+
+
+def open_fastq(file_name):
+    """
+    Open a plain, gzip or BGZF FASTQ file, exiting with the error message if
+    it cannot be opened
+    :param file_name: Path to the file
+    :return: filehandle opened in binary mode
+    """
+
+    try:
+        return open_binary(file_name)
+    except OSError as e:
+        print(e)
+        sys.exit(1)
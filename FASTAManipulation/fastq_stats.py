@@ -0,0 +1,166 @@
+"""
+File: fastq_stats.py
+Read-level and cycle-level statistics of FASTQ files, behind the --fastq
+option of nt_fasta_stats.py.
+
+Every batch of reads from fastq_io.py is joined into one byte array for the
+bases and one for the qualities. Base composition is a single histogram,
+and Phred scores are decoded in NumPy over the whole batch and summed per
+cycle and per read with np.bincount(), or with a 2-D sum when all reads of
+the batch have the same length. Only the running totals are
+kept between batches, so memory does not grow with the number of reads.
+"""
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from nt_composition import composition_from_histogram, get_gc_percentage
+
+# Running totals: counts of every base byte value, reads of every length,
+# quality sum and number of bases at every cycle, and reads of every
+# (rounded down) mean quality
+FastqStats = namedtuple("FastqStats", ["base_counts", "length_counts", "cycle_quality_sums",
+                                       "cycle_bases", "read_quality_counts"])
+
+PHRED_OFFSETS = [33, 64]
+
+# Highest Phred score that fits in printable ASCII with offset 33
+_MAX_QUALITY = 93
+
+
+def get_empty_stats():
+    """
+    Statistics of no reads
+    :return: FastqStats
+    """
+
+    empty = np.zeros(0, dtype=np.int64)
+    return FastqStats(np.zeros(256, dtype=np.int64), empty, empty, empty, empty)
+
+
+def get_batch_stats(batch, phred_offset=33):
+    """
+    Statistics of one batch of reads
+    :param batch: FastqBatch from fastq_io.read_fastq_batches()
+    :param phred_offset: ASCII offset of the quality scores, 33 (Sanger/Illumina 1.8+) or 64
+    :return: FastqStats
+    """
+
+    num_reads = len(batch.sequences)
+    lengths = np.fromiter(map(len, batch.sequences), dtype=np.int64, count=num_reads)
+    bases = np.frombuffer(b"".join(batch.sequences), dtype=np.uint8)
+    raw_qualities = np.frombuffer(b"".join(batch.qualities), dtype=np.uint8)
+    if len(raw_qualities) and raw_qualities.min() < phred_offset:
+        print(f"Quality character {chr(raw_qualities.min())!r} is below the Phred+{phred_offset} range, "
+              f"check --phred-offset")
+        sys.exit(1)
+
+    has_bases = lengths > 0
+    if num_reads and lengths.min() == lengths.max():
+        # Same length reads (the usual case) are rows of a matrix; the
+        # offset is taken off the sums rather than off every byte
+        matrix = raw_qualities.reshape(num_reads, lengths[0])
+        cycle_quality_sums = matrix.sum(axis=0, dtype=np.int64) - phred_offset * num_reads
+        cycle_bases = np.full(lengths[0], num_reads, dtype=np.int64)
+        read_quality_sums = matrix.sum(axis=1, dtype=np.int64) - phred_offset * lengths
+    else:
+        # Cycle of every base is its offset from the start of its read
+        qualities = raw_qualities - np.uint8(phred_offset)
+        read_index = np.repeat(np.arange(num_reads), lengths)
+        read_starts = np.cumsum(lengths) - lengths
+        cycles = np.arange(len(qualities)) - read_starts[read_index]
+        cycle_quality_sums = np.bincount(cycles, weights=qualities).astype(np.int64)
+        cycle_bases = np.bincount(cycles)
+        read_quality_sums = np.bincount(read_index, weights=qualities, minlength=num_reads).astype(np.int64)
+
+    read_mean_qualities = read_quality_sums[has_bases] // lengths[has_bases]
+    return FastqStats(np.bincount(bases, minlength=256),
+                      np.bincount(lengths),
+                      cycle_quality_sums,
+                      cycle_bases,
+                      np.bincount(np.minimum(read_mean_qualities, _MAX_QUALITY)))
+
+
+def _add_padded(first, second):
+    """
+    Add two count arrays of possibly different lengths
+    :param first: NumPy int64 array
+    :param second: NumPy int64 array
+    :return: NumPy int64 array as long as the longer input
+    """
+
+    if len(first) < len(second):
+        first, second = second, first
+    total = first.copy()
+    total[:len(second)] += second
+    return total
+
+
+def merge_fastq_stats(first, second):
+    """
+    Combine the statistics of two sets of reads
+    :param first: FastqStats
+    :param second: FastqStats
+    :return: FastqStats of all reads
+    """
+
+    return FastqStats(*(_add_padded(a, b) for a, b in zip(first, second)))
+
+
+def collect_fastq_stats(batches, phred_offset=33):
+    """
+    Statistics of every read of a FASTQ file
+    :param batches: Iterable of FastqBatch, e.g. read_fastq_batches()
+    :param phred_offset: ASCII offset of the quality scores
+    :return: FastqStats
+    """
+
+    stats = get_empty_stats()
+    for batch in batches:
+        stats = merge_fastq_stats(stats, get_batch_stats(batch, phred_offset))
+    return stats
+
+
+def write_fastq_report(stats, output_file):
+    """
+    Write a summary section followed by the length distribution, the mean
+    quality per cycle and the distribution of per-read mean qualities
+    :param stats: FastqStats
+    :param output_file: Open filehandle to write the report to
+    :return: Number of reads reported
+    """
+
+    composition = composition_from_histogram(stats.base_counts)
+    lengths = np.flatnonzero(stats.length_counts)
+    num_reads = int(stats.length_counts.sum())
+    num_bases = int(stats.cycle_bases.sum())
+    mean_length = num_bases / num_reads if num_reads else 0
+    mean_quality = stats.cycle_quality_sums.sum() / num_bases if num_bases else 0
+
+    print("# Summary", file=output_file)
+    print(f"Reads\t{num_reads}", file=output_file)
+    print(f"Bases\t{num_bases}", file=output_file)
+    print(f"A's\t{composition.a}\nG's\t{composition.g}\nC's\t{composition.c}\nT's\t{composition.t}"
+          f"\nN's\t{composition.n}", file=output_file)
+    print(f"GC%\t{get_gc_percentage(composition):.1f}", file=output_file)
+    print(f"Min_length\t{lengths[0] if len(lengths) else 0}", file=output_file)
+    print(f"Max_length\t{lengths[-1] if len(lengths) else 0}", file=output_file)
+    print(f"Mean_length\t{mean_length:.1f}", file=output_file)
+    print(f"Mean_quality\t{mean_quality:.2f}", file=output_file)
+
+    print("\n# Length distribution\nLength\tReads", file=output_file)
+    for length, count in zip(lengths.tolist(), stats.length_counts[lengths].tolist()):
+        print(f"{length}\t{count}", file=output_file)
+
+    print("\n# Per-cycle quality\nCycle\tMean_quality\tBases", file=output_file)
+    cycle_means = stats.cycle_quality_sums / np.maximum(stats.cycle_bases, 1)
+    for cycle, (mean, count) in enumerate(zip(cycle_means.tolist(), stats.cycle_bases.tolist()), start=1):
+        print(f"{cycle}\t{mean:.2f}\t{count}", file=output_file)
+
+    print("\n# Per-read mean quality\nMean_quality\tReads", file=output_file)
+    qualities = np.flatnonzero(stats.read_quality_counts)
+    for quality, count in zip(qualities.tolist(), stats.read_quality_counts[qualities].tolist()):
+        print(f"{quality}\t{count}", file=output_file)
+
+    return num_reads
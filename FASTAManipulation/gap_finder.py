@@ -0,0 +1,187 @@
+"""
+File: gap_finder.py
+This program writes the coordinates of every N run (assembly gap) and every
+soft-masked (lowercase) run of the records of a FASTA file as BED.
+
+Runs are found by run-length encoding a boolean mask of the sequence bytes
+with NumPy (twobit.get_runs()), never by a Python loop over the bases. Long
+records are processed in blocks and runs crossing a block boundary are
+joined, so memory stays bounded on chromosome-size records. A .2bit file
+already stores its N and mask blocks in the record headers, which are read
+directly without unpacking any sequence.
+
+Sample command for executing the program:
+
+python3 gap_finder.py [-h] -i assembly.fasta -o gaps.bed [-t gap] [-m 10]
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from fasta_io import read_fasta_file
+from twobit import TwoBitReader, get_runs, is_twobit
+
+# Mask of the bytes of each run type, indexed by byte value
+_IS_GAP = np.zeros(256, dtype=bool)
+_IS_GAP[np.frombuffer(b"Nn", dtype=np.uint8)] = True
+_IS_SOFT_MASKED = np.zeros(256, dtype=bool)
+_IS_SOFT_MASKED[ord("a"):ord("z") + 1] = True
+RUN_TYPES = {"gap": _IS_GAP, "soft_mask": _IS_SOFT_MASKED}
+
+# Bases of a record encoded at a time
+_BLOCK_SIZE = 1 << 24
+
+
+def get_record_runs(sequence, is_member, min_length=1, block_size=_BLOCK_SIZE):
+    """
+    Runs of the bytes of a sequence that are members of a byte class
+    :param sequence: str or bytes-like sequence
+    :param is_member: NumPy boolean lookup table of 256 entries, e.g. RUN_TYPES["gap"]
+    :param min_length: Shortest run reported
+    :param block_size: Bases encoded at a time
+    :return: (starts, ends) NumPy int64 arrays, 0-based half-open coordinates
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    seq_array = np.frombuffer(sequence, dtype=np.uint8)
+
+    all_starts = []
+    all_sizes = []
+    for block_start in range(0, len(seq_array), block_size):
+        starts, sizes = get_runs(is_member[seq_array[block_start:block_start + block_size]])
+        starts += block_start
+        if len(starts) and all_sizes and all_starts[-1][-1] + all_sizes[-1][-1] == starts[0]:
+            # The last run so far carries on into this block
+            all_sizes[-1][-1] += sizes[0]
+            starts, sizes = starts[1:], sizes[1:]
+        if len(starts):
+            all_starts.append(starts)
+            all_sizes.append(sizes)
+
+    if not all_starts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(all_starts)
+    sizes = np.concatenate(all_sizes)
+    keep = sizes >= min_length
+    return starts[keep], starts[keep] + sizes[keep]
+
+
+def find_record_runs(records, run_types, min_length=1):
+    """
+    generator: find_record_runs(records, run_types)
+    Runs of every record of a FASTA file, record by record
+    @param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    @param run_types: Names of RUN_TYPES to find
+    @param min_length: Shortest run reported
+    @return: generator of (chrom, {run type: (starts, ends)}) tuples
+    """
+
+    for header, sequence in records:
+        chrom = (header.split() or [header])[0]
+        yield chrom, {run_type: get_record_runs(sequence, RUN_TYPES[run_type], min_length)
+                      for run_type in run_types}
+
+
+def find_twobit_runs(file_name, run_types, min_length=1):
+    """
+    generator: find_twobit_runs(file_name, run_types)
+    Runs of every record of a .2bit file, read from the N and mask blocks of
+    the record headers. The N blocks of a .2bit file cover every base that
+    is not A, C, G or T.
+    @param file_name: Path to a .2bit file
+    @param run_types: Names of RUN_TYPES to find
+    @param min_length: Shortest run reported
+    @return: generator of (chrom, {run type: (starts, ends)}) tuples
+    """
+
+    with TwoBitReader(file_name) as reader:
+        for name in reader.names():
+            record = reader.get_record(name)
+            blocks = {"gap": (record.n_starts, record.n_sizes),
+                      "soft_mask": (record.mask_starts, record.mask_sizes)}
+            runs = {}
+            for run_type in run_types:
+                starts, sizes = (np.asarray(block, dtype=np.int64) for block in blocks[run_type])
+                keep = sizes >= min_length
+                runs[run_type] = starts[keep], starts[keep] + sizes[keep]
+            yield name, runs
+
+
+def write_runs_bed(record_runs, output_file):
+    """
+    Write runs as BED4 lines named after their run type, in coordinate order
+    within each record
+    :param record_runs: Iterable of (chrom, {run type: (starts, ends)}) tuples
+    :param output_file: Open filehandle to write the BED lines to
+    :return: dictionary of run type -> (number of runs, number of bases)
+    """
+
+    totals = {}
+    for chrom, runs in record_runs:
+        names = []
+        for run_type, (starts, ends) in runs.items():
+            num_runs, num_bases = totals.get(run_type, (0, 0))
+            totals[run_type] = num_runs + len(starts), num_bases + int((ends - starts).sum())
+            names.extend([run_type] * len(starts))
+        if not names:
+            continue
+
+        starts = np.concatenate([starts for starts, _ in runs.values()])
+        ends = np.concatenate([ends for _, ends in runs.values()])
+        order = np.lexsort((ends, starts))
+        output_file.writelines([f"{chrom}\t{start}\t{end}\t{names[i]}\n" for i, start, end in
+                                zip(order.tolist(), starts[order].tolist(), ends[order].tolist())])
+
+    return totals
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a FASTA file to write its N runs (gaps) and soft-masked runs as BED")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to BED file to write")
+    parser.add_argument("-t", "--type", action="append", choices=sorted(RUN_TYPES),
+                        help="Run type to report (repeatable, default: gap and soft_mask)")
+    parser.add_argument("-m", "--min-length", default=1, type=int,
+                        help="Shortest run reported in bases (default: 1)")
+    args = parser.parse_args()
+    if args.min_length < 1:
+        parser.error("--min-length must be at least 1")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+    run_types = list(dict.fromkeys(args.type or ["gap", "soft_mask"]))
+
+    try:
+        twobit = is_twobit(args.infile)
+        outfile = open(args.outfile, "w", encoding="utf-8")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    with outfile:
+        if twobit:
+            record_runs = find_twobit_runs(args.infile, run_types, args.min_length)
+        else:
+            record_runs = find_record_runs(read_fasta_file(args.infile), run_types, args.min_length)
+        totals = write_runs_bed(record_runs, outfile)
+
+    for run_type in run_types:
+        num_runs, num_bases = totals.get(run_type, (0, 0))
+        sys.stderr.write(f"Found {num_runs} {run_type} runs covering {num_bases} bases\n")
+
+
+if __name__ == "__main__":
+    main()
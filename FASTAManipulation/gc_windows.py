@@ -0,0 +1,194 @@
+"""
+File: gc_windows.py
+This program writes a sliding-window GC (or any base set) content track of
+the sequences in a FASTA file, in bedGraph format.
+
+Window counts come from prefix sums over the sequence bytes: after one
+cumulative sum, the count of a window is the difference of two entries, so
+every window costs the same no matter how wide it is. The prefix sums are
+built one block of windows at a time, which keeps memory bounded on whole
+chromosomes.
+
+Sample command for executing the program:
+
+python3 gc_windows.py [-h] -i input_file.fasta -o output_file.bedGraph [-w 1000] [-s 1000]
+OR
+python3 gc_windows.py --infile input_file.fasta --outfile output_file.bedGraph --bases GC --exclude-n
+"""
+import argparse
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+from fasta_io import read_fasta_file
+from nt_fasta_stats import get_filehandle
+
+# Sequence bytes covered by one block of prefix sums, bounds the temporary
+# arrays to a few tens of megabytes whatever the record length
+_BLOCK_SIZE = 1 << 22
+
+# Windows per block, so a small step does not give a block millions of
+# windows, and bedGraph lines formatted before each write
+_MAX_BLOCK_WINDOWS = 1 << 18
+_WINDOWS_PER_WRITE = 1 << 16
+
+# Window width and distance between window starts in bases; whether lowercase
+# (soft-masked) bases are counted and whether N bases are left out of the
+# window size
+WindowOptions = namedtuple("WindowOptions", ["window", "step", "ignore_case", "exclude_n"],
+                           defaults=(False, False))
+
+
+def get_base_mask(bases, ignore_case=False):
+    """
+    Lookup table marking the byte values of a set of bases
+    :param bases: Bases to count, e.g. "GC"
+    :param ignore_case: Also count the lowercase (soft-masked) bases
+    :return: NumPy uint8 array of 256 entries, 1 for a counted byte
+    """
+
+    if ignore_case:
+        bases = bases.upper() + bases.lower()
+    mask = np.zeros(256, dtype=np.uint8)
+    mask[np.frombuffer(bases.encode("ascii"), dtype=np.uint8)] = 1
+    return mask
+
+
+def get_window_counts(sequence, mask, window, step):
+    """
+    Count the masked bytes of every window of a sequence with prefix sums.
+    Windows start every step bases; the last windows are cut short at the end
+    of the sequence.
+    :param sequence: str or bytes-like sequence
+    :param mask: Lookup table from get_base_mask()
+    :param window: Window width in bases
+    :param step: Distance between window starts in bases
+    :return: generator of (starts, ends, counts) NumPy arrays, one tuple per block of windows
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    seq_array = np.frombuffer(sequence, dtype=np.uint8)
+    length = len(seq_array)
+
+    windows_per_block = max(1, min(_BLOCK_SIZE // step, _MAX_BLOCK_WINDOWS))
+    for first_start in range(0, length, windows_per_block * step):
+        starts = np.arange(first_start, min(first_start + windows_per_block * step, length), step,
+                           dtype=np.int64)
+        ends = np.minimum(starts + window, length)
+
+        # prefix[i] is the number of masked bytes before offset first_start + i
+        block = seq_array[first_start:ends[-1]]
+        prefix = np.zeros(len(block) + 1, dtype=np.int64)
+        np.cumsum(mask[block], out=prefix[1:])
+
+        yield starts, ends, prefix[ends - first_start] - prefix[starts - first_start]
+
+
+def get_window_fraction_blocks(sequence, bases, options):
+    """
+    Fraction of the bases of every window that belong to a base set, one
+    block of windows at a time. With options.exclude_n, windows made only of
+    N are skipped.
+    :param sequence: str or bytes-like sequence
+    :param bases: Bases to count, e.g. "GC"
+    :param options: WindowOptions
+    :return: generator of (starts, ends, fractions) NumPy arrays, 0-based half-open coordinates
+    """
+
+    base_counts = get_window_counts(sequence, get_base_mask(bases, options.ignore_case), options.window,
+                                    options.step)
+    if options.exclude_n:
+        n_counts = get_window_counts(sequence, get_base_mask("N", ignore_case=True), options.window, options.step)
+    else:
+        n_counts = itertools.repeat((None, None, 0))
+
+    for (starts, ends, counts), (_, _, num_n) in zip(base_counts, n_counts):
+        sizes = ends - starts - num_n
+        keep = sizes > 0
+        yield starts[keep], ends[keep], counts[keep] / sizes[keep]
+
+
+def get_window_fractions(sequence, bases, options):
+    """
+    Fraction of the bases of every window that belong to a base set
+    :param sequence: str or bytes-like sequence
+    :param bases: Bases to count, e.g. "GC"
+    :param options: WindowOptions
+    :return: generator of (start, end, fraction) tuples, 0-based half-open coordinates
+    """
+
+    for starts, ends, fractions in get_window_fraction_blocks(sequence, bases, options):
+        yield from zip(starts.tolist(), ends.tolist(), fractions.tolist())
+
+
+def write_bedgraph(records, output_file, bases, options):
+    """
+    Write the windowed content of every record as bedGraph lines, formatting
+    at most _WINDOWS_PER_WRITE lines at a time
+    :param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    :param output_file: Open filehandle to write the track to
+    :param bases: Bases to count, e.g. "GC"
+    :param options: WindowOptions
+    :return: Number of windows written
+    """
+
+    num_windows = 0
+    for header, sequence in records:
+        # bedGraph chromosome names are the first word of the header
+        chrom = (header.split() or [header])[0]
+        for starts, ends, fractions in get_window_fraction_blocks(sequence, bases, options):
+            percentages = fractions * 100
+            for first in range(0, len(starts), _WINDOWS_PER_WRITE):
+                last = first + _WINDOWS_PER_WRITE
+                output_file.writelines([f"{chrom}\t{start}\t{end}\t{percentage:.2f}\n" for start, end, percentage in
+                                        zip(starts[first:last].tolist(), ends[first:last].tolist(),
+                                            percentages[first:last].tolist())])
+            num_windows += len(starts)
+
+    return num_windows
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a FASTA file to write a sliding-window GC content bedGraph")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
+    parser.add_argument("-w", "--window", default=1000, type=int, help="Window width in bases (default: 1000)")
+    parser.add_argument("-s", "--step", type=int, help="Distance between window starts (default: the window width)")
+    parser.add_argument("-b", "--bases", default="GC", type=str,
+                        help="Bases whose percentage is reported (default: GC)")
+    parser.add_argument("--ignore-case", action="store_true",
+                        help="Also count lowercase (soft-masked) bases")
+    parser.add_argument("--exclude-n", action="store_true",
+                        help="Leave N bases out of the window size and skip windows made only of N")
+    args = parser.parse_args()
+    if args.step is None:
+        args.step = args.window
+    if args.window < 1 or args.step < 1:
+        parser.error("--window and --step must be at least 1")
+    if not args.bases.isascii() or not args.bases.isalpha():
+        parser.error("--bases must be letters, e.g. GC")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    outfile = get_filehandle(args.outfile, "w")
+    with outfile:
+        write_bedgraph(read_fasta_file(args.infile), outfile, args.bases,
+                       WindowOptions(args.window, args.step, args.ignore_case, args.exclude_n))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+File: kmer_counter.py
+This program counts the k-mers (k up to 31) of the sequences in a FASTA file
+and reports the k-mer count histogram and the most frequent k-mers.
+
+Bases are packed two bits each (A=0, C=1, G=2, T=3) into 64-bit integers.
+The codes of all k-mers of a chunk are built together by shifting and
+or-ing NumPy arrays of shorter windows, never by slicing substrings, and
+the reverse complement codes are derived from the forward codes, so
+canonical k-mers cost a few more array passes. This window doubling is used
+on purpose in place of a rolling hash: a rolling update carries each code
+into the next, which is a sequential loop in Python, while doubling needs
+only O(log k) whole-array NumPy passes. Windows containing N (or
+any other non-ACGT byte) are skipped. Count tables are sorted (k-mer,
+count) arrays, so tables from different chunks or processes merge by
+concatenation.
+
+Sample command for executing the program:
+
+python3 kmer_counter.py [-h] -i input_file.fasta -o histogram.txt [-k 21] [--top 10] [-w 4]
+OR
+python3 kmer_counter.py --infile input_file.fasta --outfile histogram.txt --top-outfile top.txt
+"""
+import argparse
+import itertools
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compressed_io import get_compression
+from fasta_io import find_record_boundaries, read_fasta_file, read_fasta_range
+from twobit import is_twobit
+
+MAX_K = 31
+
+# Bases packed per chunk, the k-mer arrays of a chunk take a few MB each
+_CHUNK_SIZE = 1 << 20
+
+# Pending chunk tables are merged once they hold this many entries, or as
+# many as the merged table when it is bigger, so merges stay amortised
+_MERGE_THRESHOLD = 1 << 23
+
+# Byte ranges handed out per worker, as in nt_fasta_stats.py
+_SHARDS_PER_WORKER = 4
+
+# 2-bit code of every byte value, 4 marks a byte that is not A, C, G or T
+_BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _code, _bases in enumerate([b"Aa", b"Cc", b"Gg", b"Tt"]):
+    _BASE_CODES[np.frombuffer(_bases, dtype=np.uint8)] = _code
+
+# Every byte value with the order of its four 2-bit bases reversed
+_REVERSE_BYTE_BASES = np.array([(value & 3) << 6 | (value >> 2 & 3) << 4 | (value >> 4 & 3) << 2 | value >> 6
+                                for value in range(256)], dtype=np.uint8)
+
+KmerTable = namedtuple("KmerTable", ["kmers", "counts"])
+
+
+def _pack_windows(codes, k):
+    """
+    Pack every window of k 2-bit codes into one integer. Codes of windows of
+    1, 2, 4, 8... bases are built by doubling, and the windows of length k
+    are put together from the powers of two that add up to k, so the whole
+    array takes O(log k) passes instead of k. This replaces a rolling hash on
+    purpose, as a rolling update depends on the previous window and cannot be
+    done as whole-array passes.
+    :param codes: NumPy uint64 array of 2-bit codes
+    :param k: Window length, at most len(codes)
+    :return: NumPy uint64 array of len(codes) - k + 1 packed windows
+    """
+
+    packed = None
+    packed_length = 0
+    power = codes
+    power_length = 1
+    while True:
+        if k & power_length:
+            if packed is None:
+                packed = power
+            else:
+                num_windows = len(power) - packed_length
+                packed = (packed[:num_windows] << np.uint64(2 * power_length)) | power[packed_length:]
+            packed_length += power_length
+        if packed_length == k:
+            return packed
+        num_windows = len(power) - power_length
+        power = (power[:num_windows] << np.uint64(2 * power_length)) | power[power_length:]
+        power_length *= 2
+
+
+def _reverse_complement_codes(kmers, k):
+    """
+    Reverse complement of packed k-mers, computed from the packed codes
+    :param kmers: NumPy uint64 array of packed k-mers
+    :param k: k-mer length
+    :return: NumPy uint64 array
+    """
+
+    # Complementing is 3 - code, i.e. flipping both bits of every base
+    complement = kmers ^ np.uint64((1 << 2 * k) - 1)
+    # Reverse the bases inside each byte, then the bytes, then drop the
+    # unused high bases that are now at the bottom
+    reverse = _REVERSE_BYTE_BASES[complement.view(np.uint8)].view(np.uint64).byteswap()
+    if sys.byteorder == "big":
+        reverse = reverse.byteswap()
+    return reverse >> np.uint64(64 - 2 * k)
+
+
+def get_kmer_codes(sequence, k, canonical=True):
+    """
+    Packed codes of every k-mer of a sequence that has no N in it
+    :param sequence: str or bytes-like sequence
+    :param k: k-mer length, 1 to MAX_K
+    :param canonical: Return the smaller of each k-mer and its reverse complement
+    :return: NumPy uint64 array of k-mer codes, in sequence order
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    codes = _BASE_CODES[np.frombuffer(sequence, dtype=np.uint8)]
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.uint64)
+
+    kmers = _pack_windows((codes & 3).astype(np.uint64), k)
+
+    # A window is valid when the prefix sums show no invalid byte inside it
+    invalid = np.zeros(len(codes) + 1, dtype=np.int32)
+    np.cumsum(codes == 4, out=invalid[1:])
+    kmers = kmers[invalid[k:] == invalid[:-k]]
+
+    if canonical:
+        np.minimum(kmers, _reverse_complement_codes(kmers, k), out=kmers)
+    return kmers
+
+
+def count_kmer_codes(kmers):
+    """
+    Count table of an array of k-mer codes
+    :param kmers: NumPy uint64 array from get_kmer_codes()
+    :return: KmerTable with sorted unique k-mers
+    """
+
+    unique_kmers, counts = np.unique(kmers, return_counts=True)
+    return KmerTable(unique_kmers, counts.astype(np.int64))
+
+
+def merge_count_tables(tables):
+    """
+    Merge count tables, adding the counts of k-mers found in several of them
+    :param tables: Iterable of KmerTable
+    :return: KmerTable with sorted unique k-mers
+    """
+
+    tables = [table for table in tables if len(table.kmers)]
+    if not tables:
+        return KmerTable(np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64))
+    if len(tables) == 1:
+        return tables[0]
+
+    kmers = np.concatenate([table.kmers for table in tables])
+    counts = np.concatenate([table.counts for table in tables])
+    order = np.argsort(kmers, kind="stable")
+    kmers = kmers[order]
+    counts = counts[order]
+
+    # Sum the counts of each run of equal k-mers
+    run_starts = np.flatnonzero(np.concatenate(([True], kmers[1:] != kmers[:-1])))
+    return KmerTable(kmers[run_starts], np.add.reduceat(counts, run_starts))
+
+
+def _iter_chunks(records, k):
+    """
+    Group the sequences of FASTA records into chunks of about _CHUNK_SIZE
+    bases. Short records are joined with a newline, which is not a base, so
+    no k-mer spans two records; long records are cut into chunks that
+    overlap by k - 1 bases so every k-mer is in exactly one chunk.
+    :param records: Iterable of (header, sequence) tuples
+    :param k: k-mer length
+    :return: generator of bytes-like chunks
+    """
+
+    batch = []
+    batch_size = 0
+    for _, sequence in records:
+        if isinstance(sequence, str):
+            sequence = sequence.encode("latin-1", errors="replace")
+
+        if len(sequence) <= _CHUNK_SIZE:
+            batch.append(sequence)
+            batch_size += len(sequence) + 1
+            if batch_size >= _CHUNK_SIZE:
+                yield b"\n".join(batch)
+                batch = []
+                batch_size = 0
+            continue
+
+        for start in range(0, len(sequence) - k + 1, _CHUNK_SIZE):
+            yield sequence[start:start + _CHUNK_SIZE + k - 1]
+
+    if batch:
+        yield b"\n".join(batch)
+
+
+def count_kmers(records, k, canonical=True):
+    """
+    Count the k-mers of FASTA records, a chunk of bases at a time. k-mers
+    never span two records.
+    :param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    :param k: k-mer length, 1 to MAX_K
+    :param canonical: Count each k-mer together with its reverse complement
+    :return: KmerTable
+    """
+
+    merged = merge_count_tables([])
+    pending = []
+    num_pending = 0
+    for chunk in _iter_chunks(records, k):
+        table = count_kmer_codes(get_kmer_codes(chunk, k, canonical))
+        pending.append(table)
+        num_pending += len(table.kmers)
+        if num_pending >= max(_MERGE_THRESHOLD, len(merged.kmers)):
+            merged = merge_count_tables([merged] + pending)
+            pending = []
+            num_pending = 0
+
+    return merge_count_tables([merged] + pending)
+
+
+def count_kmers_sharded(file_name, k, num_workers, canonical=True):
+    """
+    Count the k-mers of an uncompressed FASTA file in a process pool. The file
+    is split into byte ranges at record boundaries and the tables of the
+    ranges are merged.
+    :param file_name: Path to an uncompressed FASTA file
+    :param k: k-mer length, 1 to MAX_K
+    :param num_workers: Number of worker processes
+    :param canonical: Count each k-mer together with its reverse complement
+    :return: KmerTable
+    """
+
+    shards = find_record_boundaries(file_name, num_workers * _SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        tables = executor.map(_count_shard_kmers, itertools.repeat(file_name), *zip(*shards),
+                              itertools.repeat(k), itertools.repeat(canonical))
+        return merge_count_tables(tables)
+
+
+def _count_shard_kmers(file_name, start, end, k, canonical):
+    """
+    Worker function: count table of the records of one byte range
+    :param file_name: Path to an uncompressed FASTA file
+    :param start: First byte of the range
+    :param end: Byte offset where the next range starts
+    :param k: k-mer length
+    :param canonical: Count each k-mer together with its reverse complement
+    :return: KmerTable
+    """
+
+    return count_kmers(read_fasta_range(file_name, start, end), k, canonical)
+
+
+def decode_kmer(code, k):
+    """
+    Turn a packed k-mer code back into bases
+    :param code: Packed k-mer code
+    :param k: k-mer length
+    :return: k-mer as a str
+    """
+
+    code = int(code)
+    return "".join("ACGT"[(code >> 2 * (k - 1 - i)) & 3] for i in range(k))
+
+
+def get_count_histogram(table):
+    """
+    Number of distinct k-mers seen each number of times
+    :param table: KmerTable
+    :return: list of (count, number of distinct k-mers) tuples, by increasing count
+    """
+
+    counts, num_kmers = np.unique(table.counts, return_counts=True)
+    return list(zip(counts.tolist(), num_kmers.tolist()))
+
+
+def get_top_kmers(table, k, num_top):
+    """
+    The most frequent k-mers, ties broken by k-mer order
+    :param table: KmerTable
+    :param k: k-mer length
+    :param num_top: Number of k-mers to return
+    :return: list of (k-mer, count) tuples, most frequent first
+    """
+
+    num_top = min(num_top, len(table.counts))
+    if num_top <= 0:
+        return []
+
+    # Only sort the candidates at or above the n-th largest count
+    threshold = np.partition(table.counts, len(table.counts) - num_top)[len(table.counts) - num_top]
+    candidates = np.flatnonzero(table.counts >= threshold)
+    order = candidates[np.lexsort((table.kmers[candidates], -table.counts[candidates]))][:num_top]
+    return [(decode_kmer(table.kmers[i], k), int(table.counts[i])) for i in order]
+
+
+def write_histogram(histogram, output_file):
+    """
+    Write the k-mer count histogram table
+    :param histogram: Rows from get_count_histogram()
+    :param output_file: Open filehandle to write the table to
+    :return: None
+    """
+
+    print("Count\tKmers", file=output_file)
+    for count, num_kmers in histogram:
+        print(f"{count}\t{num_kmers}", file=output_file)
+
+
+def write_top_kmers(top_kmers, output_file):
+    """
+    Write the most frequent k-mers table
+    :param top_kmers: Rows from get_top_kmers()
+    :param output_file: Open filehandle to write the table to
+    :return: None
+    """
+
+    print("Rank\tKmer\tCount", file=output_file)
+    for rank, (kmer, count) in enumerate(top_kmers, start=1):
+        print(f"{rank}\t{kmer}\t{count}", file=output_file)
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a FASTA file to count its k-mers")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to write the count histogram")
+    parser.add_argument("-k", "--kmer-size", default=21, type=int, help=f"k-mer length, 1 to {MAX_K} (default: 21)")
+    parser.add_argument("--top", default=10, type=int, help="Number of most frequent k-mers to report (default: 10)")
+    parser.add_argument("--top-outfile", type=str, help="Path to write the most frequent k-mers (default: stdout)")
+    parser.add_argument("--forward-only", action="store_true",
+                        help="Count k-mers as read instead of canonical k-mers")
+    parser.add_argument("-w", "--workers", default=1, type=int,
+                        help="Number of processes to split the input across (default: 1)")
+    args = parser.parse_args()
+    if not 1 <= args.kmer_size <= MAX_K:
+        parser.error(f"--kmer-size must be between 1 and {MAX_K}")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+def _open_output(file_name):
+    """
+    Open an output file, exiting with the error message if it cannot be opened
+    :param file_name: Path to the file
+    :return: filehandle
+    """
+
+    try:
+        return open(file_name, "w", encoding="utf-8")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+    canonical = not args.forward_only
+
+    try:
+        compressed = is_twobit(args.infile) or get_compression(args.infile) is not None
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    if args.workers > 1 and not compressed:
+        table = count_kmers_sharded(args.infile, args.kmer_size, args.workers, canonical)
+    else:
+        if args.workers > 1:
+            sys.stderr.write("Compressed or .2bit input cannot be sharded, using a single process\n")
+        table = count_kmers(read_fasta_file(args.infile), args.kmer_size, canonical)
+
+    with _open_output(args.outfile) as outfile:
+        write_histogram(get_count_histogram(table), outfile)
+
+    top_kmers = get_top_kmers(table, args.kmer_size, args.top)
+    if args.top_outfile:
+        with _open_output(args.top_outfile) as outfile:
+            write_top_kmers(top_kmers, outfile)
+    else:
+        write_top_kmers(top_kmers, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+File: nt_composition.py
+Single-pass nucleotide composition engine for the FASTA tools.
+
+A sequence is viewed as a NumPy byte array and every byte value is counted
+with one histogram, so A/G/C/T/N (and everything else) come out of a single
+scan instead of one str.count() call per nucleotide.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Bytes are counted in blocks, np.bincount() widens its input to intp and a
+# small block keeps that temporary array inside the CPU cache
+_CHUNK_SIZE = 1 << 16
+
+NtComposition = namedtuple("NtComposition", ["a", "g", "c", "t", "n", "other", "length"])
+
+
+def get_byte_histogram(sequence):
+    """
+    Count every byte value of a sequence in one pass
+    :param sequence: str or bytes-like sequence (bytes, bytearray, memoryview)
+    :return: NumPy int64 array of 256 counts, indexed by byte value
+    """
+
+    if isinstance(sequence, str):
+        # latin-1 maps every character to exactly one byte
+        sequence = sequence.encode("latin-1", errors="replace")
+
+    seq_array = np.frombuffer(sequence, dtype=np.uint8)
+    histogram = np.zeros(256, dtype=np.int64)
+    for start in range(0, len(seq_array), _CHUNK_SIZE):
+        histogram += np.bincount(seq_array[start:start + _CHUNK_SIZE], minlength=256)
+
+    return histogram
+
+
+def composition_from_histogram(histogram):
+    """
+    Turn a byte histogram into nucleotide counts. Counts are case-sensitive,
+    lowercase (soft-masked) bases fall into the "other" bucket like any
+    other unexpected character.
+    :param histogram: Array of 256 counts from get_byte_histogram()
+    :return: NtComposition
+    """
+
+    a_nt_count = int(histogram[ord('A')])
+    g_nt_count = int(histogram[ord('G')])
+    c_nt_count = int(histogram[ord('C')])
+    t_nt_count = int(histogram[ord('T')])
+    n_nt_count = int(histogram[ord('N')])
+    length = int(histogram.sum())
+    other = length - a_nt_count - g_nt_count - c_nt_count - t_nt_count - n_nt_count
+
+    return NtComposition(a_nt_count, g_nt_count, c_nt_count, t_nt_count, n_nt_count, other, length)
+
+
+def get_nt_composition(sequence):
+    """
+    Compute the nucleotide composition of a sequence in a single pass
+    :param sequence: str or bytes-like sequence
+    :return: NtComposition
+    """
+
+    return composition_from_histogram(get_byte_histogram(sequence))
+
+
+def get_gc_percentage(composition):
+    """
+    GC content of a composition, same definition as calculate_gc_content()
+    in nt_fasta_stats.py: (G + C) / length * 100
+    :param composition: NtComposition
+    :return: GC percentage as a float, 0 for an empty sequence
+    """
+
+    if composition.length > 0:
+        return (composition.g + composition.c) / composition.length * 100
+    return 0
@@ -9,19 +9,47 @@ OR
 python3 secondary_structure_splitter.py [--help] --infile input_file.fasta -outfile output_file.txt
 """
 import argparse
+import itertools
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from approximate_stats import get_estimates, sample_offsets, sample_stream, sample_twobit, write_estimates
+from compressed_io import get_compression, open_text
+from fasta_index import get_fasta_index
+from fasta_io import find_record_boundaries, read_fasta_mmap, read_fasta_range, read_fasta_records
+from fasta_profile import add_profile_arguments, get_profiler
+from fastq_io import open_fastq, read_fastq_batches
+from fastq_stats import PHRED_OFFSETS, get_batch_stats, get_empty_stats, merge_fastq_stats, write_fastq_report
+from nt_composition import get_gc_percentage, get_nt_composition
+from stats_cache import get_cache_key, load_cached_rows, store_cached_rows
+from stats_formats import OUTPUT_FORMATS, write_stats_npy, write_stats_parquet
+from twobit import get_twobit_lengths, is_twobit, read_twobit_records
+
+# Part of the result cache key, bump it whenever the table contents change
+__version__ = "1.1.0"
+
+# Byte ranges handed out per worker in --workers mode, so a few very long
+# records do not leave the other workers idle
+_SHARDS_PER_WORKER = 4
 
 
 def get_filehandle(file_name, mode):
     """
-
-    :param file_name:
-    :param mode:
-    :return:
+    Open a file, exiting with the error message if it cannot be opened.
+    Text files opened for reading may be gzip or BGZF compressed, the
+    compression is detected from the file's magic bytes.
+    :param file_name: Path to the file
+    :param mode: Mode to open the file with, text modes use UTF-8
+    :return: filehandle
     """
 
     try:
-        fh_in = open(file_name, mode, encoding="utf-8")
+        if mode == "r":
+            return open_text(file_name)
+        encoding = None if "b" in mode else "utf-8"
+        fh_in = open(file_name, mode, encoding=encoding)
         return fh_in
     except OSError as e:
         print(e)
@@ -33,31 +61,21 @@ def get_filehandle(file_name, mode):
 
 def get_fasta_lists(fh_in):
     """
-
-    :param fh_in:
-    :return:
+    Collect every record of a FASTA file into a header list and a sequence list.
+    Kept for callers that need random access to all records; the command line
+    tool streams records instead.
+    :param fh_in: Iterable of text lines in FASTA format
+    :return: (header_list, sequence_list)
     """
 
     # Initializing variables
     header_list = []
     sequence_list = []
-    current_sequence = ""
-
-    for line in fh_in:
-        line = line.strip()  # Remove leading/trailing whitespaces
-        if not line:
-            continue  # Skip empty lines
-
-        if line[0] == ">":
-            header_list.append(line[1:])  # Remove the ">" character
-            if current_sequence:
-                sequence_list.append(current_sequence)
-            current_sequence = ""
-        else:
-            current_sequence += line
 
-    if current_sequence:
-        sequence_list.append(current_sequence)
+    for header, sequence in read_fasta_records(fh_in):
+        header_list.append(header)
+        if sequence:
+            sequence_list.append(sequence)
 
     _verify_lists(header_list, sequence_list)
 
@@ -125,26 +143,62 @@ def calculate_gc_content(sequence):
 # Function to output results to the specified file
 def output_results_to_files(header_list, sequence_list, output_file):
     """
+    Write the nucleotide statistics table for parallel header/sequence lists
+    :param header_list: List of FASTA headers
+    :param sequence_list: List of sequences matching header_list
+    :param output_file: Open filehandle to write the table to
+    :return: None
+    """
 
-    :param header_list:
-    :param sequence_list:
-    :param output_file:
-    :return:
+    output_records_to_file(zip(header_list, sequence_list), output_file)
+
+
+def output_records_to_file(records, output_file):
+    """
+    Write the nucleotide statistics table, one row per record as it arrives
+    :param records: Iterable of (header, sequence) tuples, e.g. read_fasta_records()
+    :param output_file: Open filehandle to write the table to
+    :return: Number of records written
+    """
+
+    return write_stats_table((get_record_stats(header, sequence) for header, sequence in records),
+                             output_file)
+
+
+def get_record_stats(header, sequence):
+    """
+    Compute one row of the statistics table with a single scan of the sequence
+    :param header: FASTA header without the ">"
+    :param sequence: str or bytes-like sequence
+    :return: (accession, A's, G's, C's, T's, N's, length, GC%)
+    """
+
+    composition = get_nt_composition(sequence)
+
+    return (_get_ncbi_accession(header),
+            composition.a,
+            composition.g,
+            composition.c,
+            composition.t,
+            composition.n,
+            composition.length,
+            get_gc_percentage(composition))
+
+
+def write_stats_table(stats_rows, output_file):
+    """
+    Write the table header and one numbered line per statistics row
+    :param stats_rows: Iterable of rows from get_record_stats()
+    :param output_file: Open filehandle to write the table to
+    :return: Number of rows written
     """
 
     print("Number\tAccession\tA's\tG's\tC's\tT's\tN's\tLength\tGC%", file=output_file)
 
-    for i, (header, sequence) in enumerate(zip(header_list, sequence_list), start=1):
-        accession = _get_ncbi_accession(header)
-        a_nt_count = _get_num_nucleotides('A', sequence)
-        g_nt_count = _get_num_nucleotides('G', sequence)
-        c_nt_count = _get_num_nucleotides('C', sequence)
-        t_nt_count = _get_num_nucleotides('T', sequence)
-        n_nt_count = _get_num_nucleotides('N', sequence)
-        sequence_length = len(sequence)
-        gc_percentage = calculate_gc_content(sequence)
-
-        print(f"{i}"
+    num_rows = 0
+    for num_rows, (accession, a_nt_count, g_nt_count, c_nt_count, t_nt_count, n_nt_count,
+                   sequence_length, gc_percentage) in enumerate(stats_rows, start=1):
+        print(f"{num_rows}"
               f"\t{accession}"
               f"\t{a_nt_count}"
               f"\t{g_nt_count}"
@@ -155,6 +209,78 @@ def output_results_to_files(header_list, sequence_list, output_file):
               f"\t{gc_percentage:.1f}",
               file=output_file)
 
+    return num_rows
+
+
+def get_record_lengths(file_name, records):
+    """
+    Accession and length of every record. Lengths come straight from the .fai
+    index when one is present, or from the record headers of a .2bit file, so
+    no sequence bytes are read; otherwise the records are consumed to measure them.
+    :param file_name: Path to the FASTA file, used to find its .fai index
+    :param records: Iterable of (header, sequence) tuples, only used without an index
+    :return: generator of (accession, length) tuples, in file order
+    """
+
+    if is_twobit(file_name):
+        yield from get_twobit_lengths(file_name)
+        return
+
+    index = get_fasta_index(file_name)
+    if index is not None:
+        for entry in index.values():
+            yield entry.name, entry.length
+    else:
+        for header, sequence in records:
+            yield _get_ncbi_accession(header), len(sequence)
+
+
+def write_lengths_table(length_rows, output_file):
+    """
+    Write the table header and one numbered line per (accession, length) row
+    :param length_rows: Iterable of rows from get_record_lengths()
+    :param output_file: Open filehandle to write the table to
+    :return: Number of rows written
+    """
+
+    print("Number\tAccession\tLength", file=output_file)
+
+    num_rows = 0
+    for num_rows, (accession, sequence_length) in enumerate(length_rows, start=1):
+        print(f"{num_rows}\t{accession}\t{sequence_length}", file=output_file)
+
+    return num_rows
+
+
+def get_sharded_stats(file_name, num_workers):
+    """
+    Compute the statistics rows of a FASTA file in a process pool. The file is
+    split into byte ranges at record boundaries, a few per worker to balance
+    uneven record sizes, and the rows come back in original record order.
+    :param file_name: Path to an uncompressed FASTA file
+    :param num_workers: Number of worker processes
+    :return: generator of rows from get_record_stats(), in file order
+    """
+
+    shards = find_record_boundaries(file_name, num_workers * _SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        shard_rows = executor.map(_get_shard_stats, itertools.repeat(file_name), *zip(*shards))
+        for rows in shard_rows:
+            yield from rows
+
+
+def _get_shard_stats(file_name, start, end):
+    """
+    Worker function: statistics rows for the records of one byte range
+    :param file_name: Path to an uncompressed FASTA file
+    :param start: First byte of the range
+    :param end: Byte offset where the next range starts
+    :return: list of rows from get_record_stats()
+    """
+
+    return [get_record_stats(header, sequence)
+            for header, sequence in read_fasta_range(file_name, start, end)]
+
 
 def get_cli_args():
     """
@@ -167,7 +293,157 @@ def get_cli_args():
         description="Provide a FASTA file to generate nucleotide statistics")
     parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
     parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
-    return parser.parse_args()
+    parser.add_argument("-w", "--workers", default=1, type=int,
+                        help="Number of processes to split the input across (default: 1)")
+    parser.add_argument("--lengths-only", action="store_true",
+                        help="Only report record lengths, read from the .fai index when present")
+    parser.add_argument("--cache-dir", type=str,
+                        help="Directory of the result cache, reruns on an unchanged input are read from it")
+    parser.add_argument("--cache-hash", default="stat", choices=["stat", "content"],
+                        help="Identify inputs by path, size and mtime (stat) or by a hash of their bytes")
+    parser.add_argument("--cache-size-mb", default=1024, type=int,
+                        help="Maximum size of the result cache before old entries are evicted (default: 1024)")
+    parser.add_argument("-f", "--format", default="tsv", choices=OUTPUT_FORMATS,
+                        help="Output format: tsv table, npy directory of memory-mappable columns, "
+                             "or parquet (needs pyarrow) (default: tsv)")
+    parser.add_argument("--fastq", action="store_true",
+                        help="Input is FASTQ (plain, gzip or BGZF): report base composition, GC, "
+                             "the length distribution and mean Phred quality per cycle and per read")
+    parser.add_argument("--phred-offset", default=33, type=int, choices=PHRED_OFFSETS,
+                        help="ASCII offset of FASTQ quality scores (default: 33)")
+    parser.add_argument("--approximate", action="store_true",
+                        help="Estimate composition, GC and the length distribution with confidence intervals "
+                             "from a sample of the input instead of reading all of it")
+    parser.add_argument("--sample-size", default=10000, type=int,
+                        help="Byte offsets (plain files) or records (compressed files) sampled by "
+                             "--approximate (default: 10000)")
+    parser.add_argument("--seed", type=int, help="Random seed of --approximate, for repeatable estimates")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.lengths_only and args.format != "tsv":
+        parser.error("--lengths-only only writes the tsv format")
+    if args.fastq and (args.lengths_only or args.cache_dir or args.format != "tsv"):
+        parser.error("--fastq writes its own tsv report, without --lengths-only, --cache-dir or --format")
+    if args.approximate and (args.fastq or args.lengths_only or args.cache_dir or args.format != "tsv"):
+        parser.error("--approximate writes its own tsv report, without --fastq, --lengths-only, --cache-dir "
+                     "or --format")
+    if args.sample_size < 1:
+        parser.error("--sample-size must be at least 1")
+    return args
+
+
+def write_stats(stats_rows, out_file, output_format):
+    """
+    Write statistics rows in the requested output format
+    :param stats_rows: Iterable of rows from get_record_stats()
+    :param out_file: Path of the table, or of the .npy column directory
+    :param output_format: "tsv", "npy" or "parquet"
+    :return: Number of rows written
+    """
+
+    if output_format == "npy":
+        return write_stats_npy(stats_rows, out_file)
+    if output_format == "parquet":
+        return write_stats_parquet(stats_rows, out_file)
+
+    outfile = get_filehandle(out_file, "w")
+    num_rows = write_stats_table(stats_rows, outfile)
+    outfile.close()
+    return num_rows
+
+
+def _get_stats_rows(args, records, compressed):
+    """
+    Statistics rows for the input, sharded across processes when requested
+    :param args: Parsed command line arguments
+    :param records: Iterable of (header, sequence) tuples of the input
+    :param compressed: True when the input is gzip/BGZF compressed or .2bit
+    :return: iterable of rows from get_record_stats(), in file order
+    """
+
+    if args.workers > 1 and not compressed:
+        # Shard the input at record boundaries and merge rows in record order
+        return get_sharded_stats(args.infile, args.workers)
+
+    if args.workers > 1:
+        sys.stderr.write("Compressed input cannot be sharded, using a single process\n")
+    # Stream records from the memory map or decompressor
+    return (get_record_stats(header, sequence) for header, sequence in records)
+
+
+def get_cached_stats(args, records, compressed):
+    """
+    Statistics rows from the result cache, computed and stored on a miss
+    :param args: Parsed command line arguments
+    :param records: Iterable of (header, sequence) tuples of the input
+    :param compressed: True when the input is gzip/BGZF compressed or .2bit
+    :return: list of rows from get_record_stats(), in file order
+    """
+
+    key = get_cache_key(args.infile, __version__, args.cache_hash == "content")
+    stats_rows = load_cached_rows(args.cache_dir, key)
+    if stats_rows is None:
+        stats_rows = list(_get_stats_rows(args, records, compressed))
+        store_cached_rows(args.cache_dir, key, stats_rows, args.cache_size_mb * 1024 * 1024)
+    return stats_rows
+
+
+def write_fastq_stats(args, profiler):
+    """
+    Write the FASTQ report of --fastq, reading the reads a batch at a time
+    :param args: Parsed command line arguments
+    :param profiler: StageProfiler from get_profiler()
+    :return: Number of reads reported
+    """
+
+    if args.workers > 1:
+        sys.stderr.write("FASTQ input is read by a single process\n")
+
+    fh_in = open_fastq(args.infile)
+    stats = get_empty_stats()
+    with fh_in:
+        for batch in profiler.wrap("parse", read_fastq_batches(fh_in)):
+            with profiler.stage("compute"):
+                stats = merge_fastq_stats(stats, get_batch_stats(batch, args.phred_offset))
+            profiler.add_records("compute", len(batch.names))
+
+    outfile = get_filehandle(args.outfile, "w")
+    with profiler.stage("write"):
+        num_reads = write_fastq_report(stats, outfile)
+    outfile.close()
+    return num_reads
+
+
+def write_approximate_stats(args, infile, compressed, twobit):
+    """
+    Write the --approximate estimates. Plain files are sampled at random byte
+    offsets without reading the rest, .2bit files at random base positions
+    through their index; gzip/BGZF files, which cannot be entered at an
+    offset, are reservoir sampled record by record.
+    :param args: Parsed command line arguments
+    :param infile: Filehandle of the input
+    :param compressed: True when the input is gzip/BGZF compressed or .2bit
+    :param twobit: True when the input is .2bit
+    :return: Number of estimates written
+    """
+
+    rng = np.random.default_rng(args.seed)
+    if twobit:
+        sample = sample_twobit(args.infile, args.sample_size, rng)
+        sampling = "base positions"
+    elif compressed:
+        sample = sample_stream(infile.buffer, args.sample_size, rng)
+        sampling = "records"
+    else:
+        sample = sample_offsets(infile.buffer, args.sample_size, rng)
+        sampling = "byte offsets"
+
+    outfile = get_filehandle(args.outfile, "w")
+    num_estimates = write_estimates(get_estimates(sample, rng), len(sample.base_counts), sampling, 0.95, outfile)
+    outfile.close()
+    return num_estimates
 
 
 def main():
@@ -175,19 +451,60 @@ def main():
 
     args = get_cli_args()
 
+    # Time the parse, compute and write stages when --profile is given
+    profiler = get_profiler(args, "nt_fasta_stats", args.infile)
+    profiler.start()
+
+    if args.fastq:
+        # Reads are summarised batch by batch, there is no per-record table
+        num_reads = write_fastq_stats(args, profiler)
+        profiler.add_records("write", num_reads)
+        profiler.stop()
+        profiler.write_summary(args.profile_json)
+        return
+
     # Using get_filehandle() for one input file and one output file
     infile = get_filehandle(args.infile, "r")
-    outfile = get_filehandle(args.outfile, "w")
-
-    # Get the two lists of data from the input FASTA file
-    header_list, sequence_list = get_fasta_lists(infile)
 
-    # Print out results and get some output variables
-    output_results_to_files(header_list, sequence_list, outfile)
+    # Plain files are memory-mapped, gzip/BGZF input is decompressed as a
+    # stream and .2bit records are unpacked from a quarter of the bytes
+    twobit = is_twobit(args.infile)
+    compressed = twobit or get_compression(args.infile) is not None
+    if twobit:
+        records = read_twobit_records(args.infile)
+    else:
+        records = read_fasta_records(infile) if compressed else read_fasta_mmap(infile.buffer)
+    records = profiler.wrap("parse", records)
+
+    if args.approximate:
+        # A sample of the input, estimates rather than one row per record
+        with profiler.stage("compute"):
+            write_approximate_stats(args, infile, compressed, twobit)
+    elif args.lengths_only:
+        # Lengths come from the .fai index without reading any sequence
+        outfile = get_filehandle(args.outfile, "w")
+        with profiler.stage("write"):
+            num_rows = write_lengths_table(profiler.wrap("compute", get_record_lengths(args.infile, records)),
+                                           outfile)
+        outfile.close()
+        profiler.add_records("write", num_rows)
+    else:
+        if args.cache_dir:
+            # Reuse the rows of an earlier run on the same input when possible
+            with profiler.stage("compute"):
+                stats_rows = get_cached_stats(args, records, compressed)
+            profiler.add_records("compute", len(stats_rows))
+        else:
+            stats_rows = profiler.wrap("compute", _get_stats_rows(args, records, compressed))
+        with profiler.stage("write"):
+            num_rows = write_stats(stats_rows, args.outfile, args.format)
+        profiler.add_records("write", num_rows)
 
     # Closing files
     infile.close()
-    outfile.close()
+
+    profiler.stop()
+    profiler.write_summary(args.profile_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""
+File: orf_finder.py
+This program finds the open reading frames (ORFs) of the records of a
+nucleotide FASTA file in all six frames and writes them as BED.
+
+An ORF runs from the first start codon after an in-frame stop codon (or
+after the start of the frame) up to and including the next stop codon.
+Each frame is translated into a codon class string (start, stop or other)
+with the vectorized lookup of translate_frames.py, and ORFs are paired up
+with array searches over the stop and start positions instead of a Python
+loop over codons.
+
+Sample command for executing the program:
+
+python3 orf_finder.py [-h] -i genome.fasta -o orfs.bed [-m 75] [-t 11] [--alternative-starts] [-w 4]
+"""
+import argparse
+import itertools
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compressed_io import get_compression
+from fasta_io import find_record_boundaries, read_fasta_file, read_fasta_range
+from translate_frames import FRAMES, GENETIC_CODES, get_codon_table, translate_frames
+from twobit import is_twobit
+
+Orf = namedtuple("Orf", ["chrom", "start", "end", "strand", "frame", "length"])
+
+# Byte ranges handed out per worker, as in nt_fasta_stats.py
+_SHARDS_PER_WORKER = 4
+
+_STOP = ord("*")
+_START = ord("M")
+
+
+def get_orf_codon_table(table_id=1, alternative_starts=False):
+    """
+    Lookup table from base-5 codon index to codon class: "*" for a stop
+    codon, "M" for a start codon and "-" for anything else
+    :param table_id: NCBI genetic code number, a key of GENETIC_CODES
+    :param alternative_starts: Accept every start codon of the table, not only ATG
+    :return: NumPy uint8 array usable in place of get_codon_table()
+    """
+
+    amino_acids = get_codon_table(table_id)
+    classes = np.where(amino_acids == _STOP, _STOP, ord("-")).astype(np.uint8)
+    if alternative_starts:
+        starts = np.frombuffer(GENETIC_CODES[table_id].starts.encode("ascii"), dtype=np.uint8)
+        for tcag_index in np.flatnonzero(starts == _START):
+            first, second, third = tcag_index // 16, tcag_index // 4 % 4, tcag_index % 4
+            classes[first * 25 + second * 5 + third] = _START
+    else:
+        # ATG, with T=0 C=1 A=2 G=3
+        classes[2 * 25 + 0 * 5 + 3] = _START
+    return classes
+
+
+def get_frame_orfs(codon_classes, min_codons):
+    """
+    Pair every stop codon of a frame with the first start codon after the
+    previous stop codon
+    :param codon_classes: bytes of codon classes from get_orf_codon_table()
+    :param min_codons: Minimum ORF length in codons, stop codon included
+    :return: (first codon, last codon) NumPy arrays, last is the stop codon
+    """
+
+    classes = np.frombuffer(codon_classes, dtype=np.uint8)
+    stops = np.flatnonzero(classes == _STOP)
+    starts = np.flatnonzero(classes == _START)
+    if stops.size == 0 or starts.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    previous_stops = np.concatenate(([-1], stops[:-1]))
+    first_start = np.searchsorted(starts, previous_stops + 1)
+    has_start = first_start < len(starts)
+    orf_starts = starts[np.minimum(first_start, len(starts) - 1)]
+
+    keep = has_start & (orf_starts < stops) & (stops - orf_starts + 1 >= min_codons)
+    return orf_starts[keep], stops[keep]
+
+
+def find_orfs(chrom, sequence, orf_table, min_length):
+    """
+    Find the ORFs of one sequence in all six frames
+    :param chrom: Record name used as the BED chromosome
+    :param sequence: str or bytes-like sequence
+    :param orf_table: Lookup table from get_orf_codon_table()
+    :param min_length: Minimum ORF length in bases, stop codon included
+    :return: list of Orf, sorted by start then end coordinate
+    """
+
+    length = len(sequence)
+    min_codons = (min_length + 2) // 3
+    orfs = []
+    for frame, codon_classes in translate_frames(sequence, orf_table, FRAMES):
+        first_codons, last_codons = get_frame_orfs(codon_classes, min_codons)
+        offset = abs(frame) - 1
+        starts = offset + 3 * first_codons
+        ends = offset + 3 * (last_codons + 1)
+        if frame < 0:
+            # Coordinates on the reverse complement strand, flipped back
+            starts, ends = length - ends, length - starts
+        strand = "+" if frame > 0 else "-"
+        orfs.extend(Orf(chrom, start, end, strand, frame, end - start)
+                    for start, end in zip(starts.tolist(), ends.tolist()))
+
+    orfs.sort(key=lambda orf: (orf.start, orf.end))
+    return orfs
+
+
+def find_record_orfs(records, table_id=1, alternative_starts=False, min_length=75):
+    """
+    generator: find_record_orfs(records)
+    Find the ORFs of every record of a FASTA file
+    @param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    @param table_id: NCBI genetic code number
+    @param alternative_starts: Accept every start codon of the table, not only ATG
+    @param min_length: Minimum ORF length in bases, stop codon included
+    @return: generator of Orf, record by record
+    """
+
+    orf_table = get_orf_codon_table(table_id, alternative_starts)
+    for header, sequence in records:
+        yield from find_orfs((header.split() or [header])[0], sequence, orf_table, min_length)
+
+
+def find_orfs_sharded(file_name, num_workers, table_id=1, alternative_starts=False, min_length=75):
+    """
+    Find the ORFs of an uncompressed FASTA file in a process pool. The file is
+    split into byte ranges at record boundaries and the ORFs come back in
+    record order.
+    :param file_name: Path to an uncompressed FASTA file
+    :param num_workers: Number of worker processes
+    :param table_id: NCBI genetic code number
+    :param alternative_starts: Accept every start codon of the table, not only ATG
+    :param min_length: Minimum ORF length in bases, stop codon included
+    :return: generator of Orf, record by record
+    """
+
+    shards = find_record_boundaries(file_name, num_workers * _SHARDS_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        shard_orfs = executor.map(_find_shard_orfs, itertools.repeat(file_name), *zip(*shards),
+                                  itertools.repeat((table_id, alternative_starts, min_length)))
+        for orfs in shard_orfs:
+            yield from orfs
+
+
+def _find_shard_orfs(file_name, start, end, settings):
+    """
+    Worker function: ORFs of the records of one byte range
+    :param file_name: Path to an uncompressed FASTA file
+    :param start: First byte of the range
+    :param end: Byte offset where the next range starts
+    :param settings: (table_id, alternative_starts, min_length) as for find_record_orfs()
+    :return: list of Orf
+    """
+
+    return list(find_record_orfs(read_fasta_range(file_name, start, end), *settings))
+
+
+def write_orfs_bed(orfs, output_file):
+    """
+    Write ORFs as BED6 plus frame and length columns, numbered within each record
+    :param orfs: Iterable of Orf, grouped by record
+    :param output_file: Open filehandle to write the BED lines to
+    :return: Number of ORFs written
+    """
+
+    num_orfs = 0
+    for _, chrom_orfs in itertools.groupby(orfs, key=lambda orf: orf.chrom):
+        for orf_num, orf in enumerate(chrom_orfs, start=1):
+            print(f"{orf.chrom}\t{orf.start}\t{orf.end}\t{orf.chrom}_ORF{orf_num}\t0\t{orf.strand}"
+                  f"\t{orf.frame:+d}\t{orf.length}",
+                  file=output_file)
+            num_orfs += 1
+    return num_orfs
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a nucleotide FASTA file to find its open reading frames")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to BED file to write")
+    parser.add_argument("-m", "--min-length", default=75, type=int,
+                        help="Minimum ORF length in bases, stop codon included (default: 75)")
+    parser.add_argument("-t", "--table", default=1, type=int, choices=sorted(GENETIC_CODES),
+                        help="NCBI genetic code table (default: 1, Standard)")
+    parser.add_argument("--alternative-starts", action="store_true",
+                        help="Accept every start codon of the genetic code (e.g. GTG, TTG), not only ATG")
+    parser.add_argument("-w", "--workers", default=1, type=int,
+                        help="Number of processes to split the input across (default: 1)")
+    args = parser.parse_args()
+    if args.min_length < 6:
+        parser.error("--min-length must be at least 6, a start and a stop codon")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        streamed = is_twobit(args.infile) or get_compression(args.infile) is not None
+        outfile = open(args.outfile, "w", encoding="utf-8")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    with outfile:
+        if args.workers > 1 and not streamed:
+            orfs = find_orfs_sharded(args.infile, args.workers, args.table, args.alternative_starts,
+                                     args.min_length)
+        else:
+            if args.workers > 1:
+                sys.stderr.write("Only plain FASTA input can be sharded, using a single process\n")
+            orfs = find_record_orfs(read_fasta_file(args.infile), args.table, args.alternative_starts,
+                                    args.min_length)
+        write_orfs_bed(orfs, outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+File: protein_mass.py
+This program computes the average and monoisotopic molecular weight of
+every protein in a FASTA file, e.g. the pdb_protein.fasta written by
+sec_structure_split.py.
+
+Each mass is the sum of the residue masses plus one water. Residue masses
+come from a 256-entry lookup table indexed by byte value, and proteins are
+processed in batches: the residue bytes of a batch are looked up at once
+and summed per protein with one weighted np.bincount() call, so there is
+no Python loop over residues or per-protein NumPy call.
+
+Sample command for executing the program:
+
+python3 protein_mass.py [-h] -i pdb_protein.fasta -o masses.txt
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from fasta_io import read_fasta_file
+
+# Residue masses in Daltons, (average, monoisotopic), i.e. amino acid minus water
+RESIDUE_MASSES = {
+    "A": (71.0788, 71.03711),
+    "R": (156.1875, 156.10111),
+    "N": (114.1038, 114.04293),
+    "D": (115.0886, 115.02694),
+    "C": (103.1388, 103.00919),
+    "E": (129.1155, 129.04259),
+    "Q": (128.1307, 128.05858),
+    "G": (57.0519, 57.02146),
+    "H": (137.1411, 137.05891),
+    "I": (113.1594, 113.08406),
+    "L": (113.1594, 113.08406),
+    "K": (128.1741, 128.09496),
+    "M": (131.1926, 131.04049),
+    "F": (147.1766, 147.06841),
+    "P": (97.1167, 97.05276),
+    "S": (87.0782, 87.03203),
+    "T": (101.1051, 101.04768),
+    "W": (186.2132, 186.07931),
+    "Y": (163.1760, 163.06333),
+    "V": (99.1326, 99.06841),
+    "U": (150.0388, 150.95364),  # Selenocysteine
+    "O": (237.3018, 237.14773),  # Pyrrolysine
+}
+# Ambiguity codes weigh the mean of the residues they stand for
+RESIDUE_MASSES["B"] = tuple(np.mean([RESIDUE_MASSES["D"], RESIDUE_MASSES["N"]], axis=0))
+RESIDUE_MASSES["Z"] = tuple(np.mean([RESIDUE_MASSES["E"], RESIDUE_MASSES["Q"]], axis=0))
+RESIDUE_MASSES["J"] = RESIDUE_MASSES["L"]
+
+WATER_MASSES = (18.01524, 18.01056)
+
+# Residues of a batch processed together
+_BATCH_SIZE = 1 << 20
+
+
+def _get_mass_tables():
+    """
+    Per byte value lookup tables for the residue masses, in either case
+    :return: (average masses, monoisotopic masses, is residue, is unknown) NumPy arrays of 256 entries
+    """
+
+    average = np.zeros(256)
+    monoisotopic = np.zeros(256)
+    for residue, (average_mass, monoisotopic_mass) in RESIDUE_MASSES.items():
+        for byte in (ord(residue), ord(residue.lower())):
+            average[byte] = average_mass
+            monoisotopic[byte] = monoisotopic_mass
+
+    # Letters count towards the length; letters without a mass (X) are unknown
+    is_residue = np.zeros(256, dtype=bool)
+    is_residue[ord("A"):ord("Z") + 1] = True
+    is_residue[ord("a"):ord("z") + 1] = True
+    return average, monoisotopic, is_residue, is_residue & (average == 0)
+
+
+_AVERAGE, _MONOISOTOPIC, _IS_RESIDUE, _IS_UNKNOWN = _get_mass_tables()
+
+
+def get_batch_masses(sequences):
+    """
+    Length, masses and unknown residues of a batch of proteins. Stop codons
+    ("*"), gaps and other non-letters are ignored, unknown residues such as
+    X add no mass and are counted separately.
+    :param sequences: List of str or bytes-like protein sequences
+    :return: (lengths, average masses, monoisotopic masses, unknown counts) NumPy arrays
+    """
+
+    sequences = [sequence.encode("latin-1", errors="replace") if isinstance(sequence, str) else sequence
+                 for sequence in sequences]
+    residues = np.frombuffer(b"".join(sequences), dtype=np.uint8)
+    num_proteins = len(sequences)
+
+    # Protein number of every residue byte, the bins of the weighted counts
+    sizes = np.fromiter(map(len, sequences), dtype=np.int64, count=num_proteins)
+    protein_index = np.repeat(np.arange(num_proteins), sizes)
+    lengths = np.bincount(protein_index, weights=_IS_RESIDUE[residues], minlength=num_proteins).astype(np.int64)
+    unknown = np.bincount(protein_index, weights=_IS_UNKNOWN[residues], minlength=num_proteins).astype(np.int64)
+    average = np.bincount(protein_index, weights=_AVERAGE[residues], minlength=num_proteins)
+    monoisotopic = np.bincount(protein_index, weights=_MONOISOTOPIC[residues], minlength=num_proteins)
+
+    # One water per peptide chain, none for an empty sequence
+    has_residues = lengths > 0
+    average[has_residues] += WATER_MASSES[0]
+    monoisotopic[has_residues] += WATER_MASSES[1]
+    return lengths, average, monoisotopic, unknown
+
+
+def get_protein_masses(records):
+    """
+    generator: get_protein_masses(records)
+    Masses of every protein of a FASTA file, computed a batch at a time
+    @param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    @return: generator of (accession, length, average mass, monoisotopic mass, unknown residues) tuples
+    """
+
+    accessions = []
+    sequences = []
+    batch_size = 0
+    for header, sequence in records:
+        accessions.append((header.split() or [header])[0])
+        sequences.append(sequence)
+        batch_size += len(sequence)
+        if batch_size >= _BATCH_SIZE:
+            yield from zip(accessions, *(column.tolist() for column in get_batch_masses(sequences)))
+            accessions = []
+            sequences = []
+            batch_size = 0
+
+    if sequences:
+        yield from zip(accessions, *(column.tolist() for column in get_batch_masses(sequences)))
+
+
+def write_mass_table(mass_rows, output_file):
+    """
+    Write the table header and one numbered line per protein
+    :param mass_rows: Iterable of rows from get_protein_masses()
+    :param output_file: Open filehandle to write the table to
+    :return: Number of rows written
+    """
+
+    print("Number\tAccession\tLength\tAverage_Da\tMonoisotopic_Da\tUnknown", file=output_file)
+
+    num_rows = 0
+    for num_rows, (accession, length, average, monoisotopic, unknown) in enumerate(mass_rows, start=1):
+        output_file.write(f"{num_rows}\t{accession}\t{length}\t{average:.2f}\t{monoisotopic:.4f}\t{unknown}\n")
+
+    return num_rows
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a protein FASTA file to compute the molecular weight of every protein")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
+    return parser.parse_args()
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        outfile = open(args.outfile, "w", encoding="utf-8")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    with outfile:
+        write_mass_table(get_protein_masses(read_fasta_file(args.infile)), outfile)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,17 +12,30 @@ python3 sec_structure_split.py [--help] --infile input_file.fasta
 import argparse
 import sys
 
+from compressed_io import get_compression, open_text
+from fasta_io import read_fasta_mmap, read_fasta_records
+from fasta_profile import add_profile_arguments, get_profiler
 
-def get_filehandle(file_name, mode):
-    """
+# Output files are written through large buffers, records are routed one by one
+OUTPUT_BUFFER_SIZE = 1 << 20
 
-    :param file_name:
-    :param mode:
-    :return:
+
+def get_filehandle(file_name, mode, buffering=-1):
+    """
+    Open a file, exiting with the error message if it cannot be opened.
+    Text files opened for reading may be gzip or BGZF compressed, the
+    compression is detected from the file's magic bytes.
+    :param file_name: Path to the file
+    :param mode: Mode to open the file with, text modes use UTF-8
+    :param buffering: Buffer size passed to open(), default the system default
+    :return: filehandle
     """
 
     try:
-        fh_in = open(file_name, mode, encoding="utf-8")
+        if mode == "r":
+            return open_text(file_name)
+        encoding = None if "b" in mode else "utf-8"
+        fh_in = open(file_name, mode, buffering=buffering, encoding=encoding)
         return fh_in
     except OSError as e:
         print(e)
@@ -34,31 +47,19 @@ def get_filehandle(file_name, mode):
 
 def get_fasta_lists(fh_in):
     """
-
-    :param fh_in:
-    :return:
+    Collect every record of a FASTA file into a header list and a sequence list.
+    :param fh_in: Iterable of text lines in FASTA format
+    :return: (header_list, sequence_list)
     """
 
     # Initializing variables
     header_list = []
     sequence_list = []
-    current_sequence = ""
-
-    for line in fh_in:
-        line = line.strip()  # Remove leading/trailing whitespace
-        if not line:
-            continue  # Skip empty lines
-
-        if line[0] == ">":
-            header_list.append(line[1:])  # Remove the ">" character
-            if current_sequence:
-                sequence_list.append(current_sequence)
-            current_sequence = ""
-        else:
-            current_sequence += line
 
-    if current_sequence:
-        sequence_list.append(current_sequence)
+    for header, sequence in read_fasta_records(fh_in):
+        header_list.append(header)
+        if sequence:
+            sequence_list.append(sequence)
 
     _verify_lists(header_list, sequence_list)
 
@@ -81,30 +82,61 @@ def _verify_lists(header_list, sequence_list):
 
 def output_results_to_files(header_list, sequence_list, fh_out1, fh_out2):
     """
+    Route parallel header/sequence lists to the protein and secondary structure files
+    :param header_list: List of FASTA headers
+    :param sequence_list: List of sequences matching header_list
+    :param fh_out1: Open filehandle for protein sequences
+    :param fh_out2: Open filehandle for secondary structures
+    :return: (number of protein sequences, number of secondary structures) written
+    """
 
-    :param header_list:
-    :param sequence_list:
-    :param fh_out1:
-    :param fh_out2:
-    :return:
+    return split_records(zip(header_list, sequence_list), fh_out1, fh_out2)
+
+
+def split_records(records, fh_out1, fh_out2):
+    """
+    Write each record to the protein or secondary structure file as it is
+    parsed, so nothing is held in memory beyond the current record
+    :param records: Iterable of (header, sequence) tuples, sequences may be bytes-like
+    :param fh_out1: Open filehandle for protein sequences
+    :param fh_out2: Open filehandle for secondary structures
+    :return: (number of protein sequences, number of secondary structures) written
     """
 
-    num_proteins = len(header_list)
-    num_ss = len(sequence_list)
+    num_proteins = 0
+    num_ss = 0
 
-    for header, sequence in zip(header_list, sequence_list):
-        if sequence.isalpha():
-            fh_out1.write(header)
-            fh_out1.write(sequence + "\n")
+    for header, sequence in records:
+        if not isinstance(sequence, str):
+            sequence = str(sequence, "utf-8")
+        if _is_secondary_structure(header, sequence):
+            fh_out = fh_out2
+            num_ss += 1
         else:
-            fh_out2.write(header)
-            # Write the secondary structure sequence with line breaks preserved
-            for line in sequence.splitlines():
-                fh_out2.write(line + "\n")
+            fh_out = fh_out1
+            num_proteins += 1
+        fh_out.write(f">{header}\n{sequence}\n")
 
     return num_proteins, num_ss
 
 
+def _is_secondary_structure(header, sequence):
+    """
+    Decide whether a record is a secondary structure. PDB seqres headers end
+    in "secstr" or "sequence"; other headers fall back to the sequence, since
+    secondary structure strings contain spaces for coil and proteins are all letters.
+    :param header: FASTA header without the ">"
+    :param sequence: Sequence string
+    :return: True for a secondary structure record
+    """
+
+    if header.endswith("secstr"):
+        return True
+    if header.endswith("sequence"):
+        return False
+    return not sequence.isalpha()
+
+
 def get_cli_args():
     """
     void: get_cli_args()
@@ -115,6 +147,7 @@ def get_cli_args():
     parser = argparse.ArgumentParser(
         description="Provide a FASTA file to perform splitting on sequence and secondary structure")
     parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    add_profile_arguments(parser)
     return parser.parse_args()
 
 
@@ -124,20 +157,31 @@ def main():
     args = get_cli_args()
     infile = args.infile
 
+    # Time the parse and write stages when --profile is given
+    profiler = get_profiler(args, "sec_structure_split", infile)
+    profiler.start()
+
     # Hard-coded the pdb_protein.fasta and pdb_ss.fasta file names into the program
     outfile1 = "pdb_protein.fasta"
     outfile2 = "pdb_ss.fasta"
 
     # Using get_filehandle() for one input file and two output files
     fh_in = get_filehandle(infile, 'r')
-    fh_out1 = get_filehandle(outfile1, 'w')
-    fh_out2 = get_filehandle(outfile2, 'w')
-
-    # Get the two lists of data from the input FASTA file
-    header_list, sequence_list = get_fasta_lists(fh_in)
-
-    # Print out results and get some output variables
-    num_proteins, num_ss = output_results_to_files(header_list, sequence_list, fh_out1, fh_out2)
+    fh_out1 = get_filehandle(outfile1, 'w', OUTPUT_BUFFER_SIZE)
+    fh_out2 = get_filehandle(outfile2, 'w', OUTPUT_BUFFER_SIZE)
+
+    # Plain files are memory-mapped, gzip/BGZF input is decompressed as a stream;
+    # spaces in secondary structures are data, so only line endings are removed
+    if get_compression(infile) is None:
+        records = read_fasta_mmap(fh_in.buffer, keep_whitespace=True)
+    else:
+        records = read_fasta_records(fh_in, keep_whitespace=True)
+
+    # Route every record to its output file in a single streaming pass;
+    # routing is cheap next to writing, so both count as the write stage
+    with profiler.stage("write"):
+        num_proteins, num_ss = split_records(profiler.wrap("parse", records), fh_out1, fh_out2)
+    profiler.add_records("write", num_proteins + num_ss)
 
     # Writing to stderr
     sys.stderr.write(f"Found {num_proteins} protein sequences\n")
@@ -148,6 +192,9 @@ def main():
     fh_out1.close()
     fh_out2.close()
 
+    profiler.stop()
+    profiler.write_summary(args.profile_json)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+"""
+File: stats_cache.py
+On-disk cache of per-record FASTA statistics.
+
+Entries are keyed by the input file and the version of the tool that
+computed them. The fast key uses the file's resolved path, size and
+modification time; the content key hashes the file bytes, so a copied or
+touched file still hits. The cache is bounded in size and evicts the least
+recently used entries first.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+# Bytes hashed at a time when keying on file content
+_HASH_BLOCK_SIZE = 1 << 20
+_ENTRY_SUFFIX = ".json"
+
+
+def get_cache_key(file_name, tool_version, use_content_hash=False):
+    """
+    Key identifying an input file and the tool version
+    :param file_name: Path to the input file
+    :param tool_version: Version string of the tool producing the cached rows
+    :param use_content_hash: Hash the file contents instead of path, size and mtime
+    :return: hex digest
+    """
+
+    digest = hashlib.sha256()
+    digest.update(f"{tool_version}\0".encode("utf-8"))
+
+    if use_content_hash:
+        with open(file_name, "rb") as fh_in:
+            for block in iter(lambda: fh_in.read(_HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    else:
+        file_stat = os.stat(file_name)
+        digest.update(f"{os.path.realpath(file_name)}\0{file_stat.st_size}\0{file_stat.st_mtime_ns}"
+                      .encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def _get_entry_path(cache_dir, key):
+    """
+    Path of the cache entry for a key
+    :param cache_dir: Cache directory
+    :param key: Key from get_cache_key()
+    :return: path
+    """
+
+    return os.path.join(cache_dir, key + _ENTRY_SUFFIX)
+
+
+def load_cached_rows(cache_dir, key):
+    """
+    Look up cached rows and mark the entry as recently used
+    :param cache_dir: Cache directory
+    :param key: Key from get_cache_key()
+    :return: list of row tuples, or None on a miss
+    """
+
+    entry_path = _get_entry_path(cache_dir, key)
+    try:
+        with open(entry_path, "r", encoding="utf-8") as fh_in:
+            rows = json.load(fh_in)
+        os.utime(entry_path)  # The modification time records the last use
+    except (OSError, ValueError):
+        return None
+
+    return [tuple(row) for row in rows]
+
+
+def store_cached_rows(cache_dir, key, rows, max_bytes):
+    """
+    Store rows in the cache, then evict old entries to stay within max_bytes
+    :param cache_dir: Cache directory, created if needed
+    :param key: Key from get_cache_key()
+    :param rows: List of row tuples made of JSON-serialisable values
+    :param max_bytes: Maximum total size of the cache directory
+    :return: None
+    """
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write to a temporary file first so readers never see a partial entry
+    fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh_out:
+        json.dump(rows, fh_out, separators=(",", ":"))
+    os.replace(temp_path, _get_entry_path(cache_dir, key))
+
+    evict_cache(cache_dir, max_bytes)
+
+
+def evict_cache(cache_dir, max_bytes):
+    """
+    Delete the least recently used entries until the cache fits in max_bytes
+    :param cache_dir: Cache directory
+    :param max_bytes: Maximum total size of the cache entries
+    :return: number of entries deleted
+    """
+
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(_ENTRY_SUFFIX):
+            entry_stat = entry.stat()
+            entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    num_deleted = 0
+    for _, size, entry_path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(entry_path)
+        except FileNotFoundError:
+            pass  # Another process evicted it first
+        total_bytes -= size
+        num_deleted += 1
+
+    return num_deleted
@@ -0,0 +1,97 @@
+"""
+File: stats_formats.py
+Columnar binary output formats for the per-record nucleotide statistics.
+
+The "npy" format is a directory holding one uncompressed .npy file per
+column. Numeric columns are fixed-width arrays and the accessions are a
+fixed-width byte-string array, so every column can be memory-mapped by
+load_stats_columns() instead of parsing text. The "parquet" format writes
+the same columns through pyarrow, when it is installed.
+"""
+import os
+import sys
+
+import numpy as np
+
+# Column names and dtypes, in the order of the rows from get_record_stats()
+STATS_COLUMNS = [("accession", None),
+                 ("a_count", np.int64),
+                 ("g_count", np.int64),
+                 ("c_count", np.int64),
+                 ("t_count", np.int64),
+                 ("n_count", np.int64),
+                 ("length", np.int64),
+                 ("gc_percentage", np.float64)]
+
+OUTPUT_FORMATS = ["tsv", "npy", "parquet"]
+
+
+def get_stats_arrays(stats_rows):
+    """
+    Convert statistics rows into one NumPy array per column
+    :param stats_rows: Iterable of rows from get_record_stats()
+    :return: dictionary of column name -> array, plus "number" (1-based record number)
+    """
+
+    rows = list(stats_rows)
+    columns = list(zip(*rows)) if rows else [()] * len(STATS_COLUMNS)
+
+    arrays = {"number": np.arange(1, len(rows) + 1, dtype=np.int64)}
+    for (name, dtype), values in zip(STATS_COLUMNS, columns):
+        if dtype is None:
+            # Fixed-width byte strings, the width of the longest accession
+            arrays[name] = np.array([value.encode("utf-8") for value in values], dtype=np.bytes_)
+        else:
+            arrays[name] = np.array(values, dtype=dtype)
+    return arrays
+
+
+def write_stats_npy(stats_rows, out_dir):
+    """
+    Write the statistics as a directory of memory-mappable .npy columns
+    :param stats_rows: Iterable of rows from get_record_stats()
+    :param out_dir: Directory to write, created if needed
+    :return: Number of rows written
+    """
+
+    arrays = get_stats_arrays(stats_rows)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    return len(arrays["number"])
+
+
+def load_stats_columns(out_dir, mmap=True):
+    """
+    Load statistics written by write_stats_npy()
+    :param out_dir: Directory written by write_stats_npy()
+    :param mmap: Memory-map the columns instead of reading them into memory
+    :return: dictionary of column name -> array
+    """
+
+    mmap_mode = "r" if mmap else None
+    names = ["number"] + [name for name, _ in STATS_COLUMNS]
+    return {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in names}
+
+
+def write_stats_parquet(stats_rows, out_file):
+    """
+    Write the statistics as a Parquet file, requires pyarrow
+    :param stats_rows: Iterable of rows from get_record_stats()
+    :param out_file: Path of the Parquet file to write
+    :return: Number of rows written
+    """
+
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        print("The parquet format needs pyarrow, install it with: pip install pyarrow", file=sys.stderr)
+        sys.exit(1)
+
+    arrays = get_stats_arrays(stats_rows)
+    arrays["accession"] = np.char.decode(arrays["accession"], "utf-8")
+    table = pyarrow.table({name: pyarrow.array(array) for name, array in arrays.items()})
+    pyarrow.parquet.write_table(table, out_file)
+    return table.num_rows
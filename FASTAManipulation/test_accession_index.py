@@ -0,0 +1,133 @@
+"""
+A test script for the accession_index.py module.
+"""
+import gzip
+import os
+
+import pytest
+
+import accession_index
+from accession_index import (IndexEntry, build_accession_index, get_database_path, is_index_current,
+                             iter_index_entries, query_accession_index, write_entries)
+
+FASTA_CONTENT = (">NC_000001.11 Homo sapiens chromosome 1\n"
+                 "ACGTA\n"
+                 "CGGGN\n"
+                 ">NC_000002.12 Homo sapiens chromosome 2\n"
+                 "GGCC\n"
+                 ">NM_000014.6 mRNA\n"
+                 "AT\n"
+                 ">\n"
+                 "ACGTACGT\n")
+
+
+@pytest.fixture(name="fasta_path")
+def fixture_fasta_path(tmp_path):
+    """
+    A small wrapped FASTA file
+    """
+
+    file_path = tmp_path / "test.fasta"
+    file_path.write_bytes(FASTA_CONTENT.encode("utf-8"))
+    return str(file_path)
+
+
+def test_iter_index_entries(fasta_path, monkeypatch):
+    """
+    testing the iter_index_entries() function
+    """
+
+    # Test case 1: offsets of the ">" lines, lengths and GC% without whitespace
+    entries = list(iter_index_entries(fasta_path))
+    assert entries == [IndexEntry("NC_000001.11", "NC_000001.11 Homo sapiens chromosome 1", 0, 10, 60.0),
+                       IndexEntry("NC_000002.12", "NC_000002.12 Homo sapiens chromosome 2", 52, 4, 100.0),
+                       IndexEntry("NM_000014.6", "NM_000014.6 mRNA", 97, 2, 0.0),
+                       IndexEntry("", "", 118, 8, 50.0)]
+
+    # Test case 2: compressed records have no byte offset
+    gz_path = fasta_path + ".gz"
+    with gzip.open(gz_path, "wb") as fh_out:
+        fh_out.write(FASTA_CONTENT.encode("utf-8"))
+    assert list(iter_index_entries(gz_path)) == [entry._replace(offset=None) for entry in entries]
+
+    # Test case 3: large records are counted on their own a block at a time, between batches of small ones
+    monkeypatch.setattr(accession_index, "_BATCH_SIZE", 6)
+    monkeypatch.setattr(accession_index, "_BLOCK_SIZE", 4)
+    assert list(iter_index_entries(fasta_path)) == entries
+
+
+def test_iter_index_entries_bad_header(tmp_path):
+    """
+    testing that a header that is not UTF-8 is indexed with its bad bytes replaced
+    """
+
+    content = b">seq\xff1 caf\xe9\nGGCA\n>seq2\nAT\n"
+    expected = [IndexEntry("seq\ufffd1", "seq\ufffd1 caf\ufffd", 0, 4, 75.0), IndexEntry("seq2", "seq2", 17, 2, 0.0)]
+    file_path = tmp_path / "bad.fasta"
+    file_path.write_bytes(content)
+    assert list(iter_index_entries(str(file_path))) == expected
+
+    gz_path = tmp_path / "bad.fasta.gz"
+    gz_path.write_bytes(gzip.compress(content))
+    assert list(iter_index_entries(str(gz_path))) == [entry._replace(offset=None) for entry in expected]
+
+
+def test_build_accession_index(fasta_path):
+    """
+    testing the build_accession_index() and is_index_current() functions
+    """
+
+    db_file = get_database_path(fasta_path)
+    assert not is_index_current(fasta_path, db_file)
+    assert build_accession_index(fasta_path, db_file) == 4
+    assert is_index_current(fasta_path, db_file)
+    assert sorted(os.listdir(os.path.dirname(db_file))) == ["test.fasta", "test.fasta.sqlite"]
+
+    # Test case 1: a changed FASTA file makes the index stale
+    with open(fasta_path, "a", encoding="utf-8") as fh_out:
+        fh_out.write(">NM_000015.3\nAC\n")
+    assert not is_index_current(fasta_path, db_file)
+    assert build_accession_index(fasta_path, db_file) == 5
+    assert sorted(os.listdir(os.path.dirname(db_file))) == ["test.fasta", "test.fasta.sqlite"]
+
+
+def test_query_accession_index(fasta_path):
+    """
+    testing the query_accession_index() function
+    """
+
+    db_file = get_database_path(fasta_path)
+    build_accession_index(fasta_path, db_file)
+
+    def get_accessions(**conditions):
+        return [entry.accession for entry in query_accession_index(db_file, **conditions)]
+
+    # Test case 1: exact accession
+    entries = query_accession_index(db_file, accession="NC_000002.12")
+    assert entries == [IndexEntry("NC_000002.12", "NC_000002.12 Homo sapiens chromosome 2", 52, 4, 100.0)]
+    assert not get_accessions(accession="NC_000002")
+
+    # Test case 2: prefix and length range, combined
+    assert get_accessions(prefix="NC_") == ["NC_000001.11", "NC_000002.12"]
+    assert get_accessions(prefix="N") == ["NC_000001.11", "NC_000002.12", "NM_000014.6"]
+    assert get_accessions(min_length=4, max_length=8) == ["NC_000002.12", ""]
+    assert get_accessions(prefix="NC_", max_length=4) == ["NC_000002.12"]
+
+    # Test case 3: no condition returns every record in file order
+    assert get_accessions() == ["NC_000001.11", "NC_000002.12", "NM_000014.6", ""]
+
+
+def test_write_entries(tmp_path):
+    """
+    testing the write_entries() function
+    """
+
+    output_path = tmp_path / "hits.txt"
+    with open(output_path, "w", encoding="utf-8") as fh_out:
+        num_entries = write_entries([IndexEntry("NM_000014.6", "NM_000014.6 mRNA", 97, 2, 0.0),
+                                     IndexEntry("chr1", "chr1", None, 3, 66.666)], fh_out)
+
+    assert num_entries == 2
+    assert output_path.read_text(encoding="utf-8") == ("Accession\tOffset\tLength\tGC%\tHeader\n"
+                                                       "NM_000014.6\t97\t2\t0.0\tNM_000014.6 mRNA\n"
+                                                       "chr1\t\t3\t66.7\tchr1\n")
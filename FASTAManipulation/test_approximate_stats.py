@@ -0,0 +1,224 @@
+"""
+A test script for the approximate_stats.py module.
+"""
+import gzip
+import io
+import sys
+
+import numpy as np
+import pytest
+
+import approximate_stats
+import nt_fasta_stats
+from approximate_stats import (Estimate, _find_record_span, _get_sequence_length, _get_window_bases, get_estimates,
+                               sample_offsets, sample_stream, sample_twobit, write_estimates)
+from fasta_io import read_fasta_file
+from twobit import write_twobit
+
+
+def _write_random_fasta(file_path, num_records, seed=3):
+    """
+    Records of random lengths, GC rich in the first half of the file
+    """
+
+    rng = np.random.default_rng(seed)
+    with open(file_path, "wb") as fh_out:
+        for i in range(num_records):
+            bases = b"GGCCAT" if i < num_records // 2 else b"ACGT"
+            sequence = bytes(rng.choice(list(bases), size=int(rng.integers(20, 400))).astype(np.uint8))
+            lines = b"\n".join(sequence[j:j + 60] for j in range(0, len(sequence), 60))
+            fh_out.write(b">read%d ACGT in the header\n%s\n" % (i, lines))
+
+
+def _get_exact(file_path):
+    """
+    Exact GC percentage, number of records and mean length
+    """
+
+    sequences = [bytes(sequence) for _, sequence in read_fasta_file(str(file_path))]
+    bases = b"".join(sequences)
+    gc_percentage = (bases.count(b"G") + bases.count(b"C")) / len(bases) * 100
+    return gc_percentage, len(sequences), len(bases) / len(sequences)
+
+
+def test_find_record_span_and_window():
+    """
+    testing the _find_record_span() and _get_window_bases() functions
+    """
+
+    buffer = b">r1 GGG\nACGT\nAC\n>r2\nTTTT\n"
+    assert _find_record_span(buffer, 0) == (0, 16)
+    assert _find_record_span(buffer, 15) == (0, 16)
+    assert _find_record_span(buffer, 16) == (16, 25)
+    assert _find_record_span(b"junk\n>r1\nA\n", 2) is None
+
+    # Header text never counts as sequence, also when the window starts in one
+    assert _get_window_bases(buffer, 0, 100) == b"ACGTACTTTT"
+    assert _get_window_bases(buffer, 4, 100) == b"ACGTACTTTT"
+    assert _get_window_bases(buffer, 10, 9) == b"GTAC"
+
+    # Record lengths leave the whitespace out, also when counted in small blocks
+    assert _get_sequence_length(buffer, 8, 16) == 6
+    assert _get_sequence_length(buffer, 8, 16, block_size=3) == 6
+    assert _get_sequence_length(buffer, 8, 8) == 0
+
+
+def test_sample_offsets(tmp_path):
+    """
+    testing that the byte offset estimates bracket the exact values
+    """
+
+    file_path = tmp_path / "reads.fasta"
+    _write_random_fasta(file_path, 3000)
+    gc_percentage, num_records, mean_length = _get_exact(file_path)
+
+    with open(file_path, "rb") as fh_in:
+        sample = sample_offsets(fh_in, 4000, np.random.default_rng(11))
+    estimates = {estimate.name: estimate for estimate in get_estimates(sample, np.random.default_rng(12))}
+    for name, exact in [("GC%", gc_percentage), ("Records", num_records), ("Mean_length", mean_length)]:
+        assert estimates[name].low <= exact <= estimates[name].high
+    assert estimates["Length_p05"].value < estimates["Length_p50"].value < estimates["Length_p95"].value
+
+    # A single record is counted exactly, however often it is hit
+    single = tmp_path / "single.fasta"
+    single.write_bytes(b">chr1\n" + b"ACGTACGTAC\n" * 500)
+    with open(single, "rb") as fh_in:
+        sample = sample_offsets(fh_in, 100, np.random.default_rng(1))
+    estimates = {estimate.name: estimate for estimate in get_estimates(sample, np.random.default_rng(1))}
+    assert estimates["Records"].value == pytest.approx(1)
+    assert estimates["Records"].high == pytest.approx(1)
+    assert estimates["Bases"].value == pytest.approx(5000)
+
+    # Empty file
+    empty = tmp_path / "empty.fasta"
+    empty.write_bytes(b"")
+    with open(empty, "rb") as fh_in:
+        assert get_estimates(sample_offsets(fh_in, 100, np.random.default_rng(1)), np.random.default_rng(1)) == []
+
+
+def test_sample_twobit(tmp_path):
+    """
+    testing that .2bit input is sampled through its index
+    """
+
+    fasta_path = tmp_path / "reads.fasta"
+    _write_random_fasta(fasta_path, 3000)
+    gc_percentage, num_records, mean_length = _get_exact(fasta_path)
+    twobit_path = tmp_path / "reads.2bit"
+    write_twobit(((header, bytes(sequence)) for header, sequence in read_fasta_file(str(fasta_path))),
+                 str(twobit_path))
+
+    # Test case 1: The record count comes from the headers, the rest is sampled
+    sample = sample_twobit(str(twobit_path), 1000, np.random.default_rng(5), window_size=100)
+    assert len(sample.base_counts) == len(sample.lengths) == 1000
+    estimates = {estimate.name: estimate for estimate in get_estimates(sample, np.random.default_rng(6))}
+    assert estimates["Records"] == Estimate("Records", num_records, num_records, num_records)
+    for name, exact in [("GC%", gc_percentage), ("Mean_length", mean_length)]:
+        assert estimates[name].low <= exact <= estimates[name].high
+
+    # Test case 2: Every length is kept when there are fewer records than samples
+    sample = sample_twobit(str(twobit_path), 5000, np.random.default_rng(5))
+    assert sample.lengths.mean() == pytest.approx(mean_length)
+
+    # Test case 3: A file without bases
+    empty_path = tmp_path / "empty.2bit"
+    write_twobit([("chr1", "")], str(empty_path))
+    sample = sample_twobit(str(empty_path), 10, np.random.default_rng(1))
+    assert sample.num_records == 1 and len(sample.base_counts) == 0
+
+
+def test_sample_stream(tmp_path):
+    """
+    testing that compressed input is reservoir sampled from its raw records
+    """
+
+    fasta_path = tmp_path / "reads.fasta"
+    _write_random_fasta(fasta_path, 3000)
+    gc_percentage, num_records, mean_length = _get_exact(fasta_path)
+    gzip_path = tmp_path / "reads.fasta.gz"
+    gzip_path.write_bytes(gzip.compress(fasta_path.read_bytes()))
+
+    # Test case 1: Estimates from a gzip file cover the exact values
+    with gzip.open(gzip_path, "rb") as fh_in:
+        sample = sample_stream(fh_in, 1000, np.random.default_rng(3))
+    assert sample.num_records == num_records
+    assert (sample.lengths == sample.base_counts[:, 5]).all()
+    estimates = {estimate.name: estimate for estimate in get_estimates(sample, np.random.default_rng(4))}
+    for name, exact in [("GC%", gc_percentage), ("Mean_length", mean_length)]:
+        assert estimates[name].low <= exact <= estimates[name].high
+
+    # Test case 2: Fewer records than the sample size keeps them all
+    sample = sample_stream(io.BytesIO(b">a\nAC\nGT\n>b\nGG\n"), 10, np.random.default_rng(1))
+    assert sample.num_records == 2
+    assert sample.base_counts.tolist() == [[1, 1, 1, 1, 0, 4], [0, 2, 0, 0, 0, 2]]
+
+    # Test case 3: Every record is equally likely to be kept
+    data = b"".join(b">r%d\n%s\n" % (i, b"A" * (i % 7 + 1) + b"N" * (i // 7)) for i in range(5000))
+    kept = np.zeros(5000)
+    for seed in range(40):
+        sample = sample_stream(io.BytesIO(data), 100, np.random.default_rng(seed))
+        assert sample.num_records == 5000
+        assert len(sample.lengths) == 100
+        kept[sample.base_counts[:, 4] * 7 + sample.base_counts[:, 0] - 1] += 1
+    first_half, second_half = kept[:2500].sum(), kept[2500:].sum()
+    assert abs(first_half - second_half) < 0.1 * (first_half + second_half)
+
+
+def test_get_estimates_chunks(tmp_path, monkeypatch):
+    """
+    testing that get_estimates() resamples a few rounds at a time
+    """
+
+    fasta_path = tmp_path / "reads.fasta"
+    _write_random_fasta(fasta_path, 300)
+    with open(fasta_path, "rb") as fh_in:
+        sample = sample_stream(fh_in, 100, np.random.default_rng(1))
+    whole = get_estimates(sample, np.random.default_rng(2), rounds=50)
+
+    # Chunks of 3 rounds, the last one shorter, give the same point estimates
+    monkeypatch.setattr(approximate_stats, "_BOOTSTRAP_CELLS", 300)
+    chunked = get_estimates(sample, np.random.default_rng(2), rounds=50)
+    assert [(estimate.name, estimate.value) for estimate in chunked] == \
+        [(estimate.name, estimate.value) for estimate in whole]
+    assert all(estimate.low <= estimate.value <= estimate.high for estimate in chunked)
+
+
+def test_write_estimates():
+    """
+    testing the write_estimates() function
+    """
+
+    output = io.StringIO()
+    assert write_estimates([Estimate("GC%", 41.234, 40.9, 41.5)], 100, "records", 0.95, output) == 1
+    assert output.getvalue().splitlines() == [
+        "# Approximate statistics from 100 sampled records, 95% bootstrap confidence intervals",
+        "Statistic\tEstimate\tCI_low\tCI_high",
+        "GC%\t41.23\t40.90\t41.50"]
+
+
+def test_nt_fasta_stats_approximate(tmp_path, monkeypatch):
+    """
+    testing the --approximate option of nt_fasta_stats.py
+    """
+
+    file_path = tmp_path / "reads.fasta"
+    _write_random_fasta(file_path, 500)
+    outfile = tmp_path / "estimates.txt"
+    monkeypatch.setattr(sys, "argv", ["nt_fasta_stats.py", "-i", str(file_path), "-o", str(outfile),
+                                      "--approximate", "--sample-size", "300", "--seed", "7"])
+    nt_fasta_stats.main()
+    first = outfile.read_text()
+    nt_fasta_stats.main()
+    assert outfile.read_text() == first
+    assert first.splitlines()[2].startswith("A%\t")
+
+    # .2bit input is sampled at base positions through its index
+    twobit_path = tmp_path / "reads.2bit"
+    write_twobit(((header, bytes(sequence)) for header, sequence in read_fasta_file(str(file_path))),
+                 str(twobit_path))
+    monkeypatch.setattr(sys, "argv", ["nt_fasta_stats.py", "-i", str(twobit_path), "-o", str(outfile),
+                                      "--approximate", "--sample-size", "300", "--seed", "7"])
+    nt_fasta_stats.main()
+    lines = outfile.read_text().splitlines()
+    assert lines[0].startswith("# Approximate statistics from 300 sampled base positions")
+    assert "Records\t500.00\t500.00\t500.00" in lines
@@ -0,0 +1,146 @@
+"""
+A test script for the batch_fasta_stats.py module.
+"""
+import gzip
+import io
+import os
+
+import pytest
+
+import batch_fasta_stats
+from batch_fasta_stats import (FileResult, FileTotals, collect_input_files, get_output_paths, process_file,
+                               read_manifest, run_batch, write_batch_summary)
+
+
+def _process_or_crash(infile, outfile, output_format):
+    """
+    process_file(), except that the worker process dies on files named crash*
+    """
+
+    if os.path.basename(infile).startswith("crash"):
+        os._exit(1)
+    return process_file(infile, outfile, output_format)
+
+
+@pytest.fixture(name="fasta_dir")
+def fixture_fasta_dir(tmp_path):
+    """
+    A directory of FASTA files, one of them compressed and one not FASTA
+    """
+
+    (tmp_path / "a.fa").write_bytes(b">a1 first\nACGT\nGG\n>a2\nNNAC\n")
+    with gzip.open(tmp_path / "b.fna.gz", "wb") as fh_out:
+        fh_out.write(b">b1\nGGCC\n")
+    (tmp_path / "bad.fasta").write_bytes(b"ACGT\n>x\nAC\n")
+    (tmp_path / "notes.txt").write_bytes(b"not an input\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.fa").write_bytes(b">c1\nAT\n")
+    return tmp_path
+
+
+def test_collect_input_files(fasta_dir):
+    """
+    testing the collect_input_files() and read_manifest() functions
+    """
+
+    # Test case 1: FASTA files of a directory, in name order
+    directory = str(fasta_dir)
+    assert collect_input_files([directory]) == [os.path.join(directory, name) for name in
+                                                ("a.fa", "b.fna.gz", "bad.fasta")]
+
+    # Test case 2: glob patterns, "**" recursing, and duplicates dropped
+    assert collect_input_files([os.path.join(directory, "**", "a.fa"), os.path.join(directory, "a.fa")]) == \
+        [os.path.join(directory, "a.fa"), os.path.join(directory, "sub", "a.fa")]
+
+    # Test case 3: manifest paths are relative to the manifest, missing files are kept
+    manifest = fasta_dir / "manifest.txt"
+    manifest.write_text("# genomes\nsub/a.fa\n\nmissing.fa\n", encoding="utf-8")
+    assert read_manifest(str(manifest)) == [os.path.join(directory, "sub/a.fa"), os.path.join(directory, "missing.fa")]
+    assert collect_input_files([], str(manifest)) == read_manifest(str(manifest))
+
+
+def test_get_output_paths():
+    """
+    testing the get_output_paths() function
+    """
+
+    assert get_output_paths(["x/a.fa", "y/a.fa", "b.fa.gz"], "out", "tsv") == \
+        [os.path.join("out", "a.fa.stats.txt"), os.path.join("out", "a.fa.2.stats.txt"),
+         os.path.join("out", "b.fa.gz.stats.txt")]
+    assert get_output_paths(["a.fa"], "out", "npy") == [os.path.join("out", "a.fa.stats")]
+
+
+def test_process_file(fasta_dir):
+    """
+    testing the process_file() function
+    """
+
+    # Test case 1: the statistics table and the sums over its rows
+    outfile = str(fasta_dir / "a.stats.txt")
+    assert process_file(str(fasta_dir / "a.fa"), outfile, "tsv") == (FileTotals(2, 2, 3, 2, 1, 2, 10), None)
+    with open(outfile, "r", encoding="utf-8") as fh_in:
+        assert fh_in.read().splitlines()[1:] == ["1\ta1\t1\t3\t1\t1\t0\t6\t66.7", "2\ta2\t1\t0\t1\t0\t2\t4\t25.0"]
+
+    # Test case 2: a failed file returns the tool's message and leaves no output behind
+    outfile = str(fasta_dir / "bad.stats.txt")
+    totals, error = process_file(str(fasta_dir / "bad.fasta"), outfile, "tsv")
+    assert totals is None and "before the first FASTA header" in error
+    assert not os.path.exists(outfile)
+
+
+def test_run_batch(fasta_dir, capsys):
+    """
+    testing the run_batch() function
+    """
+
+    files = [str(fasta_dir / "a.fa"), str(fasta_dir / "missing.fa"), str(fasta_dir / "b.fna.gz")]
+    outfiles = get_output_paths(files, str(fasta_dir), "tsv")
+    results = run_batch(files, outfiles, "tsv", 2, retries=2)
+
+    # Test case 1: results in input order, the failed file tried three times and skipped
+    assert [result.infile for result in results] == files
+    assert [result.attempts for result in results] == [1, 3, 1]
+    assert results[2].totals == FileTotals(1, 0, 2, 2, 0, 0, 4)
+    assert results[1].totals is None and "No such file" in results[1].error
+    assert capsys.readouterr().err.count("Retrying") == 2
+
+
+def test_run_batch_worker_dies(fasta_dir, monkeypatch, capsys):
+    """
+    testing that run_batch() carries on in a new pool when a worker process dies
+    """
+
+    monkeypatch.setattr(batch_fasta_stats, "process_file", _process_or_crash)
+    (fasta_dir / "crash.fa").write_bytes(b">x\nAC\n")
+    files = [str(fasta_dir / name) for name in ("a.fa", "crash.fa", "b.fna.gz", "bad.fasta", "sub/a.fa")]
+    outfiles = get_output_paths(files, str(fasta_dir), "tsv")
+    results = run_batch(files, outfiles, "tsv", 2, retries=1)
+
+    # Test case 1: only the file that killed its worker is charged for it, the others all finish
+    assert [result.attempts for result in results] == [1, 2, 1, 2, 1]
+    assert [result.totals is None for result in results] == [False, True, False, True, False]
+    assert results[1].error == "worker process died"
+    assert results[4].totals == FileTotals(1, 1, 0, 0, 1, 0, 2)
+
+    # Test case 2: every retry announced was run
+    err = capsys.readouterr().err
+    assert err.count("Retrying") == 2
+    assert err.count("Skipping") == 2
+
+
+def test_write_batch_summary():
+    """
+    testing the write_batch_summary() function
+    """
+
+    output = io.StringIO()
+    results = [FileResult("a.fa", "out/a.fa.stats.txt", 1, FileTotals(2, 2, 3, 2, 1, 2, 10), None),
+               FileResult("bad.fa", "out/bad.fa.stats.txt", 2, None, "Not FASTA"),
+               FileResult("b.fa", "out/b.fa.stats.txt", 1, FileTotals(1, 0, 2, 2, 0, 0, 4), None)]
+    assert write_batch_summary(results, output) == 1
+
+    lines = output.getvalue().splitlines()
+    assert lines[1] == "a.fa\tok\t1\t2\t2\t3\t2\t1\t2\t10\t50.0\tout/a.fa.stats.txt\t"
+    assert lines[2] == "bad.fa\tfailed\t2\t\t\t\t\t\t\t\t\t\tNot FASTA"
+    assert lines[4] == "Total\t2 ok, 1 failed\t\t3\t2\t5\t4\t1\t2\t14\t64.3\t\t"
+    assert all(len(line.split("\t")) == 13 for line in lines)
@@ -0,0 +1,72 @@
+"""
+A test script for the benchmarks package.
+"""
+from benchmarks.synthetic_fasta import PROFILES, generate_fasta
+from benchmarks.run_benchmarks import compare_to_baseline, run_stage
+from fasta_io import read_fasta_records
+
+
+def test_generate_fasta(tmp_path):
+    """
+    testing the generate_fasta() function
+    """
+
+    # Test case 1: Same seed gives byte-identical files, another seed does not
+    first = tmp_path / "first.fasta"
+    second = tmp_path / "second.fasta"
+    other = tmp_path / "other.fasta"
+    generate_fasta(first, "tiny_records", 20000, seed=7)
+    generate_fasta(second, "tiny_records", 20000, seed=7)
+    generate_fasta(other, "tiny_records", 20000, seed=8)
+    assert first.read_bytes() == second.read_bytes()
+    assert first.read_bytes() != other.read_bytes()
+
+    # Test case 2: Every profile is valid FASTA with the requested number of bases
+    for profile in PROFILES:
+        file_path = tmp_path / f"{profile}.fasta"
+        num_records, num_bytes = generate_fasta(file_path, profile, 50000)
+        with open(file_path, "r", encoding="utf-8") as fh_in:
+            records = list(read_fasta_records(fh_in))
+        assert num_bytes == file_path.stat().st_size
+        if profile == "pdb_seqres":
+            assert len(records) == 2 * num_records
+        else:
+            assert len(records) == num_records
+            assert sum(len(sequence) for _, sequence in records) == 50000
+
+    # Test case 3: Unwrapped profile writes one sequence line per record
+    with open(tmp_path / "unwrapped.fasta", "r", encoding="utf-8") as fh_in:
+        lines = fh_in.readlines()
+    assert all(line.startswith(">") for line in lines[::2])
+
+
+def test_run_stage(tmp_path):
+    """
+    testing the run_stage() function
+    """
+
+    file_path = tmp_path / "tiny.fasta"
+    num_records, num_bytes = generate_fasta(file_path, "tiny_records", 20000)
+    result = run_stage("stats_pipeline", file_path)
+    assert result["records"] == num_records
+    assert result["bytes"] == num_bytes
+    assert result["mb_per_s"] > 0
+    assert result["peak_rss_bytes"] > 0
+
+
+def test_compare_to_baseline():
+    """
+    testing the compare_to_baseline() function
+    """
+
+    baseline = {"tiny_records": {"stats_pipeline": {"mb_per_s": 100.0},
+                                 "get_fasta_lists": {"mb_per_s": 50.0}}}
+    results = {"tiny_records": {"stats_pipeline": {"mb_per_s": 70.0},
+                                "get_fasta_lists": {"mb_per_s": 45.0},
+                                "read_fasta_mmap": {"mb_per_s": 1.0}}}
+
+    # Test case 1: Only drops beyond the tolerance are reported
+    assert compare_to_baseline(results, baseline, 0.2) == [("tiny_records", "stats_pipeline", 100.0, 70.0)]
+
+    # Test case 2: Larger tolerance
+    assert compare_to_baseline(results, baseline, 0.5) == []
@@ -0,0 +1,151 @@
+"""
+A test script for the compressed_io.py module.
+"""
+import gzip
+import io
+import struct
+import zlib
+
+import pytest
+from compressed_io import (BgzfReader, get_compression, open_binary, open_text, iter_bgzf_blocks,
+                           inflate_bgzf_block)
+
+FASTA_CONTENT = "".join(f">Seq{i} description\nACGTACGTNN\nGGCC\n" for i in range(500))
+
+
+def _make_bgzf_block(data):
+    """
+    Compress one BGZF block the way bgzip does
+    """
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(data) + compressor.flush()
+    block_size = 18 + len(deflated) + 8
+    header = b"\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00" + struct.pack("<H", block_size - 1)
+    return header + deflated + struct.pack("<II", zlib.crc32(data), len(data))
+
+
+def _write_bgzf(file_path, data, block_size=1000):
+    """
+    Write data as BGZF, small blocks so records span block boundaries
+    """
+
+    with open(file_path, "wb") as fh_out:
+        for start in range(0, len(data), block_size):
+            fh_out.write(_make_bgzf_block(data[start:start + block_size]))
+        fh_out.write(_make_bgzf_block(b""))  # End-of-file marker block
+
+
+def test_get_compression(tmp_path):
+    """
+    testing the get_compression() function
+    """
+
+    plain_path = tmp_path / "test.fasta"
+    plain_path.write_text(FASTA_CONTENT, encoding="utf-8")
+    gzip_path = tmp_path / "test.fasta.gz"
+    gzip_path.write_bytes(gzip.compress(FASTA_CONTENT.encode("utf-8")))
+    bgzf_path = tmp_path / "test.fasta.bgz"
+    _write_bgzf(bgzf_path, FASTA_CONTENT.encode("utf-8"))
+
+    # Test case 1: Detected from the magic bytes, not the extension
+    assert get_compression(plain_path) is None
+    assert get_compression(gzip_path) == "gzip"
+    assert get_compression(bgzf_path) == "bgzf"
+
+    # Test case 2: Empty file
+    empty_path = tmp_path / "empty.gz"
+    empty_path.write_bytes(b"")
+    assert get_compression(empty_path) is None
+
+
+def test_open_text(tmp_path):
+    """
+    testing the open_text() function
+    """
+
+    gzip_path = tmp_path / "test.fasta.gz"
+    gzip_path.write_bytes(gzip.compress(FASTA_CONTENT.encode("utf-8")))
+    bgzf_path = tmp_path / "test.fasta.bgz"
+    _write_bgzf(bgzf_path, FASTA_CONTENT.encode("utf-8"))
+
+    for file_path in [gzip_path, bgzf_path]:
+        with open_text(file_path) as fh_in:
+            assert fh_in.read() == FASTA_CONTENT
+
+
+def test_open_binary(tmp_path):
+    """
+    testing the open_binary() function
+    """
+
+    plain_path = tmp_path / "test.fasta"
+    plain_path.write_bytes(FASTA_CONTENT.encode("utf-8"))
+    gzip_path = tmp_path / "test.fasta.gz"
+    gzip_path.write_bytes(gzip.compress(FASTA_CONTENT.encode("utf-8")))
+    bgzf_path = tmp_path / "test.fasta.bgz"
+    _write_bgzf(bgzf_path, FASTA_CONTENT.encode("utf-8"))
+
+    for file_path in [plain_path, gzip_path, bgzf_path]:
+        with open_binary(file_path) as fh_in:
+            assert fh_in.read() == FASTA_CONTENT.encode("utf-8")
+
+
+def test_iter_bgzf_blocks(tmp_path):
+    """
+    testing the iter_bgzf_blocks() and inflate_bgzf_block() functions
+    """
+
+    bgzf_path = tmp_path / "test.fasta.bgz"
+    data = FASTA_CONTENT.encode("utf-8")
+    _write_bgzf(bgzf_path, data)
+
+    # Test case 1: Blocks inflate back to the original data
+    with open(bgzf_path, "rb") as fh_in:
+        blocks = list(iter_bgzf_blocks(fh_in))
+    assert len(blocks) == len(data) // 1000 + 2
+    assert b"".join(inflate_bgzf_block(block) for block in blocks) == data
+
+    # Test case 2: Corrupt block fails the CRC check
+    deflated, crc, size = blocks[0]
+    with pytest.raises(ValueError):
+        inflate_bgzf_block((deflated, crc ^ 1, size))
+    with pytest.raises(ValueError):
+        inflate_bgzf_block((b"\xff" + deflated, crc, size))
+
+    # Test case 3: Truncated file
+    bgzf_path.write_bytes(bgzf_path.read_bytes()[:-10])
+    with open(bgzf_path, "rb") as fh_in:
+        with pytest.raises(SystemExit):
+            list(iter_bgzf_blocks(fh_in))
+
+
+def test_bgzf_reader(tmp_path):
+    """
+    testing the BgzfReader class
+    """
+
+    bgzf_path = tmp_path / "test.fasta.bgz"
+    data = FASTA_CONTENT.encode("utf-8")
+    _write_bgzf(bgzf_path, data)
+
+    # Test case 1: Read through a buffered reader with several threads
+    with io.BufferedReader(BgzfReader(bgzf_path, num_threads=3)) as fh_in:
+        assert fh_in.read() == data
+
+    # Test case 2: Small reads across block boundaries
+    with BgzfReader(bgzf_path, num_threads=2) as fh_in:
+        chunks = []
+        chunk = fh_in.read(333)
+        while chunk:
+            chunks.append(chunk)
+            chunk = fh_in.read(333)
+    assert b"".join(chunks) == data
+
+    # Test case 3: A corrupt block read on a worker thread exits
+    corrupt = bytearray(_make_bgzf_block(data[:1000]))
+    corrupt[-8] ^= 1
+    bgzf_path.write_bytes(_make_bgzf_block(data[1000:2000]) + bytes(corrupt))
+    with BgzfReader(bgzf_path, num_threads=2) as fh_in:
+        with pytest.raises(SystemExit):
+            fh_in.read()
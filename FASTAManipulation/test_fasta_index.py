@@ -0,0 +1,109 @@
+"""
+A test script for the fasta_index.py module.
+"""
+import pytest
+from fasta_index import (FaiEntry, build_fasta_index, write_fai, read_fai, get_fai_path,
+                         get_fasta_index, parse_region, fetch_sequence, fetch_region)
+
+FASTA_CONTENT = (">chr1 first chromosome\n"
+                 "ACGTA\n"
+                 "CGTAC\n"
+                 "GT\n"
+                 ">chr2\n"
+                 "NNNNNNNN\n"
+                 ">empty\n")
+
+
+@pytest.fixture(name="fasta_path")
+def fixture_fasta_path(tmp_path):
+    """
+    A small wrapped FASTA file
+    """
+
+    file_path = tmp_path / "test.fasta"
+    file_path.write_bytes(FASTA_CONTENT.encode("utf-8"))
+    return file_path
+
+
+def test_build_fasta_index(fasta_path):
+    """
+    testing the build_fasta_index() function
+    """
+
+    # Test case 1: Same columns samtools faidx writes
+    assert build_fasta_index(fasta_path) == [FaiEntry("chr1", 12, 23, 5, 6),
+                                             FaiEntry("chr2", 8, 44, 8, 9),
+                                             FaiEntry("empty", 0, 60, 0, 0)]
+
+    # Test case 2: Uneven line lengths inside a record cannot be indexed
+    fasta_path.write_bytes(b">chr1\nACG\nACGTA\nAC\n")
+    with pytest.raises(SystemExit):
+        build_fasta_index(fasta_path)
+
+    # Test case 3: CRLF line endings
+    fasta_path.write_bytes(b">chr1\r\nACGT\r\nAC\r\n")
+    assert build_fasta_index(fasta_path) == [FaiEntry("chr1", 6, 7, 4, 6)]
+
+
+def test_write_and_read_fai(fasta_path):
+    """
+    testing the write_fai() and read_fai() functions
+    """
+
+    entries = build_fasta_index(fasta_path)
+    fai_path = get_fai_path(fasta_path)
+    write_fai(entries, fai_path)
+
+    with open(fai_path, "r", encoding="utf-8") as fh_in:
+        assert fh_in.readline() == "chr1\t12\t23\t5\t6\n"
+    assert list(read_fai(fai_path).values()) == entries
+
+
+def test_get_fasta_index(fasta_path):
+    """
+    testing the get_fasta_index() function
+    """
+
+    # Test case 1: No index and create is off
+    assert get_fasta_index(fasta_path) is None
+
+    # Test case 2: Index is built and written on request, then reused
+    index = get_fasta_index(fasta_path, create=True)
+    assert list(index) == ["chr1", "chr2", "empty"]
+    assert get_fasta_index(fasta_path) == index
+
+
+def test_parse_region():
+    """
+    testing the parse_region() function
+    """
+
+    assert parse_region("chr1") == ("chr1", None, None)
+    assert parse_region("chr1:5") == ("chr1", 5, None)
+    assert parse_region("chr1:1,000-2,000") == ("chr1", 1000, 2000)
+    assert parse_region("scaffold:unplaced") == ("scaffold:unplaced", None, None)
+
+
+def test_fetch_sequence(fasta_path):
+    """
+    testing the fetch_sequence() and fetch_region() functions
+    """
+
+    index = get_fasta_index(fasta_path, create=True)
+
+    with open(fasta_path, "rb") as fh_in:
+        # Test case 1: Whole record, newlines removed
+        assert fetch_sequence(fh_in, index["chr1"]) == b"ACGTACGTACGT"
+
+        # Test case 2: Subrange spanning a line break
+        assert fetch_sequence(fh_in, index["chr1"], 4, 7) == b"TACG"
+
+        # Test case 3: Range past the end is clipped
+        assert fetch_sequence(fh_in, index["chr1"], 11, 100) == b"GT"
+
+        # Test case 4: Empty record
+        assert fetch_sequence(fh_in, index["empty"]) == b""
+
+    assert fetch_region(fasta_path, "chr2:2-3") == b"NN"
+    with pytest.raises(SystemExit):
+        fetch_region(fasta_path, "chr3")
@@ -0,0 +1,197 @@
+"""
+A test script for the fasta_io.py module.
+"""
+import gzip
+import io
+import types
+
+import pytest
+from fasta_io import (find_record_boundaries, iter_raw_records, iter_record_spans, read_fasta_file,
+                      read_fasta_mmap, read_fasta_range, read_fasta_records)
+from twobit import write_twobit
+
+
+def test_read_fasta_records():
+    """
+    testing the read_fasta_records() function
+    """
+
+    # Test case 1: Returns a lazy generator, not a list
+    records = read_fasta_records([">Header1\n", "ACGT\n"])
+    assert isinstance(records, types.GeneratorType)
+
+    # Test case 2: Multi-line sequences are joined per record
+    lines = [">Header1 desc\n", "ACGT\n", "AGCT\n", ">Header2\n", "GTCAGT\n", "CAGTC\n"]
+    assert list(read_fasta_records(lines)) == [("Header1 desc", "ACGTAGCT"),
+                                               ("Header2", "GTCAGTCAGTC")]
+
+    # Test case 3: Empty records and blank lines are kept as empty sequences
+    lines = [">Header1\n", "\n", "   \n", ">Header2\n", "  \n", "GTCAGT\n"]
+    assert list(read_fasta_records(lines)) == [("Header1", ""), ("Header2", "GTCAGT")]
+
+    # Test case 4: Empty input yields nothing
+    assert not list(read_fasta_records([]))
+
+    # Test case 5: Sequence before the first header is not FASTA
+    with pytest.raises(SystemExit):
+        list(read_fasta_records(["ACGT\n", ">Header2\n", "GTCAGT\n"]))
+
+
+def test_read_fasta_records_streams(tmp_path):
+    """
+    testing that read_fasta_records() yields records before reading the whole file
+    """
+
+    file_path = tmp_path / "test.fasta"
+    file_path.write_text(">Header1\nACGT\n>Header2\nGG\n", encoding="utf-8")
+
+    with open(file_path, "r", encoding="utf-8") as fh_in:
+        records = read_fasta_records(fh_in)
+        assert next(records) == ("Header1", "ACGT")
+        assert next(records) == ("Header2", "GG")
+        with pytest.raises(StopIteration):
+            next(records)
+
+
+def test_find_record_boundaries(tmp_path):
+    """
+    testing the find_record_boundaries() function
+    """
+
+    file_path = tmp_path / "test.fasta"
+    content = ">Header1\nACGTACGT\nACGT\n>Header2\nGG\n>Header3\nTTTTTTTTTT\n"
+    file_path.write_text(content, encoding="utf-8")
+
+    # Test case 1: Every range starts on a header and the ranges tile the file
+    for num_shards in range(1, 12):
+        shards = find_record_boundaries(file_path, num_shards)
+        assert shards[0][0] == 0
+        assert shards[-1][1] == len(content)
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            assert end == start
+            assert content[start] == ">"
+
+    # Test case 2: Never more ranges than records
+    assert len(find_record_boundaries(file_path, 50)) == 3
+
+    # Test case 3: Empty file
+    empty_path = tmp_path / "empty.fasta"
+    empty_path.write_text("", encoding="utf-8")
+    assert find_record_boundaries(empty_path, 4) == [(0, 0)]
+
+
+def test_read_fasta_range(tmp_path):
+    """
+    testing the read_fasta_range() function
+    """
+
+    file_path = tmp_path / "test.fasta"
+    file_path.write_text(">Header1\nACGT\nACGT\n>Header2\nGG\n>Header3\nTT\n", encoding="utf-8")
+    expected = [("Header1", "ACGTACGT"), ("Header2", "GG"), ("Header3", "TT")]
+
+    # Test case 1: Concatenated ranges give back every record exactly once
+    for num_shards in range(1, 6):
+        records = []
+        for start, end in find_record_boundaries(file_path, num_shards):
+            records.extend((header, bytes(sequence).decode("utf-8"))
+                           for header, sequence in read_fasta_range(file_path, start, end))
+        assert records == expected
+
+    # Test case 2: A range ending mid-record still returns the whole record
+    assert [header for header, _ in read_fasta_range(file_path, 0, 12)] == ["Header1"]
+
+
+def test_iter_record_spans():
+    """
+    testing the iter_record_spans() function
+    """
+
+    # Test case 1: Offsets of ">" and of the sequence lines
+    buffer = b">H1\nAC\nGT\n>H2\nTT\n"
+    assert list(iter_record_spans(buffer)) == [(0, 4, 10), (10, 14, 17)]
+
+    # Test case 2: ">" inside a line is not a header
+    assert list(iter_record_spans(b">H1\nA>C\n")) == [(0, 4, 8)]
+
+    # Test case 3: Data before the first header
+    with pytest.raises(SystemExit):
+        list(iter_record_spans(b"ACGT\n>H1\nAC\n"))
+
+
+def test_iter_raw_records():
+    """
+    testing the iter_raw_records() function
+    """
+
+    # Test case 1: Records split at every "\n>", whatever the block boundaries
+    data = b"\n>H1 desc\nAC\nGT\n>H2\n\n>H3\nA>C\r\n"
+    for block_size in range(1, len(data) + 1):
+        assert list(iter_raw_records(io.BytesIO(data), block_size)) == [b"H1 desc\nAC\nGT", b"H2\n", b"H3\nA>C\r\n"]
+
+    # Test case 2: Empty input yields nothing, data before the first header is not FASTA
+    assert not list(iter_raw_records(io.BytesIO(b"")))
+    with pytest.raises(SystemExit):
+        list(iter_raw_records(io.BytesIO(b"ACGT\n>H1\nAC\n"), 2))
+
+
+def test_read_fasta_mmap(tmp_path):
+    """
+    testing the read_fasta_mmap() function
+    """
+
+    file_path = tmp_path / "test.fasta"
+    file_path.write_bytes(b">Header1 desc\r\nACGT\r\nAG \r\n\n>Header2\nGTCAGT\n>Header3\n>Header4\nA")
+
+    with open(file_path, "rb") as fh_in:
+        records = [(header, sequence, bytes(sequence))
+                   for header, sequence in read_fasta_mmap(fh_in)]
+
+    # Test case 1: Same records as the line-based reader
+    with open(file_path, "r", encoding="utf-8") as fh_in:
+        expected = [(header, sequence.encode("utf-8")) for header, sequence in read_fasta_records(fh_in)]
+    assert [(header, sequence) for header, _, sequence in records] == expected
+
+    # Test case 2: Single-line records are zero-copy views of the file
+    assert isinstance(records[1][1], memoryview)
+    assert isinstance(records[0][1], bytes)
+
+    # Test case 3: Empty file
+    empty_path = tmp_path / "empty.fasta"
+    empty_path.write_bytes(b"")
+    with open(empty_path, "rb") as fh_in:
+        assert not list(read_fasta_mmap(fh_in))
+
+
+def test_read_fasta_file(tmp_path):
+    """
+    testing the read_fasta_file() function
+    """
+
+    data = b">Header1 desc\nACGT\nAG\n>Header2\nGTCA\n"
+    plain_path = tmp_path / "test.fasta"
+    plain_path.write_bytes(data)
+    gzip_path = tmp_path / "test.fasta.gz"
+    gzip_path.write_bytes(gzip.compress(data))
+
+    # Test case 1: Plain and gzip files give the same records
+    expected = [("Header1 desc", b"ACGTAG"), ("Header2", b"GTCA")]
+    assert [(header, bytes(sequence)) for header, sequence in read_fasta_file(plain_path)] == expected
+    assert [(header, sequence.encode("utf-8")) for header, sequence in read_fasta_file(gzip_path)] == expected
+
+    # Test case 2: .2bit files are read through the packed reader
+    twobit_path = tmp_path / "test.2bit"
+    write_twobit(read_fasta_file(plain_path), twobit_path)
+    assert list(read_fasta_file(twobit_path)) == [("Header1", b"ACGTAG"), ("Header2", b"GTCA")]
+
+    # Test case 3: Whitespace inside sequences and non-UTF-8 headers are
+    # handled the same way for plain and gzip files
+    data = b">a\nAC GT\n>b\nAC GT\nAA\n>c\xff bad\n\tGG\tC \n"
+    plain_path.write_bytes(data)
+    gzip_path.write_bytes(gzip.compress(data))
+    expected = [("a", b"ACGT"), ("b", b"ACGTAA"), ("c\ufffd bad", b"GGC")]
+    assert [(header, bytes(sequence)) for header, sequence in read_fasta_file(plain_path)] == expected
+    assert [(header, sequence.encode("utf-8")) for header, sequence in read_fasta_file(gzip_path)] == expected
+
+    # Test case 4: Missing file exits
+    with pytest.raises(SystemExit):
+        list(read_fasta_file(tmp_path / "missing.fasta"))
@@ -0,0 +1,102 @@
+"""
+A test script for the fasta_pipeline.py module.
+"""
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+import fasta_pipeline
+from fasta_pipeline import (Consumer, get_length_histogram, iter_record_batches, run_pipeline,
+                            write_length_histogram)
+
+COMBINED = (">101M:A:sequence\nMVLSEGEWQLVLHVWAKVEAD\n"
+            ">101M:A:secstr\n  HHHHHHH  HHHH\n EEE  \n"
+            ">NC_1 chromosome\nACGTNN\nGGCC\n")
+
+
+def _collect(records, _args):
+    """
+    Consumer keeping what it receives
+    """
+
+    return [(header, bytes(sequence) if not isinstance(sequence, str) else sequence)
+            for header, sequence in records]
+
+
+def test_iter_record_batches(monkeypatch, tmp_path):
+    """
+    testing the iter_record_batches() function
+    """
+
+    monkeypatch.setattr(fasta_pipeline, "_BATCH_SIZE", 8)
+    file_path = tmp_path / "input.fasta"
+    file_path.write_text(COMBINED)
+
+    batches = list(iter_record_batches(fasta_pipeline.read_fasta_file(str(file_path))))
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+    assert all(isinstance(sequence, bytes) for batch in batches for _, sequence in batch)
+    assert batches[2] == [("NC_1 chromosome", b"ACGTNNGGCC")]
+
+
+def test_run_pipeline(monkeypatch):
+    """
+    testing the run_pipeline() function
+    """
+
+    monkeypatch.setattr(fasta_pipeline, "_BATCH_SIZE", 4)
+    monkeypatch.setattr(fasta_pipeline, "_QUEUE_BATCHES", 1)
+    records = [("r1", b" AC GT "), ("r2", "GG CC"), ("r3", b"")] * 50
+
+    # Test case 1: Every consumer sees every record, whitespace only where asked for
+    kept, stripped = run_pipeline(iter(records), [Consumer(_collect, True), Consumer(_collect, False)],
+                                  None, keep_whitespace=True)
+    assert kept == records
+    assert stripped[:3] == [("r1", b"ACGT"), ("r2", "GGCC"), ("r3", b"")]
+    assert len(stripped) == 150
+
+    # Test case 2: A failing consumer raises instead of blocking the reader
+    def fail(records, _args):
+        next(iter(records))
+        raise ValueError("consumer failed")
+
+    with pytest.raises(ValueError, match="consumer failed"):
+        run_pipeline(iter(records), [Consumer(fail, False), Consumer(_collect, False)], None)
+    assert threading.active_count() == 1
+
+
+def test_length_histogram(tmp_path):
+    """
+    testing the get_length_histogram() and write_length_histogram() functions
+    """
+
+    histogram = get_length_histogram(np.array([0, 5, 99, 100, 350]), 100)
+    assert histogram.tolist() == [3, 1, 0, 1]
+    assert len(get_length_histogram(np.zeros(0, dtype=np.int64), 100)) == 0
+
+    output = tmp_path / "histogram.txt"
+    with open(output, "w", encoding="utf-8") as fh_out:
+        assert write_length_histogram(histogram, 100, fh_out) == 3
+    assert output.read_text().splitlines() == ["Min_length\tMax_length\tRecords",
+                                               "0\t99\t3", "100\t199\t1", "300\t399\t1"]
+
+
+def test_main(monkeypatch, tmp_path):
+    """
+    testing one pass of stats, split and lengths against the stand-alone tools
+    """
+
+    infile = tmp_path / "input.fasta"
+    infile.write_text(COMBINED)
+    monkeypatch.setattr(sys, "argv", ["fasta_pipeline.py", "-i", str(infile), "-c", "stats", "-c", "split",
+                                      "-c", "lengths", "-d", str(tmp_path), "-b", "10"])
+    fasta_pipeline.main()
+
+    assert (tmp_path / "pdb_protein.fasta").read_text() == \
+        ">101M:A:sequence\nMVLSEGEWQLVLHVWAKVEAD\n>NC_1 chromosome\nACGTNNGGCC\n"
+    assert (tmp_path / "pdb_ss.fasta").read_text() == ">101M:A:secstr\n  HHHHHHH  HHHH EEE  \n"
+    stats = (tmp_path / "nt_stats.txt").read_text().splitlines()
+    assert stats[3] == "3\tNC_1\t1\t3\t3\t1\t2\t10\t60.0"
+    assert (tmp_path / "length_histogram.txt").read_text().splitlines()[1:] == \
+        ["10\t19\t2", "20\t29\t1"]
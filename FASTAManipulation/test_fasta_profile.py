@@ -0,0 +1,134 @@
+"""
+A test script for the fasta_profile.py module.
+"""
+import json
+import sys
+import types
+
+import pytest
+
+import fasta_profile
+import nt_fasta_stats
+from fasta_profile import StageProfiler
+
+
+@pytest.fixture(name="clock")
+def fixture_clock(monkeypatch):
+    """
+    A fake clock standing in for time.perf_counter() in fasta_profile.py,
+    it only moves when a test adds to clock.now
+    """
+
+    fake_clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(fasta_profile.time, "perf_counter", lambda: fake_clock.now)
+    return fake_clock
+
+
+def test_stage_self_time(clock):
+    """
+    testing that nested stages are charged their own time only
+    """
+
+    def parse():
+        for i in range(3):
+            clock.now += 1.0
+            yield i
+
+    def compute(records):
+        for record in records:
+            clock.now += 2.0
+            yield record * 10
+
+    profiler = StageProfiler("test", enabled=True)
+    profiler.start()
+    with profiler.stage("write"):
+        rows = []
+        for row in profiler.wrap("compute", compute(profiler.wrap("parse", parse()))):
+            clock.now += 0.5
+            rows.append(row)
+    profiler.add_records("write", len(rows))
+    clock.now += 4.0
+    profiler.stop()
+
+    summary = profiler.get_summary()
+    assert rows == [0, 10, 20]
+    assert summary["wall_seconds"] == pytest.approx(14.5)
+    assert list(summary["stages"]) == ["write", "compute", "parse"]
+    assert summary["stages"]["parse"]["seconds"] == pytest.approx(3.0)
+    assert summary["stages"]["compute"]["seconds"] == pytest.approx(6.0)
+    assert summary["stages"]["write"]["seconds"] == pytest.approx(1.5)
+    assert summary["stages"]["parse"]["records"] == 3
+    assert summary["stages"]["compute"]["records_per_s"] == pytest.approx(0.5)
+    assert summary["stages"]["write"]["records"] == 3
+
+
+def test_unused_and_disabled_stages(clock):
+    """
+    testing that a wrapped iterable that is never read is not reported, and
+    that a disabled profiler changes nothing
+    """
+
+    profiler = StageProfiler("test")
+    profiler.start()
+    profiler.wrap("parse", iter([1, 2]))
+    with profiler.stage("write"):
+        clock.now += 1.0
+    profiler.stop()
+    assert list(profiler.get_summary()["stages"]) == ["write"]
+
+    records = [1, 2]
+    disabled = StageProfiler("test", enabled=False)
+    disabled.start()
+    assert disabled.wrap("parse", records) is records
+    with disabled.stage("write"):
+        pass
+    disabled.stop()
+    assert not disabled.get_summary()["stages"]
+
+
+def test_profile_memory_and_cprofile(tmp_path):
+    """
+    testing tracemalloc peaks and the cProfile dump
+    """
+
+    cprofile_file = tmp_path / "run.prof"
+    profiler = StageProfiler("test", trace_memory=True, cprofile_file=str(cprofile_file))
+    profiler.start()
+    blocks = list(profiler.wrap("parse", (bytes(1 << 20) for _ in range(4))))
+    profiler.stop()
+
+    summary = profiler.get_summary()
+    assert len(blocks) == 4
+    assert summary["stages"]["parse"]["peak_traced_bytes"] >= 4 << 20
+    assert summary["peak_rss_bytes"] > 0
+    assert cprofile_file.stat().st_size > 0
+
+
+def test_nt_fasta_stats_profile(tmp_path, monkeypatch, capsys):
+    """
+    testing --profile and --profile-json on the nt_fasta_stats.py command line
+    """
+
+    infile = tmp_path / "input.fasta"
+    infile.write_text(">seq1\nACGT\n>seq2\nGGNN\nCC\n")
+    outfile = tmp_path / "stats.txt"
+    json_file = tmp_path / "profile.json"
+
+    # Test case 1: JSON summary written to a file, the table is unchanged
+    monkeypatch.setattr(sys, "argv", ["nt_fasta_stats.py", "-i", str(infile), "-o", str(outfile),
+                                      "--profile-json", str(json_file)])
+    nt_fasta_stats.main()
+    summary = json.loads(json_file.read_text())
+    assert summary["tool"] == "nt_fasta_stats"
+    assert summary["input_bytes"] == infile.stat().st_size
+    assert sorted(summary["stages"]) == ["compute", "parse", "write"]
+    assert all(stage["records"] == 2 for stage in summary["stages"].values())
+    assert [stage for stage, result in summary["stages"].items() if "bytes_per_s" in result] == ["parse"]
+    assert len(outfile.read_text().splitlines()) == 3
+
+    # Test case 2: One line of JSON on stderr
+    monkeypatch.setattr(sys, "argv", ["nt_fasta_stats.py", "-i", str(infile), "-o", str(outfile), "--profile"])
+    nt_fasta_stats.main()
+    line = capsys.readouterr().err.strip()
+    assert line.startswith("profile: ")
+    assert json.loads(line[len("profile: "):])["stages"]["parse"]["records"] == 2
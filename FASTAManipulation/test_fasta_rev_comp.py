@@ -0,0 +1,71 @@
+"""
+A test script for the fasta_rev_comp.py module.
+"""
+import io
+
+from fasta_rev_comp import (iter_reverse_complement_chunks, reverse_complement, reverse_complement_mmap,
+                            reverse_complement_records, write_wrapped)
+
+
+def test_reverse_complement():
+    """
+    testing the reverse_complement() function
+    """
+
+    # Test case 1: IUPAC codes and case are kept
+    assert reverse_complement("ACGTRYKMBVDHNU") == b"ANDHBVKMRYACGT"
+    assert reverse_complement(b"acgtn") == b"nacgt"
+
+    # Test case 2: Whitespace is dropped, other bytes are copied
+    assert reverse_complement(memoryview(b"AC\nG-T\r\n")) == b"A-CGT"
+
+
+def test_iter_reverse_complement_chunks():
+    """
+    testing the iter_reverse_complement_chunks() function
+    """
+
+    buffer = b">x\nAACC\nGGTA\n>y\n"
+    chunks = list(iter_reverse_complement_chunks(buffer, 3, 13, chunk_size=3))
+    assert len(chunks) == 4
+    assert b"".join(chunks) == b"TACCGGTT"
+
+
+def test_write_wrapped():
+    """
+    testing the write_wrapped() function
+    """
+
+    # Test case 1: Lines do not depend on the chunk sizes
+    output_file = io.BytesIO()
+    assert write_wrapped([b"ACG", b"", b"TACGTA", b"C"], output_file, 4) == 10
+    assert output_file.getvalue() == b"ACGT\nACGT\nAC\n"
+
+    # Test case 2: Unwrapped output
+    output_file = io.BytesIO()
+    write_wrapped([b"ACG", b"T"], output_file, 0)
+    assert output_file.getvalue() == b"ACGT\n"
+
+    # Test case 3: Empty sequence writes nothing
+    output_file = io.BytesIO()
+    assert write_wrapped([], output_file, 4) == 0
+    assert output_file.getvalue() == b""
+
+
+def test_reverse_complement_mmap(tmp_path, monkeypatch):
+    """
+    testing the reverse_complement_mmap() function
+    """
+
+    monkeypatch.setattr("fasta_rev_comp._CHUNK_SIZE", 5)
+    file_path = tmp_path / "test.fasta"
+    file_path.write_bytes(b">seq1 desc\r\nAACCG\r\nTTNa\r\n>empty\n>seq2\nAC")
+
+    # Test case 1: Same output as reverse complementing whole records
+    output_file = io.BytesIO()
+    with open(file_path, "rb") as fh_in:
+        assert reverse_complement_mmap(fh_in, output_file, 4) == 3
+    expected_file = io.BytesIO()
+    reverse_complement_records([("seq1 desc", "AACCGTTNa"), ("empty", ""), ("seq2", "AC")], expected_file, 4)
+    assert output_file.getvalue() == expected_file.getvalue()
+    assert output_file.getvalue() == b">seq1 desc\ntNAA\nCGGT\nT\n>empty\n>seq2\nGT\n"
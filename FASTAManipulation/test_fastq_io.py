@@ -0,0 +1,67 @@
+"""
+A test script for the fastq_io.py module.
+"""
+import gzip
+import io
+
+import pytest
+
+from fastq_io import FastqBatch, open_fastq, read_fastq_batches, read_fastq_records
+
+READS = [("read1/1", b"ACGTN", b"IIII#"), ("read2 lane=2", b"GG", b"!~"), ("read3", b"", b"")]
+FASTQ_CONTENT = b"".join(b"@%s\n%s\n+\n%s\n" % (name.encode(), sequence, quality)
+                         for name, sequence, quality in READS)
+
+
+def test_read_fastq_batches():
+    """
+    testing the read_fastq_batches() function
+    """
+
+    # Test case 1: One batch for a small file
+    batches = list(read_fastq_batches(io.BytesIO(FASTQ_CONTENT)))
+    assert batches == [FastqBatch(["read1/1", "read2 lane=2", "read3"], [b"ACGTN", b"GG", b""],
+                                  [b"IIII#", b"!~", b""])]
+
+    # Test case 2: Records split across blocks of any size come out whole
+    for block_size in [1, 3, 7, 16, 1000]:
+        records = [read for batch in read_fastq_batches(io.BytesIO(FASTQ_CONTENT * 3), block_size)
+                   for read in zip(*batch)]
+        assert records == READS * 3
+
+    # Test case 3: Windows line endings, no final newline and trailing blank lines
+    for content in [FASTQ_CONTENT.replace(b"\n", b"\r\n"), FASTQ_CONTENT[:-1], FASTQ_CONTENT + b"\n\n"]:
+        assert list(read_fastq_records(io.BytesIO(content))) == READS
+
+    # Test case 4: Empty file
+    assert list(read_fastq_batches(io.BytesIO(b""))) == []
+
+
+def test_read_fastq_batches_malformed(capsys):
+    """
+    testing that malformed records exit with the read number
+    """
+
+    malformed = [FASTQ_CONTENT.replace(b"@read2", b">read2"),
+                 FASTQ_CONTENT.replace(b"\n!~\n", b"\n!\n"),
+                 FASTQ_CONTENT + b"@read4\nACGT\n"]
+    for content, read_number in zip(malformed, [2, 2, 4]):
+        with pytest.raises(SystemExit) as error:
+            list(read_fastq_batches(io.BytesIO(content)))
+        assert error.value.code == 1
+        assert f"Malformed FASTQ record {read_number}" in capsys.readouterr().out
+
+
+def test_open_fastq(tmp_path, capsys):
+    """
+    testing the open_fastq() function
+    """
+
+    gzip_path = tmp_path / "reads.fastq.gz"
+    gzip_path.write_bytes(gzip.compress(FASTQ_CONTENT))
+    with open_fastq(gzip_path) as fh_in:
+        assert list(read_fastq_records(fh_in)) == READS
+
+    with pytest.raises(SystemExit):
+        open_fastq(tmp_path / "missing.fastq")
+    assert "No such file" in capsys.readouterr().out
@@ -0,0 +1,127 @@
+"""
+A test script for the fastq_stats.py module.
+"""
+import io
+import sys
+
+import numpy as np
+import pytest
+
+import nt_fasta_stats
+from fastq_io import FastqBatch
+from fastq_stats import (collect_fastq_stats, get_batch_stats, get_empty_stats, merge_fastq_stats,
+                         write_fastq_report)
+
+
+def _random_batch(rng, num_reads, min_length, max_length):
+    """
+    Batch of random reads with Phred+33 qualities
+    """
+
+    sequences = []
+    qualities = []
+    for _ in range(num_reads):
+        length = int(rng.integers(min_length, max_length + 1))
+        sequences.append(bytes(rng.choice(list(b"ACGTN"), size=length).astype(np.uint8)))
+        qualities.append(bytes((rng.integers(0, 42, size=length) + 33).astype(np.uint8)))
+    return FastqBatch([f"r{i}" for i in range(num_reads)], sequences, qualities)
+
+
+def _cycle_means_naive(batches):
+    """
+    Mean quality per cycle, one base at a time
+    """
+
+    sums = {}
+    counts = {}
+    for batch in batches:
+        for quality in batch.qualities:
+            for cycle, score in enumerate(quality):
+                sums[cycle] = sums.get(cycle, 0) + score - 33
+                counts[cycle] = counts.get(cycle, 0) + 1
+    return [sums[cycle] / counts[cycle] for cycle in sorted(sums)]
+
+
+def test_get_batch_stats():
+    """
+    testing the get_batch_stats() function
+    """
+
+    batch = FastqBatch(["a", "b", "c"], [b"ACGT", b"GGN", b""], [b"II#I", b"+++", b""])
+    stats = get_batch_stats(batch)
+    assert stats.base_counts[ord("G")] == 3
+    assert stats.length_counts.tolist() == [1, 0, 0, 1, 1]
+    assert stats.cycle_bases.tolist() == [2, 2, 2, 1]
+    assert stats.cycle_quality_sums.tolist() == [40 + 10, 40 + 10, 2 + 10, 40]
+    # Read means 30.5 and 10, rounded down; the empty read has none
+    assert np.flatnonzero(stats.read_quality_counts).tolist() == [10, 30]
+
+    # Phred+64 qualities decode to the same scores
+    shifted = FastqBatch(batch.names, batch.sequences, [bytes(byte + 31 for byte in quality)
+                                                        for quality in batch.qualities])
+    assert get_batch_stats(shifted, 64).cycle_quality_sums.tolist() == stats.cycle_quality_sums.tolist()
+
+
+def test_get_batch_stats_bad_offset(capsys):
+    """
+    testing that Phred+33 qualities read as Phred+64 exit with a message
+    """
+
+    with pytest.raises(SystemExit):
+        get_batch_stats(FastqBatch(["a"], [b"AC"], [b"#I"]), 64)
+    assert "--phred-offset" in capsys.readouterr().out
+
+
+def test_collect_fastq_stats():
+    """
+    testing that batches of equal and mixed lengths agree with a naive count
+    """
+
+    rng = np.random.default_rng(5)
+    batches = [_random_batch(rng, 40, 30, 30), _random_batch(rng, 25, 0, 45), _random_batch(rng, 10, 50, 50)]
+    stats = collect_fastq_stats(batches)
+
+    assert int(stats.length_counts.sum()) == 75
+    assert int(stats.base_counts.sum()) == sum(len(sequence) for batch in batches for sequence in batch.sequences)
+    assert (stats.cycle_quality_sums / stats.cycle_bases).tolist() == pytest.approx(_cycle_means_naive(batches))
+    assert int(stats.read_quality_counts.sum()) == sum(1 for batch in batches for sequence in batch.sequences
+                                                       if sequence)
+
+    # Merging is order independent and the empty stats are neutral
+    reverse = merge_fastq_stats(get_batch_stats(batches[2]),
+                                merge_fastq_stats(get_batch_stats(batches[1]), get_batch_stats(batches[0])))
+    for merged, expected in zip(merge_fastq_stats(reverse, get_empty_stats()), stats):
+        assert merged.tolist() == expected.tolist()
+
+
+def test_write_fastq_report():
+    """
+    testing the write_fastq_report() function
+    """
+
+    batch = FastqBatch(["a", "b"], [b"ACGT", b"GGN"], [b"II#I", b"+++"])
+    output = io.StringIO()
+    assert write_fastq_report(get_batch_stats(batch), output) == 2
+    lines = output.getvalue().splitlines()
+    assert lines[:12] == ["# Summary", "Reads\t2", "Bases\t7", "A's\t1", "G's\t3", "C's\t1", "T's\t1", "N's\t1",
+                          "GC%\t57.1", "Min_length\t3", "Max_length\t4", "Mean_length\t3.5"]
+    assert lines[lines.index("Cycle\tMean_quality\tBases") + 1] == "1\t25.00\t2"
+    assert lines[-2:] == ["10\t1", "30\t1"]
+
+    # No reads at all
+    output = io.StringIO()
+    assert write_fastq_report(get_empty_stats(), output) == 0
+    assert "Reads\t0" in output.getvalue()
+
+
+def test_nt_fasta_stats_fastq(tmp_path, monkeypatch):
+    """
+    testing the --fastq option of nt_fasta_stats.py
+    """
+
+    infile = tmp_path / "reads.fastq"
+    infile.write_bytes(b"@a\nACGT\n+\nII#I\n@b\nGGN\n+\n+++\n")
+    outfile = tmp_path / "report.txt"
+    monkeypatch.setattr(sys, "argv", ["nt_fasta_stats.py", "--fastq", "-i", str(infile), "-o", str(outfile)])
+    nt_fasta_stats.main()
+    assert outfile.read_text().splitlines()[1:3] == ["Reads\t2", "Bases\t7"]
@@ -0,0 +1,108 @@
+"""
+A test script for the gap_finder.py module.
+"""
+import io
+import re
+
+import numpy as np
+from gap_finder import RUN_TYPES, find_record_runs, find_twobit_runs, get_record_runs, write_runs_bed
+from twobit import write_twobit
+
+_RECORDS = [("scaffold1 assembled", "NNACGTNNNNacgtnnGGTTNaN"),
+            ("scaffold2", ""),
+            ("scaffold3", b"acgtRYnnnnACGT")]
+
+
+def _get_naive_runs(sequence, pattern, min_length=1):
+    """
+    Runs found with a regular expression, for comparison
+    """
+
+    if isinstance(sequence, bytes):
+        sequence = sequence.decode()
+    matches = [match.span() for match in re.finditer(pattern, sequence) if match.end() - match.start() >= min_length]
+    return [start for start, _ in matches], [end for _, end in matches]
+
+
+def test_get_record_runs():
+    """
+    testing the get_record_runs() function
+    """
+
+    # Test case 1: N runs in either case, soft-masked runs of any lowercase letter
+    starts, ends = get_record_runs("NNACGTNNNNacgtnnGGTTNaN", RUN_TYPES["gap"])
+    assert (starts.tolist(), ends.tolist()) == ([0, 6, 14, 20, 22], [2, 10, 16, 21, 23])
+    starts, ends = get_record_runs(b"NNACGTNNNNacgtnnGGTTNaN", RUN_TYPES["soft_mask"])
+    assert (starts.tolist(), ends.tolist()) == ([10, 21], [16, 22])
+
+    # Test case 2: runs shorter than the minimum length are skipped
+    starts, ends = get_record_runs("NNACGTNNNNacgtnnGGTTNaN", RUN_TYPES["gap"], min_length=3)
+    assert (starts.tolist(), ends.tolist()) == ([6], [10])
+
+    # Test case 3: empty sequence and sequence without runs
+    for sequence in ("", "ACGT"):
+        starts, ends = get_record_runs(sequence, RUN_TYPES["gap"])
+        assert not starts.tolist() and not ends.tolist()
+
+
+def test_get_record_runs_blocks():
+    """
+    testing that runs crossing block boundaries are joined
+    """
+
+    rng = np.random.default_rng(7)
+    sequence = bytes(rng.choice(np.frombuffer(b"ACNNnna", dtype=np.uint8), size=5000))
+    for block_size in (1, 2, 3, 64, 5000):
+        for run_type, pattern in (("gap", "[Nn]+"), ("soft_mask", "[a-z]+")):
+            starts, ends = get_record_runs(sequence, RUN_TYPES[run_type], 2, block_size)
+            assert (starts.tolist(), ends.tolist()) == _get_naive_runs(sequence, pattern, 2)
+
+
+def test_find_record_runs():
+    """
+    testing the find_record_runs() function
+    """
+
+    record_runs = list(find_record_runs(_RECORDS, ["gap"]))
+    assert [chrom for chrom, _ in record_runs] == ["scaffold1", "scaffold2", "scaffold3"]
+    assert [list(runs) for _, runs in record_runs] == [["gap"]] * 3
+    starts, ends = record_runs[2][1]["gap"]
+    assert (starts.tolist(), ends.tolist()) == ([6], [10])
+
+
+def test_find_twobit_runs(tmp_path):
+    """
+    testing the find_twobit_runs() function
+    """
+
+    file_name = str(tmp_path / "test.2bit")
+    write_twobit(_RECORDS, file_name)
+    record_runs = list(find_twobit_runs(file_name, ["gap", "soft_mask"], min_length=2))
+    assert [chrom for chrom, _ in record_runs] == ["scaffold1", "scaffold2", "scaffold3"]
+
+    # Test case 1: the runs of the headers match those of the sequences
+    starts, ends = record_runs[0][1]["soft_mask"]
+    assert (starts.tolist(), ends.tolist()) == ([10], [16])
+    starts, ends = record_runs[0][1]["gap"]
+    assert (starts.tolist(), ends.tolist()) == ([0, 6, 14], [2, 10, 16])
+
+    # Test case 2: other ambiguity codes are stored as N in a .2bit file
+    starts, ends = record_runs[2][1]["gap"]
+    assert (starts.tolist(), ends.tolist()) == ([4], [10])
+
+
+def test_write_runs_bed():
+    """
+    testing the write_runs_bed() function
+    """
+
+    output = io.StringIO()
+    totals = write_runs_bed(find_record_runs(_RECORDS, ["gap", "soft_mask"], min_length=2), output)
+    assert output.getvalue() == ("scaffold1\t0\t2\tgap\n"
+                                 "scaffold1\t6\t10\tgap\n"
+                                 "scaffold1\t10\t16\tsoft_mask\n"
+                                 "scaffold1\t14\t16\tgap\n"
+                                 "scaffold3\t0\t4\tsoft_mask\n"
+                                 "scaffold3\t6\t10\tgap\n"
+                                 "scaffold3\t6\t10\tsoft_mask\n")
+    assert totals == {"gap": (4, 12), "soft_mask": (3, 14)}
@@ -0,0 +1,78 @@
+"""
+A test script for the gc_windows.py module.
+"""
+import random
+
+import gc_windows
+from gc_windows import WindowOptions, get_base_mask, get_window_counts, get_window_fractions, write_bedgraph
+
+
+def test_get_window_counts(monkeypatch):
+    """
+    testing the get_window_counts() function
+    """
+
+    # Test case 1: Overlapping windows, the last ones are cut short
+    blocks = list(get_window_counts(b"GGCCAATT", get_base_mask("GC"), 4, 3))
+    assert len(blocks) == 1
+    starts, ends, counts = blocks[0]
+    assert starts.tolist() == [0, 3, 6]
+    assert ends.tolist() == [4, 7, 8]
+    assert counts.tolist() == [4, 1, 0]
+
+    # Test case 2: Prefix sums split into blocks agree with counting each window
+    monkeypatch.setattr(gc_windows, "_BLOCK_SIZE", 64)
+    monkeypatch.setattr(gc_windows, "_MAX_BLOCK_WINDOWS", 5)
+    rng = random.Random(7)
+    sequence = "".join(rng.choice("ACGTN") for _ in range(1000))
+    for window, step in [(50, 50), (100, 7), (10, 30), (2000, 1)]:
+        windows = [(start, end, count) for block in
+                   get_window_counts(sequence, get_base_mask("GC"), window, step)
+                   for start, end, count in zip(*block)]
+        expected = [(start, min(start + window, 1000),
+                     sequence[start:start + window].count("G") + sequence[start:start + window].count("C"))
+                    for start in range(0, 1000, step)]
+        assert windows == expected
+
+    # Test case 3: Empty sequence has no windows
+    assert not list(get_window_counts(b"", get_base_mask("GC"), 10, 10))
+
+
+def test_get_window_fractions():
+    """
+    testing the get_window_fractions() function
+    """
+
+    # Test case 1: Case-sensitive like calculate_gc_content()
+    assert list(get_window_fractions("GCgcAT", "GC", WindowOptions(2, 2))) == [(0, 2, 1.0), (2, 4, 0.0), (4, 6, 0.0)]
+    assert list(get_window_fractions("GCgcAT", "GC", WindowOptions(2, 2, ignore_case=True)))[1] == (2, 4, 1.0)
+
+    # Test case 2: N bases left out of the window size, all-N windows skipped
+    options = WindowOptions(4, 4, exclude_n=True)
+    assert list(get_window_fractions("GNNNNNAT", "GC", options)) == [(0, 4, 1.0), (4, 8, 0.0)]
+    assert list(get_window_fractions("NNNNGA", "GC", options)) == [(4, 6, 0.5)]
+
+
+def test_write_bedgraph(tmp_path, monkeypatch):
+    """
+    testing the write_bedgraph() function
+    """
+
+    out_file = tmp_path / "out.bedGraph"
+    with open(out_file, "w", encoding="utf-8") as fh_out:
+        num_windows = write_bedgraph([("chr1 test", "GGCCAT"), ("chr2", memoryview(b"AT"))],
+                                     fh_out, "GC", WindowOptions(4, 4))
+    assert num_windows == 3
+    assert out_file.read_text(encoding="utf-8") == ("chr1\t0\t4\t100.00\n"
+                                                    "chr1\t4\t6\t0.00\n"
+                                                    "chr2\t0\t2\t0.00\n")
+
+    # Test case 2: a record's windows are written a slice at a time
+    monkeypatch.setattr(gc_windows, "_WINDOWS_PER_WRITE", 2)
+    options = WindowOptions(3, 1, exclude_n=True)
+    with open(out_file, "w", encoding="utf-8") as fh_out:
+        num_windows = write_bedgraph([("chr1", "GGCCATNNAC")], fh_out, "GC", options)
+    expected = [f"chr1\t{start}\t{end}\t{fraction * 100:.2f}"
+                for start, end, fraction in get_window_fractions("GGCCATNNAC", "GC", options)]
+    assert num_windows == len(expected) == 10
+    assert out_file.read_text(encoding="utf-8").splitlines() == expected
@@ -0,0 +1,137 @@
+"""
+A test script for the kmer_counter.py module.
+"""
+import random
+import sys
+from collections import Counter
+
+import numpy as np
+
+import kmer_counter
+from kmer_counter import (KmerTable, count_kmers, count_kmers_sharded, decode_kmer, get_count_histogram,
+                          get_kmer_codes, get_top_kmers, merge_count_tables)
+from twobit import write_twobit
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+
+def _count_naive(sequences, k, canonical=True):
+    """
+    Count k-mers by slicing substrings, for comparison
+    """
+
+    counts = Counter()
+    for sequence in sequences:
+        for i in range(len(sequence) - k + 1):
+            kmer = sequence[i:i + k].upper()
+            if set(kmer) <= set("ACGT"):
+                reverse = kmer.translate(_COMPLEMENT)[::-1]
+                counts[min(kmer, reverse) if canonical else kmer] += 1
+    return counts
+
+
+def _table_to_dict(table, k):
+    """
+    Turn a KmerTable into a dictionary of k-mer -> count
+    """
+
+    return {decode_kmer(kmer, k): int(count) for kmer, count in zip(table.kmers, table.counts)}
+
+
+def test_get_kmer_codes():
+    """
+    testing the get_kmer_codes() function
+    """
+
+    # Test case 1: Forward codes, A=0 C=1 G=2 T=3
+    assert get_kmer_codes("ACGT", 2, canonical=False).tolist() == [0b0001, 0b0110, 0b1011]
+
+    # Test case 2: Canonical codes, CG is its own reverse complement and AC < GT
+    assert get_kmer_codes(b"ACGT", 2).tolist() == [0b0001, 0b0110, 0b0001]
+
+    # Test case 3: Windows with N are skipped, lowercase counts as a base
+    assert get_kmer_codes("ANcg", 2, canonical=False).tolist() == [0b0110]
+
+    # Test case 4: Sequence shorter than k
+    assert not get_kmer_codes("ACG", 4).tolist()
+
+
+def test_count_kmers(monkeypatch):
+    """
+    testing the count_kmers() function
+    """
+
+    rng = random.Random(5)
+    sequences = ["".join(rng.choice("ACGTNacgt") for _ in range(rng.randint(0, 300))) for _ in range(40)]
+    records = [(f"r{i}", sequence) for i, sequence in enumerate(sequences)]
+
+    # Test case 1: Same counts as slicing substrings, for small and large k
+    for k in (1, 4, 13, 31):
+        assert _table_to_dict(count_kmers(records, k), k) == _count_naive(sequences, k)
+    assert _table_to_dict(count_kmers(records, 5, canonical=False), 5) == _count_naive(sequences, 5, False)
+
+    # Test case 2: Small chunks and merges give the same table
+    monkeypatch.setattr(kmer_counter, "_CHUNK_SIZE", 64)
+    monkeypatch.setattr(kmer_counter, "_MERGE_THRESHOLD", 100)
+    assert _table_to_dict(count_kmers(records, 7), 7) == _count_naive(sequences, 7)
+
+
+def test_count_kmers_sharded(tmp_path):
+    """
+    testing the count_kmers_sharded() function
+    """
+
+    rng = random.Random(9)
+    sequences = ["".join(rng.choice("ACGTN") for _ in range(rng.randint(1, 200))) for _ in range(50)]
+    file_path = tmp_path / "test.fasta"
+    file_path.write_text("".join(f">r{i}\n{sequence}\n" for i, sequence in enumerate(sequences)),
+                         encoding="utf-8")
+
+    table = count_kmers_sharded(str(file_path), 6, 2)
+    assert _table_to_dict(table, 6) == _count_naive(sequences, 6)
+
+
+def test_merge_count_tables():
+    """
+    testing the merge_count_tables() function
+    """
+
+    # Test case 1: Counts of shared k-mers are added
+    table1 = KmerTable(np.array([1, 5], dtype="uint64"), np.array([2, 1]))
+    table2 = KmerTable(np.array([0, 5], dtype="uint64"), np.array([1, 3]))
+    merged = merge_count_tables([table1, table2])
+    assert merged.kmers.tolist() == [0, 1, 5]
+    assert merged.counts.tolist() == [1, 2, 4]
+
+    # Test case 2: No tables
+    assert not merge_count_tables([]).kmers.tolist()
+
+
+def test_histogram_and_top_kmers():
+    """
+    testing the get_count_histogram() and get_top_kmers() functions
+    """
+
+    table = count_kmers([("r1", "AAAAAC"), ("r2", "GGG")], 2, canonical=False)
+    assert get_count_histogram(table) == [(1, 1), (2, 1), (4, 1)]
+    assert get_top_kmers(table, 2, 2) == [("AA", 4), ("GG", 2)]
+    assert get_top_kmers(table, 2, 10) == [("AA", 4), ("GG", 2), ("AC", 1)]
+
+
+def test_main_twobit(monkeypatch, tmp_path, capsys):
+    """
+    testing that .2bit input with several workers falls back to a single process
+    """
+
+    records = [("chr1", "ACGTACGTNNacgt"), ("chr2", "GGGCCC")]
+    infile = tmp_path / "test.2bit"
+    outfile = tmp_path / "histogram.txt"
+    write_twobit(records, str(infile))
+    monkeypatch.setattr(sys, "argv", ["kmer_counter.py", "-i", str(infile), "-o", str(outfile), "-k", "3",
+                                      "-w", "2"])
+    kmer_counter.main()
+
+    histogram = get_count_histogram(count_kmers(records, 3))
+    assert outfile.read_text(encoding="utf-8").splitlines() == \
+        ["Count\tKmers"] + [f"{count}\t{num_kmers}" for count, num_kmers in histogram]
+    assert "cannot be sharded" in capsys.readouterr().err
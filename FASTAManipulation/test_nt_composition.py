@@ -0,0 +1,71 @@
+"""
+A test script for the nt_composition.py module.
+"""
+import pytest
+from nt_composition import (NtComposition, get_byte_histogram, composition_from_histogram,
+                            get_nt_composition, get_gc_percentage)
+from nt_fasta_stats import _get_num_nucleotides, calculate_gc_content
+
+
+def test_get_byte_histogram():
+    """
+    testing the get_byte_histogram() function
+    """
+
+    # Test case 1: str and bytes give the same counts
+    histogram = get_byte_histogram("AACGT")
+    assert histogram[ord('A')] == 2
+    assert list(histogram) == list(get_byte_histogram(b"AACGT"))
+
+    # Test case 2: memoryview input
+    histogram = get_byte_histogram(memoryview(b"GGGN"))
+    assert histogram[ord('G')] == 3
+    assert histogram.sum() == 4
+
+    # Test case 3: Empty sequence
+    assert get_byte_histogram("").sum() == 0
+
+
+def test_get_nt_composition():
+    """
+    testing the get_nt_composition() function
+    """
+
+    # Test case 1: Basic test with every bucket
+    assert get_nt_composition("ACGTNNx-") == NtComposition(1, 1, 1, 1, 2, 2, 8)
+
+    # Test case 2: Lowercase bases go to the "other" bucket
+    assert get_nt_composition("acgtACGT") == NtComposition(1, 1, 1, 1, 0, 4, 8)
+
+    # Test case 3: Empty sequence
+    assert get_nt_composition("") == NtComposition(0, 0, 0, 0, 0, 0, 0)
+
+    # Test case 4: Sequences longer than one histogram block match str.count()
+    sequence = "ACGTNGGCCA" * 20000 + "acgt"
+    composition = get_nt_composition(sequence)
+    for nucleotide, count in zip("AGCTN", composition):
+        assert count == _get_num_nucleotides(nucleotide, sequence)
+    assert composition.length == len(sequence)
+
+
+def test_composition_from_histogram():
+    """
+    testing the composition_from_histogram() function
+    """
+
+    histogram = get_byte_histogram(b"NNNN")
+    assert composition_from_histogram(histogram) == NtComposition(0, 0, 0, 0, 4, 0, 4)
+
+
+def test_get_gc_percentage():
+    """
+    testing the get_gc_percentage() function
+    """
+
+    # Test case 1: Same result as calculate_gc_content()
+    for sequence in ["GCGC", "AAAA", "ACGTACGT", "GC!@CGCTT", "GGCCNNAT"]:
+        assert get_gc_percentage(get_nt_composition(sequence)) == pytest.approx(
+            calculate_gc_content(sequence))
+
+    # Test case 2: Empty sequence
+    assert get_gc_percentage(get_nt_composition("")) == 0
@@ -2,9 +2,13 @@
 A test script for the nt_fasta_stats.py program.
 """
 import pytest
+from fasta_io import read_fasta_records
 from nt_fasta_stats import (get_filehandle, get_fasta_lists, _verify_lists,
                             _get_num_nucleotides, _get_ncbi_accession,
-                            calculate_gc_content, output_results_to_files)
+                            calculate_gc_content, output_results_to_files,
+                            get_record_stats, get_sharded_stats, output_records_to_file,
+                            get_record_lengths)
+from twobit import write_twobit
 
 
 # Define test cases for each function
@@ -309,6 +313,70 @@ def test_output_results_to_files(tmp_path):
     assert lines[0] == "Number\tAccession\tA's\tG's\tC's\tT's\tN's\tLength\tGC%\n"
 
 
+def test_get_record_stats():
+    """
+    testing the get_record_stats() function
+    """
+
+    # Test case 1: Basic row
+    assert get_record_stats("Seq1 description", "AGCTN") == ("Seq1", 1, 1, 1, 1, 1, 5, 40.0)
+
+    # Test case 2: Bytes sequence
+    assert get_record_stats("Seq2", b"GG") == ("Seq2", 0, 2, 0, 0, 0, 2, 100.0)
+
+
+def test_get_sharded_stats(tmp_path):
+    """
+    testing that get_sharded_stats() matches the single process table
+    """
+
+    file_path = tmp_path / "test.fasta"
+    with open(file_path, "w", encoding="utf-8") as fh_out:
+        for i in range(50):
+            fh_out.write(f">Seq{i} description\n{'ACGTN'[i % 5] * (i + 1)}\nGGCC\n")
+
+    with open(file_path, "r", encoding="utf-8") as fh_in:
+        single_rows = [get_record_stats(header, sequence)
+                       for header, sequence in read_fasta_records(fh_in)]
+
+    assert list(get_sharded_stats(file_path, 3)) == single_rows
+
+
+def test_output_records_to_file(tmp_path):
+    """
+    testing the output_records_to_file() function
+    """
+
+    output_file = tmp_path / "output.txt"
+    with open(output_file, "w", encoding="utf-8") as fh_out:
+        num_records = output_records_to_file(iter([("Seq1", "AGCT"), ("Seq2", "GTCAGT")]), fh_out)
+    assert num_records == 2
+
+    with output_file.open() as outfile:
+        lines = list(outfile)
+    assert lines == ["Number\tAccession\tA's\tG's\tC's\tT's\tN's\tLength\tGC%\n",
+                     "1\tSeq1\t1\t1\t1\t1\t0\t4\t50.0\n",
+                     "2\tSeq2\t1\t2\t1\t2\t0\t6\t50.0\n"]
+
+
+def test_get_record_lengths(tmp_path):
+    """
+    testing the get_record_lengths() function
+    """
+
+    records = [("seq1 desc", "ACGTN"), ("seq2", "AC")]
+    file_path = tmp_path / "test.fasta"
+    file_path.write_text("".join(f">{header}\n{sequence}\n" for header, sequence in records), encoding="utf-8")
+
+    # Test case 1: Without an index the records are measured
+    assert list(get_record_lengths(file_path, records)) == [("seq1", 5), ("seq2", 2)]
+
+    # Test case 2: .2bit lengths come from the record headers
+    twobit_path = tmp_path / "test.2bit"
+    write_twobit(records, twobit_path)
+    assert list(get_record_lengths(twobit_path, [])) == [("seq1", 5), ("seq2", 2)]
+
+
 # Run the tests
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,106 @@
+"""
+A test script for the orf_finder.py module.
+"""
+import io
+import random
+
+from orf_finder import (Orf, find_orfs, find_orfs_sharded, find_record_orfs, get_frame_orfs,
+                        get_orf_codon_table, write_orfs_bed)
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+_STOPS = {"TAA", "TAG", "TGA"}
+
+
+def _find_frame_orfs_naive(strand_sequence, offset, min_length, starts):
+    """
+    Walk one frame codon by codon, for comparison
+    """
+
+    orf_start = None
+    for i in range(offset, len(strand_sequence) - 2, 3):
+        codon = strand_sequence[i:i + 3]
+        if orf_start is None and codon in starts:
+            orf_start = i
+        elif codon in _STOPS:
+            if orf_start is not None and i + 3 - orf_start >= min_length:
+                yield orf_start, i + 3
+            orf_start = None
+
+
+def _find_orfs_naive(sequence, min_length, starts=("ATG",)):
+    """
+    Walk every frame codon by codon, for comparison
+    """
+
+    orfs = set()
+    length = len(sequence)
+    for strand, strand_sequence in (("+", sequence), ("-", sequence.translate(_COMPLEMENT)[::-1])):
+        for offset in range(3):
+            for start, end in _find_frame_orfs_naive(strand_sequence, offset, min_length, starts):
+                if strand == "-":
+                    start, end = length - end, length - start
+                orfs.add((start, end, strand))
+    return orfs
+
+
+def test_get_frame_orfs():
+    """
+    testing the get_frame_orfs() function
+    """
+
+    # Test case 1: The first start after each stop, a stop without start is skipped
+    first, last = get_frame_orfs(b"-M-M*--*M-*-M", 2)
+    assert first.tolist() == [1, 8]
+    assert last.tolist() == [4, 10]
+
+    # Test case 2: Minimum length in codons
+    first, last = get_frame_orfs(b"-M-M*--*M-*-M", 4)
+    assert first.tolist() == [1]
+
+
+def test_find_orfs():
+    """
+    testing the find_orfs() function
+    """
+
+    # Test case 1: Forward ORFs in two frames
+    assert find_orfs("s1", "CCATGAAATTTGGGTAACCATGCCCTGA", get_orf_codon_table(1), 6) == \
+        [Orf("s1", 2, 17, "+", 3, 15), Orf("s1", 19, 28, "+", 2, 9)]
+
+    # Test case 2: Reverse strand ORF, reported on forward coordinates
+    assert find_orfs("s2", "GGTTACATCAT", get_orf_codon_table(1), 6) == [Orf("s2", 2, 11, "-", -1, 9)]
+
+    # Test case 3: Same ORFs as walking the codons, with ATG or every table 11 start codon
+    rng = random.Random(11)
+    sequence = "".join(rng.choice("ACGT") for _ in range(3000))
+    for alternative_starts, starts in ((False, ("ATG",)), (True, ("ATG", "GTG", "TTG", "CTG", "ATT", "ATC", "ATA"))):
+        orfs = find_orfs("s3", sequence, get_orf_codon_table(11, alternative_starts), 30)
+        assert {(orf.start, orf.end, orf.strand) for orf in orfs} == _find_orfs_naive(sequence, 30, starts)
+        assert orfs == sorted(orfs, key=lambda orf: (orf.start, orf.end))
+
+
+def test_find_orfs_sharded(tmp_path):
+    """
+    testing the find_orfs_sharded() function
+    """
+
+    rng = random.Random(12)
+    records = [(f"r{i}", "".join(rng.choice("ACGT") for _ in range(rng.randint(10, 600)))) for i in range(20)]
+    file_path = tmp_path / "test.fasta"
+    file_path.write_text("".join(f">{name}\n{sequence}\n" for name, sequence in records), encoding="utf-8")
+
+    assert list(find_orfs_sharded(str(file_path), 2, min_length=30)) == \
+        list(find_record_orfs(records, min_length=30))
+
+
+def test_write_orfs_bed():
+    """
+    testing the write_orfs_bed() function
+    """
+
+    output_file = io.StringIO()
+    orfs = [Orf("s1", 2, 17, "+", 3, 15), Orf("s1", 19, 28, "-", -2, 9), Orf("s2", 0, 6, "+", 1, 6)]
+    assert write_orfs_bed(orfs, output_file) == 3
+    assert output_file.getvalue().splitlines() == ["s1\t2\t17\ts1_ORF1\t0\t+\t+3\t15",
+                                                   "s1\t19\t28\ts1_ORF2\t0\t-\t-2\t9",
+                                                   "s2\t0\t6\ts2_ORF1\t0\t+\t+1\t6"]
@@ -0,0 +1,79 @@
+"""
+A test script for the protein_mass.py module.
+"""
+import io
+
+import pytest
+
+import protein_mass
+from protein_mass import RESIDUE_MASSES, WATER_MASSES, get_batch_masses, get_protein_masses, write_mass_table
+
+
+def _mass_naive(sequence, which):
+    """
+    Sum the residue masses one residue at a time, for comparison
+    """
+
+    residues = [residue for residue in sequence.upper() if residue in RESIDUE_MASSES]
+    if not any(residue.isalpha() for residue in sequence):
+        return 0.0
+    return sum(RESIDUE_MASSES[residue][which] for residue in residues) + WATER_MASSES[which]
+
+
+def test_get_batch_masses():
+    """
+    testing the get_batch_masses() function
+    """
+
+    lengths, average, monoisotopic, unknown = get_batch_masses(["PEPTIDE"])
+    assert lengths.tolist() == [7]
+    assert average[0] == pytest.approx(799.83274)
+    assert monoisotopic[0] == pytest.approx(799.35994)
+    assert unknown.tolist() == [0]
+
+
+def test_get_batch_masses_unknown_and_empty():
+    """
+    testing the get_batch_masses() function on unknown residues and empty sequences
+    """
+
+    sequences = ["MKX*", "", "peptide", b"GXXG", "AC-GT"]
+    lengths, average, monoisotopic, unknown = get_batch_masses(sequences)
+    assert lengths.tolist() == [3, 0, 7, 4, 4]
+    assert unknown.tolist() == [1, 0, 0, 2, 0]
+    assert average[1] == monoisotopic[1] == 0
+    assert average[2] == pytest.approx(799.83274)
+    for i, sequence in enumerate(sequences):
+        sequence = sequence.decode() if isinstance(sequence, bytes) else sequence
+        assert average[i] == pytest.approx(_mass_naive(sequence, 0))
+        assert monoisotopic[i] == pytest.approx(_mass_naive(sequence, 1))
+
+
+def test_get_protein_masses_batches(monkeypatch):
+    """
+    testing the get_protein_masses() function over several batches
+    """
+
+    records = [(f"sp|P{i:05d}| protein {i}", "ACDEFGHIKLMNPQRSTVWY"[:i % 20 + 1]) for i in range(50)]
+    expected = list(get_protein_masses(records))
+    monkeypatch.setattr(protein_mass, "_BATCH_SIZE", 16)
+    batched = list(get_protein_masses(records))
+    assert [row[:3] for row in batched] == [row[:3] for row in expected]
+    assert [row[3] for row in batched] == pytest.approx([row[3] for row in expected])
+    assert len(expected) == 50
+    assert expected[0][:2] == ("sp|P00000|", 1)
+
+
+def test_write_mass_table():
+    """
+    testing the write_mass_table() function
+    """
+
+    output = io.StringIO()
+    num_rows = write_mass_table(get_protein_masses([("p1 desc", "PEPTIDE"), ("p2", "X")]), output)
+    assert num_rows == 2
+    assert output.getvalue().splitlines() == [
+        "Number\tAccession\tLength\tAverage_Da\tMonoisotopic_Da\tUnknown",
+        "1\tp1\t7\t799.83\t799.3599\t0",
+        "2\tp2\t1\t18.02\t18.0106\t1",
+    ]
@@ -2,8 +2,9 @@
 A test script for the sec_structure_split.py program.
 """
 import pytest
-from secondary_structure_splitter import (get_fasta_lists, get_filehandle,
-                                          output_results_to_files, _verify_lists)
+from fasta_io import read_fasta_mmap
+from sec_structure_split import (get_fasta_lists, get_filehandle,
+                                 output_results_to_files, split_records, _verify_lists)
 
 
 # Define test cases for each function
@@ -223,115 +224,72 @@ def test_verify_lists():
         _verify_lists(header_list, sequence_list)  # Should exit with an error
 
 
-def test_output_results_to_files():
+def _run_output_results_to_files(tmp_path, header_list, sequence_list):
     """
-    testing the output_results_to_files() function
+    Run output_results_to_files() and return its counts and both output files
     """
 
-    # Test case 1: Basic test with two protein sequences and secondary structures
-    header_list = ["Header1", "Header2"]
-    sequence_list = ["ACGT", "GTCAGT"]
-
-    output_file1 = "test_output1.txt"
-    output_file2 = "test_output2.txt"
+    output_file1 = tmp_path / "test_output1.txt"
+    output_file2 = tmp_path / "test_output2.txt"
 
     with open(output_file1, "w", encoding="utf-8") as fh_out1, open(output_file2, "w", encoding="utf-8") as fh_out2:
         num_proteins, num_ss = output_results_to_files(header_list, sequence_list, fh_out1, fh_out2)
 
-        assert num_proteins == 2
-        assert num_ss == 2
-
-    with open(output_file1, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == "Header1\nACGT\n"
-
-    with open(output_file2, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == "Header2\nGTCAGT\n"
-
-    # Test case 2: Test with no data
-    header_list = []
-    sequence_list = []
-
-    output_file1 = "test_output1.txt"
-    output_file2 = "test_output2.txt"
+    return (num_proteins, num_ss, output_file1.read_text(encoding="utf-8"),
+            output_file2.read_text(encoding="utf-8"))
 
-    with open(output_file1, "w", encoding="utf-8") as fh_out1, open(output_file2, "w", encoding="utf-8") as fh_out2:
-        num_proteins, num_ss = output_results_to_files(header_list, sequence_list, fh_out1, fh_out2)
 
-        assert num_proteins == 0
-        assert num_ss == 0
+def test_output_results_to_files(tmp_path):
+    """
+    testing the output_results_to_files() function
+    """
 
-    with open(output_file1, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == ""
+    # Test case 1: Basic test with one protein sequence and one secondary structure
+    header_list = ["101M:A:sequence", "101M:A:secstr"]
+    sequence_list = ["MVLSEGEWQLV", "  HHHH  EE"]
+    assert _run_output_results_to_files(tmp_path, header_list, sequence_list) == (
+        1, 1, ">101M:A:sequence\nMVLSEGEWQLV\n", ">101M:A:secstr\n  HHHH  EE\n")
 
-    with open(output_file2, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == ""
+    # Test case 2: Test with no data
+    assert _run_output_results_to_files(tmp_path, [], []) == (0, 0, "", "")
 
     # Test case 3: Test with no secondary structure data
     header_list = ["Header1", "Header2"]
     sequence_list = ["ACGT", "GTCAGT"]
+    assert _run_output_results_to_files(tmp_path, header_list, sequence_list) == (
+        2, 0, ">Header1\nACGT\n>Header2\nGTCAGT\n", "")
 
-    output_file1 = "test_output1.txt"
-    output_file2 = "test_output2.txt"
+    # Test case 4: An all-letter secondary structure is routed by its header
+    header_list = ["1ABC:A:sequence", "1ABC:A:secstr"]
+    sequence_list = ["MKV", "HHH"]
+    assert _run_output_results_to_files(tmp_path, header_list, sequence_list) == (
+        1, 1, ">1ABC:A:sequence\nMKV\n", ">1ABC:A:secstr\nHHH\n")
 
-    with open(output_file1, "w", encoding="utf-8") as fh_out1, open(output_file2, "w", encoding="utf-8") as fh_out2:
-        num_proteins, num_ss = output_results_to_files(header_list, sequence_list, fh_out1, fh_out2)
-
-        assert num_proteins == 2
-        assert num_ss == 0
-
-    with open(output_file1, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == "Header1\nACGT\nHeader2\nGTCAGT\n"
-
-    with open(output_file2, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == ""
-
-    # Test case 4: Test with empty protein sequences
+    # Test case 5: Bytes-like sequences from the memory-mapped reader
     header_list = ["Header1", "Header2"]
-    sequence_list = ["", "GTCAGT", "", "AAT"]
+    sequence_list = [memoryview(b"ACGT"), b" EE "]
+    assert _run_output_results_to_files(tmp_path, header_list, sequence_list) == (
+        1, 1, ">Header1\nACGT\n", ">Header2\n EE \n")
 
-    output_file1 = "test_output1.txt"
-    output_file2 = "test_output2.txt"
-
-    with open(output_file1, "w", encoding="utf-8") as fh_out1, open(output_file2, "w", encoding="utf-8") as fh_out2:
-        num_proteins, num_ss = output_results_to_files(header_list, sequence_list, fh_out1, fh_out2)
-
-        assert num_proteins == 2
-        assert num_ss == 1
-
-    with open(output_file1, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == "Header2\nGTCAGT\nHeader4\nAAT\n"
 
-    with open(output_file2, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == ""
-
-    # Test case 5: Test with empty secondary structure data
-    header_list = ["Header1", "Header2"]
-    sequence_list = ["ACGT", "", "GTCAGT", "", "AAT"]
-
-    output_file1 = "test_output1.txt"
-    output_file2 = "test_output2.txt"
-
-    with open(output_file1, "w", encoding="utf-8") as fh_out1, open(output_file2, "w", encoding="utf-8") as fh_out2:
-        num_proteins, num_ss = output_results_to_files(header_list, sequence_list, fh_out1, fh_out2)
+def test_split_records_streams(tmp_path):
+    """
+    testing that split_records() routes a memory-mapped file in one pass
+    """
 
-        assert num_proteins == 2
-        assert num_ss == 1
+    input_file = tmp_path / "ss.txt"
+    input_file.write_text(">101M:A:sequence\nMVLSEG\nEWQLV\n>101M:A:secstr\n    HHHH\nHH  EE  \n",
+                          encoding="utf-8")
+    output_file1 = tmp_path / "pdb_protein.fasta"
+    output_file2 = tmp_path / "pdb_ss.fasta"
 
-    with open(output_file1, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == "Header1\nACGT\nHeader3\nGTCAGT\nHeader5\nAAT\n"
+    with open(input_file, "rb") as fh_in, open(output_file1, "w", encoding="utf-8") as fh_out1, \
+            open(output_file2, "w", encoding="utf-8") as fh_out2:
+        counts = split_records(read_fasta_mmap(fh_in, keep_whitespace=True), fh_out1, fh_out2)
 
-    with open(output_file2, "r", encoding="utf-8") as file:
-        content = file.read()
-        assert content == ""
+    assert counts == (1, 1)
+    assert output_file1.read_text(encoding="utf-8") == ">101M:A:sequence\nMVLSEGEWQLV\n"
+    assert output_file2.read_text(encoding="utf-8") == ">101M:A:secstr\n    HHHHHH  EE  \n"
 
 
 # Run the tests
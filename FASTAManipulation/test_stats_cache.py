@@ -0,0 +1,77 @@
+"""
+A test script for the stats_cache.py module.
+"""
+import os
+
+from stats_cache import get_cache_key, load_cached_rows, store_cached_rows, evict_cache
+
+ROWS = [("Seq1", 1, 1, 1, 1, 0, 4, 50.0), ("Seq2", 0, 2, 0, 0, 0, 2, 100.0)]
+
+
+def test_get_cache_key(tmp_path):
+    """
+    testing the get_cache_key() function
+    """
+
+    file_path = tmp_path / "test.fasta"
+    file_path.write_text(">Seq1\nAGCT\n", encoding="utf-8")
+    copy_path = tmp_path / "copy.fasta"
+    copy_path.write_text(">Seq1\nAGCT\n", encoding="utf-8")
+
+    # Test case 1: Stable for an unchanged file, different per tool version
+    assert get_cache_key(file_path, "1.0") == get_cache_key(file_path, "1.0")
+    assert get_cache_key(file_path, "1.0") != get_cache_key(file_path, "1.1")
+
+    # Test case 2: Content keys match for identical copies, stat keys do not
+    assert get_cache_key(file_path, "1.0", True) == get_cache_key(copy_path, "1.0", True)
+    assert get_cache_key(file_path, "1.0") != get_cache_key(copy_path, "1.0")
+
+    # Test case 3: Changing the file changes both keys
+    stat_key = get_cache_key(file_path, "1.0")
+    content_key = get_cache_key(file_path, "1.0", True)
+    file_path.write_text(">Seq1\nAGCTT\n", encoding="utf-8")
+    assert get_cache_key(file_path, "1.0") != stat_key
+    assert get_cache_key(file_path, "1.0", True) != content_key
+
+
+def test_store_and_load_cached_rows(tmp_path):
+    """
+    testing the store_cached_rows() and load_cached_rows() functions
+    """
+
+    cache_dir = tmp_path / "cache"
+
+    # Test case 1: Miss on an empty cache
+    assert load_cached_rows(cache_dir, "abc") is None
+
+    # Test case 2: Rows round-trip as tuples
+    store_cached_rows(cache_dir, "abc", ROWS, 1 << 20)
+    assert load_cached_rows(cache_dir, "abc") == ROWS
+
+    # Test case 3: A corrupt entry is a miss
+    (cache_dir / "bad.json").write_text("[1, 2", encoding="utf-8")
+    assert load_cached_rows(cache_dir, "bad") is None
+
+
+def test_evict_cache(tmp_path):
+    """
+    testing the least recently used eviction
+    """
+
+    cache_dir = tmp_path / "cache"
+    for age, key in enumerate(["newest", "used", "oldest"]):
+        store_cached_rows(cache_dir, key, ROWS, 1 << 20)
+        entry_path = cache_dir / f"{key}.json"
+        os.utime(entry_path, ns=(10**18 - age * 10**9, 10**18 - age * 10**9))
+    entry_size = (cache_dir / "newest.json").stat().st_size
+
+    # Test case 1: Loading an entry makes it the most recently used
+    assert load_cached_rows(cache_dir, "used") == ROWS
+
+    # Test case 2: The least recently used entry goes first
+    assert evict_cache(cache_dir, 2 * entry_size) == 1
+    assert sorted(path.name for path in cache_dir.iterdir()) == ["newest.json", "used.json"]
+
+    # Test case 3: Storing past the limit evicts old entries
+    store_cached_rows(cache_dir, "latest", ROWS, 2 * entry_size)
+    assert sorted(path.name for path in cache_dir.iterdir()) == ["latest.json", "used.json"]
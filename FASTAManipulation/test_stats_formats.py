@@ -0,0 +1,61 @@
+"""
+A test script for the stats_formats.py module.
+"""
+import numpy as np
+import pytest
+from stats_formats import get_stats_arrays, write_stats_npy, load_stats_columns, write_stats_parquet
+
+ROWS = [("Seq1", 1, 1, 1, 1, 0, 4, 50.0), ("NC_000021.9", 0, 2, 0, 0, 3, 5, 40.0)]
+
+
+def test_get_stats_arrays():
+    """
+    testing the get_stats_arrays() function
+    """
+
+    # Test case 1: One fixed-width array per column
+    arrays = get_stats_arrays(iter(ROWS))
+    assert list(arrays["number"]) == [1, 2]
+    assert list(arrays["accession"]) == [b"Seq1", b"NC_000021.9"]
+    assert arrays["accession"].dtype == np.dtype("S11")
+    assert list(arrays["n_count"]) == [0, 3]
+    assert arrays["gc_percentage"].dtype == np.float64
+
+    # Test case 2: No rows
+    arrays = get_stats_arrays([])
+    assert len(arrays["number"]) == 0
+    assert len(arrays["length"]) == 0
+
+
+def test_write_and_load_stats_npy(tmp_path):
+    """
+    testing the write_stats_npy() and load_stats_columns() functions
+    """
+
+    out_dir = tmp_path / "stats"
+    assert write_stats_npy(ROWS, out_dir) == 2
+
+    # Test case 1: Columns are memory-mapped
+    columns = load_stats_columns(out_dir)
+    assert isinstance(columns["length"], np.memmap)
+    assert list(columns["length"]) == [4, 5]
+    assert list(columns["accession"]) == [b"Seq1", b"NC_000021.9"]
+
+    # Test case 2: Read into memory
+    columns = load_stats_columns(out_dir, mmap=False)
+    assert not isinstance(columns["gc_percentage"], np.memmap)
+    assert list(columns["gc_percentage"]) == [50.0, 40.0]
+
+
+def test_write_stats_parquet(tmp_path):
+    """
+    testing the write_stats_parquet() function
+    """
+
+    parquet = pytest.importorskip("pyarrow.parquet")
+    out_file = tmp_path / "stats.parquet"
+    assert write_stats_parquet(ROWS, out_file) == 2
+
+    table = parquet.read_table(out_file)
+    assert table.column("accession").to_pylist() == ["Seq1", "NC_000021.9"]
+    assert table.column("number").to_pylist() == [1, 2]
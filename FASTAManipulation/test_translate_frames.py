@@ -0,0 +1,92 @@
+"""
+A test script for the translate_frames.py module.
+"""
+import io
+import itertools
+import random
+
+import translate_frames
+from translate_frames import (GENETIC_CODES, format_protein_record, get_codon_table, translate_frames as translate,
+                              translate_records, write_translations)
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+
+def _translate_naive(sequence, table_id):
+    """
+    Translate frame 1 codon by codon, for comparison
+    """
+
+    codons = ["".join(codon) for codon in itertools.product("TCAG", repeat=3)]
+    table = dict(zip(codons, GENETIC_CODES[table_id].amino_acids))
+    sequence = sequence.upper()
+    return "".join(table.get(sequence[i:i + 3], "X") for i in range(0, len(sequence) - 2, 3)).encode("ascii")
+
+
+def test_genetic_codes():
+    """
+    testing the GENETIC_CODES tables
+    """
+
+    for code in GENETIC_CODES.values():
+        assert len(code.amino_acids) == 64
+        assert len(code.starts) == 64
+
+    # Test case 1: Known reassignments, TGA is W and AGA a stop in vertebrate mitochondria
+    assert translate("TGAAGAATA", get_codon_table(2), [1]) == [(1, b"W*M")]
+    assert translate("TGAAGAATA", get_codon_table(1), [1]) == [(1, b"*RI")]
+    assert translate("TAATAG", get_codon_table(6), [1]) == [(1, b"QQ")]
+
+
+def test_translate_frames():
+    """
+    testing the translate_frames() function
+    """
+
+    # Test case 1: All six frames, codons with N translate to X
+    assert translate("ATGGCCTAAnTGA", get_codon_table(1)) == \
+        [(1, b"MA*X"), (2, b"WPX*"), (3, b"GLX"), (-1, b"SXRP"), (-2, b"XLGH"), (-3, b"X*A")]
+
+    # Test case 2: Lowercase and RNA input
+    assert translate("augGCu", get_codon_table(1), [1]) == [(1, b"MA")]
+
+    # Test case 3: Sequences shorter than a codon
+    assert translate("AT", get_codon_table(1)) == [(frame, b"") for frame in [1, 2, 3, -1, -2, -3]]
+
+    # Test case 4: Every frame matches a codon by codon translation
+    rng = random.Random(3)
+    sequence = "".join(rng.choice("ACGTN") for _ in range(301))
+    reverse = sequence.translate(_COMPLEMENT)[::-1]
+    for table_id in GENETIC_CODES:
+        proteins = dict(translate(sequence, get_codon_table(table_id)))
+        for offset in range(3):
+            assert proteins[offset + 1] == _translate_naive(sequence[offset:], table_id)
+            assert proteins[-offset - 1] == _translate_naive(reverse[offset:], table_id)
+
+
+def test_translate_records(monkeypatch):
+    """
+    testing the translate_records() function
+    """
+
+    rng = random.Random(4)
+    records = [(f"seq{i} desc", "".join(rng.choice("ACGT") for _ in range(rng.randint(0, 40)))) for i in range(30)]
+    expected = [(f"seq{i}", frame, protein) for i, (_, sequence) in enumerate(records)
+                for frame, protein in translate(sequence, get_codon_table(11))]
+
+    # Test case 1: Batches of several records give the per-record translations
+    monkeypatch.setattr(translate_frames, "_BATCH_SIZE", 100)
+    assert list(translate_records(records, 11)) == expected
+    assert list(translate_records([("x", memoryview(b"ATGAAA"))], 1, [-1, 1])) == \
+        [("x", -1, b"FH"), ("x", 1, b"MK")]
+
+
+def test_write_translations():
+    """
+    testing the write_translations() and format_protein_record() functions
+    """
+
+    output_file = io.BytesIO()
+    assert write_translations([("seq1", 1, b"MKV"), ("seq1", -2, b"")], output_file, 2) == 2
+    assert output_file.getvalue() == b">seq1_frame+1\nMK\nV\n>seq1_frame-2\n"
+    assert format_protein_record("p", b"MKV", 0) == b">p\nMKV\n"
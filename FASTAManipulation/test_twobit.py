@@ -0,0 +1,85 @@
+"""
+A test script for the twobit.py module.
+"""
+import struct
+
+import numpy as np
+import pytest
+from twobit import (TwoBitReader, encode_twobit_record, get_runs, get_twobit_lengths, is_twobit,
+                    read_twobit_records, write_twobit)
+
+_RECORDS = [("chr1 first chromosome", "ACGTNNNNacgtnnRYACGTAGGT"),
+            ("chr2", ""),
+            ("chr3", b"ttttAAAAC")]
+
+
+def test_get_runs():
+    """
+    testing the get_runs() function
+    """
+
+    starts, sizes = get_runs(np.array([True, True, False, True, False, False, True]))
+    assert starts.tolist() == [0, 3, 6]
+    assert sizes.tolist() == [2, 1, 1]
+
+    starts, sizes = get_runs(np.zeros(4, dtype=bool))
+    assert not starts.tolist() and not sizes.tolist()
+
+
+def test_encode_twobit_record():
+    """
+    testing the encode_twobit_record() function
+    """
+
+    # Test case 1: UCSC layout with T=0 C=1 A=2 G=3, first base in the high bits
+    record = encode_twobit_record("ACGTNa")
+    dna_size, n_count, n_start, n_size, mask_count, mask_start, mask_size, reserved = \
+        struct.unpack("<8I", record[:32])
+    assert (dna_size, n_count, n_start, n_size) == (6, 1, 4, 1)
+    assert (mask_count, mask_start, mask_size, reserved) == (1, 5, 1, 0)
+    assert record[32:] == bytes([0b10011100, 0b00100000])
+
+
+def test_write_and_read_twobit(tmp_path):
+    """
+    testing the write_twobit() function and the TwoBitReader class
+    """
+
+    file_path = tmp_path / "test.2bit"
+    assert write_twobit(_RECORDS, file_path) == 3
+    assert is_twobit(file_path)
+
+    # Test case 1: Records round trip, other IUPAC codes become N
+    assert list(read_twobit_records(file_path)) == [("chr1", b"ACGTNNNNacgtnnNNACGTAGGT"),
+                                                    ("chr2", b""),
+                                                    ("chr3", b"ttttAAAAC")]
+    assert list(read_twobit_records(file_path, soft_mask=False))[2] == ("chr3", b"TTTTAAAAC")
+    assert list(get_twobit_lengths(file_path)) == [("chr1", 24), ("chr2", 0), ("chr3", 9)]
+
+    # Test case 2: Regions starting and ending inside packed bytes
+    with TwoBitReader(file_path) as reader:
+        assert reader.names() == ["chr1", "chr2", "chr3"]
+        assert reader.fetch("chr1", 2, 10) == b"GTNNNNac"
+        assert reader.fetch("chr1", 13, 17) == b"nNNA"
+        assert reader.fetch("chr3", 3, 100) == b"tAAAAC"
+        assert reader.fetch("chr3", 5, 5) == b""
+        with pytest.raises(KeyError):
+            reader.fetch("chr4")
+
+
+def test_is_twobit(tmp_path):
+    """
+    testing the is_twobit() function
+    """
+
+    fasta_path = tmp_path / "test.fasta"
+    fasta_path.write_text(">chr1\nACGT\n", encoding="utf-8")
+    assert not is_twobit(fasta_path)
+
+    # Test case 1: Files written on big-endian machines are read too
+    big_endian_path = tmp_path / "big_endian.2bit"
+    record = struct.pack(">4I", 4, 0, 0, 0) + bytes([0b10011100])
+    big_endian_path.write_bytes(struct.pack(">IIII", 0x1A412743, 0, 1, 0) + b"\x01x" +
+                                struct.pack(">I", 16 + 2 + 4) + record)
+    assert is_twobit(big_endian_path)
+    assert list(read_twobit_records(big_endian_path)) == [("x", b"ACGT")]
@@ -0,0 +1,61 @@
+"""
+A test script for the validate_alphabet.py module.
+"""
+import io
+
+from fasta_io import read_fasta_file
+from validate_alphabet import (ALPHABETS, InvalidRecord, find_invalid_records, get_invalid_record,
+                               write_validation_report)
+
+
+def test_get_invalid_record():
+    """
+    testing the get_invalid_record() function
+    """
+
+    # Test case 1: valid sequences of every type
+    assert get_invalid_record(1, "chr1", "ACGTNacgtn", ALPHABETS["dna"]) is None
+    assert get_invalid_record(1, "chr1", b"ACGTRYKMacgtswbdhvn", ALPHABETS["iupac-dna"]) is None
+    assert get_invalid_record(1, "1ABC:A", memoryview(b"MKVLAX*"), ALPHABETS["protein"]) is None
+    assert get_invalid_record(1, "1ABC:A", " HHHEE  TT", ALPHABETS["dssp"]) is None
+
+    # Test case 2: invalid characters with their 1-based positions
+    assert get_invalid_record(3, "chr2 second", "ACRTN-AC R", ALPHABETS["dna"]) == \
+        InvalidRecord(3, "chr2", 4, [" ", "-", "R"], [3, 6, 9, 10])
+
+    # Test case 3: only the first positions are listed
+    assert get_invalid_record(4, "", b"XXXXACGT", ALPHABETS["dna"], max_positions=2) == \
+        InvalidRecord(4, "", 4, ["X"], [1, 2])
+
+
+def test_find_invalid_records(tmp_path):
+    """
+    testing the find_invalid_records() function
+    """
+
+    fasta_path = tmp_path / "seqres.fasta"
+    fasta_path.write_bytes(b">0001:A:sequence\nMKV\nLQ\n>0001:A:secstr\n HXE\n>0002:A:sequence\nMK1\n>0002:A:secstr\n"
+                           b"EE \n")
+
+    # Test case 1: records are numbered by their position in the file
+    records = read_fasta_file(str(fasta_path), keep_whitespace=True)
+    assert list(find_invalid_records(records, ALPHABETS["dssp"], match="secstr")) == \
+        [InvalidRecord(2, "0001:A:secstr", 1, ["X"], [3]), None]
+
+    # Test case 2: the spaces of wrapped and single-line records are kept
+    records = read_fasta_file(str(fasta_path), keep_whitespace=True)
+    assert list(find_invalid_records(records, ALPHABETS["protein"])) == \
+        [None, InvalidRecord(2, "0001:A:secstr", 1, [" "], [1]), InvalidRecord(3, "0002:A:sequence", 1, ["1"], [3]),
+         InvalidRecord(4, "0002:A:secstr", 1, [" "], [3])]
+
+
+def test_write_validation_report():
+    """
+    testing the write_validation_report() function
+    """
+
+    output = io.StringIO()
+    results = [None, InvalidRecord(2, "chr2", 4, [" ", "-", "R"], [3, 6]), None]
+    assert write_validation_report(results, output) == (3, 1)
+    assert output.getvalue() == ("Number\tAccession\tInvalid\tCharacters\tPositions\n"
+                                 "2\tchr2\t4\t' ','-','R'\t3,6,...\n")
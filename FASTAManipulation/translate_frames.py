@@ -0,0 +1,260 @@
+"""
+File: translate_frames.py
+This program translates the records of a nucleotide FASTA file in all six
+reading frames (or a chosen subset), with any of the common NCBI genetic
+code tables.
+
+Bases are encoded as small integers in a NumPy array and every codon is
+turned into one lookup-table index, so a whole frame is translated by a
+single table lookup instead of a Python loop over codons. Codons holding N
+or another ambiguity code translate to X.
+
+Sample command for executing the program:
+
+python3 translate_frames.py [-h] -i transcripts.fasta -o proteins.fasta [-t 11] [-f 1 -f -1]
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from fasta_io import read_fasta_file
+
+GeneticCode = namedtuple("GeneticCode", ["name", "amino_acids", "starts"])
+
+# NCBI genetic codes, amino acids and start codons listed for the 64 codons
+# in TCAG order (TTT, TTC, TTA, TTG, TCT, ... GGG)
+GENETIC_CODES = {
+    1: GeneticCode("Standard",
+                   "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+                   "---M------**--*----M---------------M----------------------------"),
+    2: GeneticCode("Vertebrate Mitochondrial",
+                   "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG",
+                   "----------**--------------------MMMM----------**---M------------"),
+    3: GeneticCode("Yeast Mitochondrial",
+                   "FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+                   "----------**----------------------MM----------------------------"),
+    4: GeneticCode("Mold, Protozoan, and Coelenterate Mitochondrial; Mycoplasma; Spiroplasma",
+                   "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+                   "--MM------**-------M------------MMMM---------------M------------"),
+    5: GeneticCode("Invertebrate Mitochondrial",
+                   "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG",
+                   "---M------**--------------------MMMM---------------M------------"),
+    6: GeneticCode("Ciliate, Dasycladacean and Hexamita Nuclear",
+                   "FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+                   "--------------*--------------------M----------------------------"),
+    9: GeneticCode("Echinoderm and Flatworm Mitochondrial",
+                   "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",
+                   "-----------------------------------M---------------M------------"),
+    11: GeneticCode("Bacterial, Archaeal and Plant Plastid",
+                    "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+                    "---M------**--*----M------------MMMM---------------M------------"),
+}
+
+FRAMES = [1, 2, 3, -1, -2, -3]
+
+# Code of every byte value: T/U=0, C=1, A=2, G=3 in either case, anything
+# else is 4. Codons are indexed in base 5, so a codon with a 4 in it gets
+# an index of its own that translates to X.
+_BASE_CODES = np.full(256, 4, dtype=np.uint8)
+for _code, _bases in enumerate([b"TtUu", b"Cc", b"Aa", b"Gg"]):
+    _BASE_CODES[np.frombuffer(_bases, dtype=np.uint8)] = _code
+_COMPLEMENT_CODES = np.array([2, 3, 0, 1, 4], dtype=np.uint8)
+_NUM_CODON_INDEXES = 125
+
+# Bases of short records translated together
+_BATCH_SIZE = 1 << 20
+
+
+def get_codon_table(table_id=1):
+    """
+    Lookup table from base-5 codon index to amino acid
+    :param table_id: NCBI genetic code number, a key of GENETIC_CODES
+    :return: NumPy uint8 array of 125 amino acid bytes
+    """
+
+    amino_acids = GENETIC_CODES[table_id].amino_acids.encode("ascii")
+    codon_table = np.full(_NUM_CODON_INDEXES, ord("X"), dtype=np.uint8)
+    for tcag_index, amino_acid in enumerate(amino_acids):
+        first, second, third = tcag_index // 16, tcag_index // 4 % 4, tcag_index % 4
+        codon_table[first * 25 + second * 5 + third] = amino_acid
+    return codon_table
+
+
+def encode_nucleotides(sequence):
+    """
+    Encode a sequence as base codes, T/U=0, C=1, A=2, G=3 and 4 for anything else
+    :param sequence: str or bytes-like sequence
+    :return: NumPy uint8 array
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    return _BASE_CODES[np.frombuffer(sequence, dtype=np.uint8)]
+
+
+def get_codon_indexes(codes):
+    """
+    Base-5 codon index starting at every position of an encoded sequence
+    :param codes: NumPy uint8 array from encode_nucleotides()
+    :return: NumPy uint8 array of len(codes) - 2 indexes, every third entry is one frame
+    """
+
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.uint8)
+    return codes[:-2] * np.uint8(25) + codes[1:-1] * np.uint8(5) + codes[2:]
+
+
+def _translate_batch(batch, codon_table, frames):
+    """
+    Translate a batch of sequences with one table lookup per strand. The
+    sequences are encoded back to back, every codon position of the batch is
+    translated, and each record's frames are strided slices of the result.
+    :param batch: List of (record id, sequence bytes) tuples
+    :param codon_table: Lookup table from get_codon_table()
+    :param frames: Frames to translate
+    :return: generator of (record id, frame, protein bytes) tuples
+    """
+
+    codes = encode_nucleotides(b"".join(sequence for _, sequence in batch))
+    total_length = len(codes)
+    forward = reverse = b""
+    if any(frame > 0 for frame in frames):
+        forward = codon_table[get_codon_indexes(codes)].tobytes()
+    if any(frame < 0 for frame in frames):
+        # The reverse strand of the batch holds the records in reverse order
+        reverse = codon_table[get_codon_indexes(_COMPLEMENT_CODES[codes[::-1]])].tobytes()
+
+    offset = 0
+    for record_id, sequence in batch:
+        length = len(sequence)
+        reverse_offset = total_length - offset - length
+        for frame in frames:
+            # Codons must start at least two bases before the end of the record
+            if frame > 0:
+                protein = forward[offset + frame - 1:max(offset + length - 2, 0):3]
+            else:
+                protein = reverse[reverse_offset - frame - 1:max(reverse_offset + length - 2, 0):3]
+            yield record_id, frame, protein
+        offset += length
+
+
+def translate_frames(sequence, codon_table, frames=None):
+    """
+    Translate a sequence in several reading frames. Frames 1-3 start at the
+    first, second and third base; frames -1 to -3 start at the last, second
+    to last and third to last base of the reverse complement strand.
+    :param sequence: str or bytes-like sequence
+    :param codon_table: Lookup table from get_codon_table()
+    :param frames: Frames to translate, default all six
+    :return: list of (frame, protein bytes) tuples, in the order of frames
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    return [(frame, protein) for _, frame, protein in
+            _translate_batch([(None, sequence)], codon_table, frames or FRAMES)]
+
+
+def translate_records(records, table_id=1, frames=None):
+    """
+    generator: translate_records(records)
+    Translate every record of a FASTA file as it is read. Short records are
+    translated in batches of about _BATCH_SIZE bases.
+    @param records: Iterable of (header, sequence) tuples, e.g. read_fasta_file()
+    @param table_id: NCBI genetic code number, a key of GENETIC_CODES
+    @param frames: Frames to translate, default all six
+    @return: generator of (record id, frame, protein bytes) tuples
+    """
+
+    codon_table = get_codon_table(table_id)
+    frames = frames or FRAMES
+    batch = []
+    batch_size = 0
+    for header, sequence in records:
+        if isinstance(sequence, str):
+            sequence = sequence.encode("latin-1", errors="replace")
+        batch.append(((header.split() or [header])[0], sequence))
+        batch_size += len(sequence)
+        if batch_size >= _BATCH_SIZE:
+            yield from _translate_batch(batch, codon_table, frames)
+            batch = []
+            batch_size = 0
+
+    if batch:
+        yield from _translate_batch(batch, codon_table, frames)
+
+
+def format_protein_record(name, protein, line_width=60):
+    """
+    Render one protein FASTA record
+    :param name: Record name without the ">"
+    :param protein: Protein bytes
+    :param line_width: Residues per line, 0 writes the protein on one line
+    :return: record as bytes
+    """
+
+    if not protein:
+        return b">" + name.encode("utf-8") + b"\n"
+    if line_width:
+        protein = b"\n".join([protein[i:i + line_width] for i in range(0, len(protein), line_width)])
+    return b">" + name.encode("utf-8") + b"\n" + protein + b"\n"
+
+
+def write_translations(translations, output_file, line_width=60):
+    """
+    Write translations as protein FASTA records named <record id>_frame<frame>
+    :param translations: Iterable of rows from translate_records()
+    :param output_file: Filehandle opened in binary mode
+    :param line_width: Residues per line, 0 writes each protein on one line
+    :return: Number of records written
+    """
+
+    num_records = 0
+    for num_records, (record_id, frame, protein) in enumerate(translations, start=1):
+        output_file.write(format_protein_record(f"{record_id}_frame{frame:+d}", protein, line_width))
+    return num_records
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a nucleotide FASTA file to translate it in six frames")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-o", "--outfile", required=True, type=str, help="Path to file to write")
+    parser.add_argument("-t", "--table", default=1, type=int, choices=sorted(GENETIC_CODES),
+                        help="NCBI genetic code table (default: 1, Standard)")
+    parser.add_argument("-f", "--frame", action="append", type=int, choices=FRAMES,
+                        help="Frame to translate, 1 to 3 or -1 to -3 (repeatable, default: all six)")
+    parser.add_argument("-l", "--line-width", default=60, type=int,
+                        help="Residues per output line, 0 for one line per protein (default: 60)")
+    args = parser.parse_args()
+    if args.line_width < 0:
+        parser.error("--line-width must not be negative")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+
+    try:
+        outfile = open(args.outfile, "wb")
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    with outfile:
+        translations = translate_records(read_fasta_file(args.infile), args.table, args.frame)
+        write_translations(translations, outfile, args.line_width)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+File: twobit.py
+Reading and writing of UCSC .2bit sequence files.
+
+A .2bit file packs four bases per byte (T=0, C=1, A=2, G=3, first base in
+the high bits) and keeps runs of N and of soft-masked (lowercase) bases as
+interval lists, so a reference takes a quarter of the space and I/O of its
+text FASTA. The files are compatible with the UCSC faToTwoBit/twoBitToFa
+tools: bases other than A, C, G and T are stored as N.
+
+TwoBitReader memory-maps the file and unpacks only the bytes covering a
+requested region.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+_SIGNATURE = 0x1A412743
+_HEADER_SIZE = 16
+# Version 0 stores 32-bit record offsets, version 1 64-bit ones
+_MAX_VERSION_0_SIZE = 1 << 32
+
+# The four bases packed in every byte value, and code of every base (N is stored as T)
+_CODE_BASES = np.frombuffer(b"TCAG", dtype=np.uint8)
+_UNPACKED_BYTES = _CODE_BASES[np.array([[value >> shift & 3 for shift in (6, 4, 2, 0)] for value in range(256)])]
+_BASE_CODES = np.zeros(256, dtype=np.uint8)
+for _code, _bases in enumerate([b"Tt", b"Cc", b"Aa", b"Gg"]):
+    _BASE_CODES[np.frombuffer(_bases, dtype=np.uint8)] = _code
+
+# Byte values stored as N, and byte values stored as soft-masked
+_IS_N = np.ones(256, dtype=bool)
+_IS_N[np.frombuffer(b"ACGTacgt", dtype=np.uint8)] = False
+_IS_LOWER = np.zeros(256, dtype=bool)
+_IS_LOWER[ord("a"):ord("z") + 1] = True
+
+# Bytes copied at a time when assembling the output file
+_COPY_BLOCK_SIZE = 1 << 20
+
+TwoBitRecord = namedtuple("TwoBitRecord", ["name", "length", "n_starts", "n_sizes",
+                                           "mask_starts", "mask_sizes", "dna_offset"])
+
+
+def is_twobit(file_name):
+    """
+    Detect a .2bit file from its signature, in either byte order
+    :param file_name: Path to the file
+    :return: True for a .2bit file
+    """
+
+    with open(file_name, "rb") as fh_in:
+        signature = fh_in.read(4)
+    return len(signature) == 4 and _SIGNATURE in (struct.unpack("<I", signature)[0],
+                                                  struct.unpack(">I", signature)[0])
+
+
+def get_runs(mask):
+    """
+    Run-length encode the True runs of a boolean array
+    :param mask: NumPy boolean array
+    :return: (starts, sizes) NumPy int64 arrays, one entry per run of True
+    """
+
+    edges = np.flatnonzero(np.diff(mask.view(np.int8), prepend=0, append=0))
+    return edges[::2], edges[1::2] - edges[::2]
+
+
+def encode_twobit_record(sequence):
+    """
+    Encode one sequence as a .2bit record
+    :param sequence: str or bytes-like sequence
+    :return: record as bytes, without the record name
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    seq_array = np.frombuffer(sequence, dtype=np.uint8)
+
+    n_starts, n_sizes = get_runs(_IS_N[seq_array])
+    mask_starts, mask_sizes = get_runs(_IS_LOWER[seq_array])
+
+    # Pad to a whole number of bytes with T, then pack four codes per byte
+    codes = np.zeros((len(seq_array) + 3) // 4 * 4, dtype=np.uint8)
+    codes[:len(seq_array)] = _BASE_CODES[seq_array]
+    codes = codes.reshape(-1, 4)
+    packed = codes[:, 0] << 6 | codes[:, 1] << 4 | codes[:, 2] << 2 | codes[:, 3]
+
+    return b"".join([struct.pack("<II", len(seq_array), len(n_starts)),
+                     n_starts.astype("<u4").tobytes(),
+                     n_sizes.astype("<u4").tobytes(),
+                     struct.pack("<I", len(mask_starts)),
+                     mask_starts.astype("<u4").tobytes(),
+                     mask_sizes.astype("<u4").tobytes(),
+                     struct.pack("<I", 0),
+                     packed.tobytes()])
+
+
+def write_twobit(records, file_name):
+    """
+    Write FASTA records to a .2bit file. Records are encoded one at a time
+    into a temporary file next to the output, then the index is written in
+    front of them.
+    :param records: Iterable of (header, sequence) tuples, the name is the first word of the header
+    :param file_name: Path of the .2bit file to write
+    :return: Number of records written
+    """
+
+    names = []
+    sizes = []
+    out_dir = os.path.dirname(os.path.abspath(file_name))
+    with tempfile.TemporaryFile(dir=out_dir) as fh_body:
+        for header, sequence in records:
+            record = encode_twobit_record(sequence)
+            names.append((header.split() or [header])[0].encode("utf-8"))
+            sizes.append(len(record))
+            fh_body.write(record)
+
+        index_size = sum(1 + len(name) for name in names)
+        version = 0
+        if _HEADER_SIZE + index_size + 8 * len(names) + sum(sizes) > _MAX_VERSION_0_SIZE:
+            version = 1
+        offset_format = "<Q" if version else "<I"
+        offset = _HEADER_SIZE + index_size + struct.calcsize(offset_format) * len(names)
+
+        with open(file_name, "wb") as fh_out:
+            fh_out.write(struct.pack("<IIII", _SIGNATURE, version, len(names), 0))
+            for name, size in zip(names, sizes):
+                fh_out.write(struct.pack("<B", len(name)) + name + struct.pack(offset_format, offset))
+                offset += size
+
+            fh_body.seek(0)
+            for block in iter(lambda: fh_body.read(_COPY_BLOCK_SIZE), b""):
+                fh_out.write(block)
+
+    return len(names)
+
+
+def _get_interval_mask(starts, sizes, start, end):
+    """
+    Mark the positions of a region covered by sorted, non-overlapping intervals
+    :param starts: NumPy array of interval starts
+    :param sizes: NumPy array of interval sizes
+    :param start: First position of the region
+    :param end: Position after the region
+    :return: NumPy boolean array of end - start entries
+    """
+
+    ends = starts + sizes
+    first = np.searchsorted(ends, start, side="right")
+    last = np.searchsorted(starts, end, side="left")
+    if first >= last:
+        return np.zeros(end - start, dtype=bool)
+
+    clipped_starts = np.maximum(starts[first:last], start) - start
+    clipped_ends = np.minimum(ends[first:last], end) - start
+
+    # Flip a boolean at every position where an interval opens or closes and
+    # carry the flips along the region with a running XOR, so the region
+    # takes one byte per base. Intervals touching each other are merged first,
+    # their shared position would otherwise be flipped twice.
+    touching = clipped_starts[1:] == clipped_ends[:-1]
+    flips = np.zeros(end - start + 1, dtype=bool)
+    flips[clipped_starts[np.concatenate(([True], ~touching))]] = True
+    flips[clipped_ends[np.concatenate((~touching, [True]))]] = True
+    return np.logical_xor.accumulate(flips[:-1], out=flips[:-1])
+
+
+class TwoBitReader:
+    """
+    Random access to the records of a .2bit file through a memory map
+    """
+
+    def __init__(self, file_name):
+        with open(file_name, "rb") as fh_in:
+            self._mapping = mmap.mmap(fh_in.fileno(), 0, access=mmap.ACCESS_READ)
+
+        signature = self._mapping[:4]
+        self._byte_order = "<" if struct.unpack("<I", signature)[0] == _SIGNATURE else ">"
+        _, version, num_records, _ = self._unpack("IIII", 0)
+        offset_format = "Q" if version == 1 else "I"
+
+        # Record name -> offset of the record, in file order
+        self._offsets = {}
+        position = _HEADER_SIZE
+        for _ in range(num_records):
+            name_size = self._mapping[position]
+            name = self._mapping[position + 1:position + 1 + name_size].decode("utf-8")
+            position += 1 + name_size
+            self._offsets[name] = self._unpack(offset_format, position)[0]
+            position += struct.calcsize(offset_format)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Release the memory map
+        :return: None
+        """
+
+        self._mapping.close()
+
+    def _unpack(self, fields, position):
+        """
+        Unpack integers at a position of the file in its byte order
+        :param fields: struct format characters, without the byte order
+        :param position: Byte offset
+        :return: tuple of values
+        """
+
+        return struct.unpack_from(self._byte_order + fields, self._mapping, position)
+
+    def _read_blocks(self, position):
+        """
+        Read a block count and its start and size arrays
+        :param position: Byte offset of the block count
+        :return: (starts, sizes, byte offset after the arrays)
+        """
+
+        num_blocks = self._unpack("I", position)[0]
+        blocks = np.frombuffer(self._mapping[position + 4:position + 4 + 8 * num_blocks],
+                               dtype=self._byte_order + "u4").astype(np.int64)
+        return blocks[:num_blocks], blocks[num_blocks:], position + 4 + 8 * num_blocks
+
+    def names(self):
+        """
+        Names of the records, in file order
+        :return: list of str
+        """
+
+        return list(self._offsets)
+
+    def get_length(self, name):
+        """
+        Number of bases of a record, read without touching its blocks or bases
+        :param name: Record name
+        :return: int
+        """
+
+        return self._unpack("I", self._offsets[name])[0]
+
+    def get_record(self, name):
+        """
+        Length, N blocks, soft-mask blocks and packed base offset of a record
+        :param name: Record name
+        :return: TwoBitRecord
+        """
+
+        position = self._offsets[name]
+        length = self._unpack("I", position)[0]
+        n_starts, n_sizes, position = self._read_blocks(position + 4)
+        mask_starts, mask_sizes, position = self._read_blocks(position)
+        return TwoBitRecord(name, length, n_starts, n_sizes, mask_starts, mask_sizes, position + 4)
+
+    def fetch(self, name, start=0, end=None, soft_mask=True):
+        """
+        Bases of a region of a record, unpacked from the bytes covering it
+        :param name: Record name
+        :param start: 0-based first position
+        :param end: Position after the region, default the end of the record
+        :param soft_mask: Return soft-masked bases in lowercase
+        :return: sequence as bytes
+        """
+
+        return self.fetch_record(self.get_record(name), start, end, soft_mask)
+
+    def fetch_record(self, record, start=0, end=None, soft_mask=True):
+        """
+        Bases of a region of a record already read with get_record(), so that
+        many regions of one record read its N and mask blocks only once
+        :param record: TwoBitRecord from get_record()
+        :param start: 0-based first position
+        :param end: Position after the region, default the end of the record
+        :param soft_mask: Return soft-masked bases in lowercase
+        :return: sequence as bytes
+        """
+
+        end = record.length if end is None else min(end, record.length)
+        start = min(max(start, 0), end)
+
+        first_byte = start // 4
+        packed = np.frombuffer(self._mapping[record.dna_offset + first_byte:record.dna_offset + (end + 3) // 4],
+                               dtype=np.uint8)
+        bases = _UNPACKED_BYTES[packed].reshape(-1)[start - 4 * first_byte:end - 4 * first_byte]
+        bases[_get_interval_mask(record.n_starts, record.n_sizes, start, end)] = ord("N")
+        if soft_mask:
+            # Setting bit 0x20 turns an uppercase letter into lowercase
+            bases[_get_interval_mask(record.mask_starts, record.mask_sizes, start, end)] |= 0x20
+        return bases.tobytes()
+
+
+def read_twobit_records(file_name, soft_mask=True):
+    """
+    generator: read_twobit_records(file_name)
+    Yield the records of a .2bit file like the FASTA readers do
+    @param file_name: Path to a .2bit file
+    @param soft_mask: Return soft-masked bases in lowercase
+    @return: generator of (name, sequence bytes) tuples, in file order
+    """
+
+    with TwoBitReader(file_name) as reader:
+        for name in reader.names():
+            yield name, reader.fetch(name, soft_mask=soft_mask)
+
+
+def get_twobit_lengths(file_name):
+    """
+    generator: get_twobit_lengths(file_name)
+    Record lengths of a .2bit file, read from the record headers only
+    @param file_name: Path to a .2bit file
+    @return: generator of (name, length) tuples, in file order
+    """
+
+    with TwoBitReader(file_name) as reader:
+        for name in reader.names():
+            yield name, reader.get_length(name)
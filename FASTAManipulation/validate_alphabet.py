@@ -0,0 +1,169 @@
+"""
+File: validate_alphabet.py
+This program checks every record of a FASTA file against an alphabet (DNA,
+IUPAC DNA, protein or DSSP secondary structure) and reports the records
+holding anything else, with the offending characters and their positions.
+
+Each sequence is checked with one bytes.translate() call deleting the
+allowed bytes: a valid sequence leaves nothing behind, so valid records
+cost a single C-level pass and positions are only looked up for the
+invalid ones. Sequences are read with their spaces kept, so a space is an
+error unless the alphabet allows it, as DSSP does for coil.
+
+The exit status is 1 when any record is invalid, so the program can gate
+the ingestion of a file.
+
+Sample command for executing the program:
+
+python3 validate_alphabet.py [-h] -i input_file.fasta -a dna [-e "-*"] [-o invalid.txt] [-n 10]
+python3 validate_alphabet.py [-h] -i pdb_seqres.txt -a dssp -m secstr
+"""
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from fasta_io import read_fasta_file
+
+_PROTEIN = b"ACDEFGHIKLMNPQRSTVWYBJOUXZ*"
+
+# Allowed bytes of each alphabet; nucleotides in either case, lowercase
+# being soft-masked
+ALPHABETS = {
+    "dna": b"ACGTNacgtn",
+    "iupac-dna": b"ACGTRYSWKMBDHVNacgtryswkmbdhvn",
+    "protein": _PROTEIN + _PROTEIN.lower(),
+    "dssp": b"HBEGITSP ",
+}
+
+# Record number (1-based), accession, number of invalid characters, the
+# distinct invalid characters and the first 1-based positions holding one
+InvalidRecord = namedtuple("InvalidRecord", ["number", "accession", "num_invalid", "characters", "positions"])
+
+# Invalid positions listed per record by default
+_MAX_POSITIONS = 10
+
+
+def get_invalid_record(number, header, sequence, allowed, max_positions=_MAX_POSITIONS):
+    """
+    Check one record against an alphabet
+    :param number: 1-based record number
+    :param header: FASTA header without the ">"
+    :param sequence: str or bytes-like sequence
+    :param allowed: Allowed bytes, e.g. ALPHABETS["dna"]
+    :param max_positions: Number of invalid positions to report
+    :return: InvalidRecord, or None when the record is valid
+    """
+
+    if isinstance(sequence, str):
+        sequence = sequence.encode("latin-1", errors="replace")
+    elif not isinstance(sequence, bytes):
+        sequence = bytes(sequence)
+
+    invalid_bytes = sequence.translate(None, allowed)
+    if not invalid_bytes:
+        return None
+
+    is_allowed = np.zeros(256, dtype=bool)
+    is_allowed[np.frombuffer(allowed, dtype=np.uint8)] = True
+    positions = np.flatnonzero(~is_allowed[np.frombuffer(sequence, dtype=np.uint8)])
+    return InvalidRecord(number, (header.split() or [header])[0], len(invalid_bytes),
+                         sorted(set(invalid_bytes.decode("latin-1"))), (positions[:max_positions] + 1).tolist())
+
+
+def find_invalid_records(records, allowed, max_positions=_MAX_POSITIONS, match=None):
+    """
+    generator: find_invalid_records(records, allowed)
+    Check every record against an alphabet
+    @param records: Iterable of (header, sequence) tuples, read with keep_whitespace=True
+    @param allowed: Allowed bytes, e.g. ALPHABETS["dna"]
+    @param max_positions: Number of invalid positions to report per record
+    @param match: Only check records whose header contains this text
+    @return: generator of InvalidRecord for an invalid record and None for a valid
+    one, records are numbered by their position in the file
+    """
+
+    for number, (header, sequence) in enumerate(records, start=1):
+        if match is not None and match not in header:
+            continue
+        yield get_invalid_record(number, header, sequence, allowed, max_positions)
+
+
+def write_validation_report(results, output_file):
+    """
+    Write one line per invalid record
+    :param results: Iterable from find_invalid_records(), checked records are counted
+    :param output_file: Open filehandle to write the report to
+    :return: (number of records checked, number of invalid records)
+    """
+
+    print("Number\tAccession\tInvalid\tCharacters\tPositions", file=output_file)
+
+    num_records = 0
+    num_invalid = 0
+    for num_records, result in enumerate(results, start=1):
+        if result is None:
+            continue
+        num_invalid += 1
+        positions = [str(position) for position in result.positions]
+        if result.num_invalid > len(positions):
+            positions.append("...")
+        print(f"{result.number}\t{result.accession}\t{result.num_invalid}"
+              f"\t{','.join(repr(character) for character in result.characters)}\t{','.join(positions)}",
+              file=output_file)
+
+    return num_records, num_invalid
+
+
+def get_cli_args():
+    """
+        void: get_cli_args()
+        Takes: no arguments
+        @return: instances of argparse arguments
+    """
+
+    parser = argparse.ArgumentParser(
+        description="Provide a FASTA file to check every record against an alphabet")
+    parser.add_argument("-i", "--infile", required=True, type=str, help="Path to file to open")
+    parser.add_argument("-a", "--alphabet", required=True, choices=sorted(ALPHABETS),
+                        help="Alphabet the sequences must be written in")
+    parser.add_argument("-m", "--match", type=str,
+                        help="Only check records whose header contains this text, e.g. secstr in PDB seqres files")
+    parser.add_argument("-e", "--extra", default="", type=str,
+                        help="Further characters to allow, e.g. '-' for alignment gaps")
+    parser.add_argument("-o", "--outfile", type=str,
+                        help="Path to write the report of invalid records (default: stdout)")
+    parser.add_argument("-n", "--max-positions", default=_MAX_POSITIONS, type=int,
+                        help=f"Invalid positions listed per record (default: {_MAX_POSITIONS})")
+    args = parser.parse_args()
+    if args.max_positions < 0:
+        parser.error("--max-positions must not be negative")
+    return args
+
+
+def main():
+    """Business logic"""
+
+    args = get_cli_args()
+    allowed = ALPHABETS[args.alphabet] + args.extra.encode("latin-1", errors="replace")
+
+    try:
+        fh_out = open(args.outfile, "w", encoding="utf-8") if args.outfile else sys.stdout
+    except OSError as e:
+        print(e)
+        sys.exit(1)
+
+    records = read_fasta_file(args.infile, keep_whitespace=True)
+    results = find_invalid_records(records, allowed, args.max_positions, args.match)
+    num_records, num_invalid = write_validation_report(results, fh_out)
+    if fh_out is not sys.stdout:
+        fh_out.close()
+
+    sys.stderr.write(f"Found {num_invalid} invalid records out of {num_records}\n")
+    if num_invalid:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()